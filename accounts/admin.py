@@ -1,12 +1,19 @@
 # Register your models here.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.utils import timezone
 
-from .models import CustomUser
+from courses.paginators import EstimatedCountPaginator
+
+from .models import CustomUser, OutboxEmail
 
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
+    # Prefix lookups use the username and email indexes (also for autocomplete)
+    search_fields = ("username__startswith", "email__startswith")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     # Optional: show your extra fields in admin
     fieldsets = UserAdmin.fieldsets + (
@@ -19,3 +26,24 @@ class CustomUserAdmin(UserAdmin):
 
 
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject",)
+    readonly_fields = ("created_at", "claimed_at", "sent_at")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ("retry",)
+
+    @admin.action(description="Retry delivery now")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=OutboxEmail.SENT).update(
+            status=OutboxEmail.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            claimed_at=None,
+        )
+        self.message_user(request, f"Queued {count} email(s) for delivery.")
@@ -0,0 +1,19 @@
+# accounts/backends.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class ProfileModelBackend(ModelBackend):
+    """``ModelBackend`` that loads the profile with the user.
+
+    Most pages read ``request.user.profile`` (the navbar, the learner
+    context), so joining it here saves a query per request.
+    """
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related("profile").get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
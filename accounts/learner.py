@@ -0,0 +1,102 @@
+# accounts/learner.py
+"""Request-scoped learner context.
+
+``LearnerContextMiddleware`` sets ``request.learner``, loaded on first use:
+the user and profile (joined by ``ProfileModelBackend``), the preferred
+language and the courses the learner is enrolled in. The enrollment list
+(only enrollment and course ids) is kept in the session together with
+``Profile.context_version``; enrolling or unenrolling bumps the version in
+the profile UPDATE that already runs, so a stale list is reloaded on the next
+request at no extra cost, and any worker sees the bump because the profile
+row is read with the user anyway. Course slugs and titles are looked up in
+the ``courses.structure`` snapshot, so editing a course shows up at once.
+"""
+
+from dataclasses import dataclass
+
+from django.utils.functional import SimpleLazyObject
+
+from courses import structure
+from courses.models import Enrollment
+
+SESSION_KEY = "_learner_enrollments"
+
+
+@dataclass(frozen=True)
+class EnrolledCourse:
+    enrollment_id: int
+    course_id: int
+
+    @property
+    def course(self):
+        """The course's ``CourseSnapshot``, or ``None`` if it is gone."""
+        return structure.get_course(pk=self.course_id)
+
+    @property
+    def slug(self):
+        return self.course.slug if self.course else None
+
+    @property
+    def title(self):
+        return self.course.title if self.course else None
+
+
+@dataclass(frozen=True)
+class LearnerContext:
+    user: object
+    profile: object
+    enrollments: tuple  # of EnrolledCourse, latest enrollment first
+
+    @property
+    def language(self):
+        return self.profile.preferred_language
+
+    @property
+    def latest_enrollment(self):
+        return self.enrollments[0] if self.enrollments else None
+
+    def enrollment_for(self, course_id):
+        return next((e for e in self.enrollments if e.course_id == course_id), None)
+
+
+def _load_enrollments(user):
+    return [
+        list(row)
+        for row in Enrollment.objects.filter(user=user)
+        .order_by("-enrolled_at", "-pk")
+        .values_list("pk", "course_id")
+    ]
+
+
+def load(request):
+    """``LearnerContext`` of ``request.user``, or ``None`` when anonymous."""
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    profile = user.profile
+    cached = request.session.get(SESSION_KEY)
+    key = [str(user.pk), profile.context_version]
+    if not cached or cached["key"] != key:
+        cached = {"key": key, "enrollments": _load_enrollments(user)}
+        request.session[SESSION_KEY] = cached
+    return LearnerContext(
+        user=user,
+        profile=profile,
+        enrollments=tuple(EnrolledCourse(*row) for row in cached["enrollments"]),
+    )
+
+
+class LearnerContextMiddleware:
+    """Set a lazy ``request.learner``; must come after ``AuthenticationMiddleware``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.learner = SimpleLazyObject(lambda: load(request))
+        return self.get_response(request)
+
+
+def learner(request):
+    """Template context processor exposing ``learner``."""
+    return {"learner": getattr(request, "learner", None)}
@@ -0,0 +1,60 @@
+"""
+Management command to deliver queued emails from the outbox.
+
+Claims due emails in batches with SELECT ... FOR UPDATE SKIP LOCKED, so
+several dispatchers can run side by side, and sends them over one SMTP
+connection that stays open while there is mail to send. Stops cleanly on
+SIGINT/SIGTERM after the current batch.
+"""
+
+import signal
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails (OutboxEmail) until stopped"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=outbox.BATCH_SIZE)
+        parser.add_argument(
+            "--idle-sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when no email is due",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the due emails once and exit"
+        )
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        connection = get_connection(fail_silently=False)
+        claimed_total = 0
+        try:
+            while self.running:
+                close_old_connections()
+                outbox.requeue_expired()
+                claimed = outbox.run_once(connection, options["batch_size"])
+                claimed_total += claimed
+                if not claimed:
+                    # Don't hold an idle SMTP session open
+                    connection.close()
+                    if options["once"]:
+                        break
+                    time.sleep(options["idle_sleep"])
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {claimed_total} email(s)."))
+
+    def _stop(self, signum, frame):
+        self.running = False
@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-17 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_profile_display_name_profile_preferred_language"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="customuser",
+            name="email",
+            field=models.EmailField(
+                blank=True, db_index=True, max_length=254, verbose_name="email address"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_outboxemail"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxemail",
+            name="key",
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0 on 2026-10-17 07:14
+
+from datetime import date
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+EPOCH = date(2025, 1, 1)  # courses.activity.EPOCH
+
+
+def fill_activity(apps, schema_editor):
+    Profile = apps.get_model("accounts", "Profile")
+    UserChallengeAttempt = apps.get_model("courses", "UserChallengeAttempt")
+    days = (
+        UserChallengeAttempt.objects.annotate(day=TruncDate("submitted_at"))
+        .values_list("user_id", "day")
+        .distinct()
+        .order_by("user_id")
+    )
+    bitmaps = {}
+    for user_id, day in days.iterator():
+        n = (day - EPOCH).days
+        if n >= 0:
+            bitmaps[user_id] = bitmaps.get(user_id, 0) | 1 << n
+    for profile in Profile.objects.filter(user_id__in=list(bitmaps)).iterator():
+        bits = bitmaps[profile.user_id]
+        profile.activity = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        profile.save(update_fields=["activity"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_outboxemail_key"),
+        ("courses", "0018_coach_signals"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="activity",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.RunPython(fill_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_profile_activity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="context_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -6,10 +6,14 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
 
 class CustomUser(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Indexed for exact and prefix lookups from the admin search
+    email = models.EmailField(_("email address"), blank=True, db_index=True)
     phone_number = models.CharField(max_length=16, blank=True, null=True)
     preferred_course = models.CharField(max_length=50, blank=True, null=True)
     # role if needed
@@ -34,14 +38,57 @@ class Profile(models.Model):
     completed_challenges = models.PositiveIntegerField(default=0)
     current_streak = models.PositiveIntegerField(default=0)
     last_active = models.DateTimeField(null=True, blank=True)
+    # One bit per day with an attempt, see courses/activity.py
+    activity = models.BinaryField(default=b"", editable=False)
+    # Bumped when the enrollments cached by accounts/learner.py change
+    context_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.user.username}'s profile"
 
 
+class OutboxEmail(models.Model):
+    """An email waiting for (or done with) delivery by ``send_outbox``."""
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (DEAD, "Dead"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    # Optional idempotency key, e.g. one weekly digest per learner and week
+    key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"], name="outbox_status_due_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)} ({self.status})"
+
+
 @receiver(post_save, sender=CustomUser)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_user_profile(sender, instance, created, **kwargs):
+    # Profile changes are saved explicitly; re-saving it on every user save
+    # (each login updates last_login) only cost queries.
     if created:
         Profile.objects.create(user=instance, display_name=instance.username)
-    else:
-        instance.profile.save()
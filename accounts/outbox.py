@@ -0,0 +1,163 @@
+# accounts/outbox.py
+"""Transactional email outbox.
+
+Views call ``queue_mail`` instead of ``send_mail``: the email is stored as an
+``OutboxEmail`` row in the caller's transaction, so it is sent only if the
+request commits, and the request never waits on the mail server.
+Each ``send_outbox`` process claims due rows in batches with
+``SELECT ... FOR UPDATE SKIP LOCKED`` and delivers them over one SMTP
+connection kept open between batches, marking each email sent as soon as it
+goes out. Failed deliveries are retried with exponential backoff; after
+``EMAIL_OUTBOX_MAX_ATTEMPTS`` the email is dead-lettered for an admin to
+inspect and retry.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 6 * 60 * 60
+
+
+def _email(subject, message, recipient_list, from_email=None, key=None):
+    return OutboxEmail(
+        subject=str(subject),
+        body=str(message),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+        key=key,
+    )
+
+
+def queue_mail(subject, message, recipient_list, from_email=None, key=None):
+    """Store an email for delivery; call inside the transaction it belongs to."""
+    email = _email(subject, message, recipient_list, from_email, key)
+    email.save()
+    return email
+
+
+def queue_many(emails, batch_size=1000):
+    """Store many emails, given as ``queue_mail`` keyword dicts, in bulk.
+
+    Emails whose ``key`` is already in the outbox are skipped, so a rerun
+    queues nothing twice.
+    """
+    OutboxEmail.objects.bulk_create(
+        (_email(**email) for email in emails),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+
+def backoff(attempts):
+    """Seconds to wait before delivery attempt ``attempts + 1``."""
+    return min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+
+
+def claim_batch(size=BATCH_SIZE):
+    """Mark up to ``size`` due emails as sending and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:size]
+        )
+        if not ids:
+            return []
+        OutboxEmail.objects.filter(pk__in=ids).update(
+            status=OutboxEmail.SENDING, claimed_at=now
+        )
+    return list(OutboxEmail.objects.filter(pk__in=ids).order_by("id"))
+
+
+def requeue_expired(lease=None):
+    """Return emails whose dispatcher died mid-batch to the pending state."""
+    lease = settings.EMAIL_OUTBOX_LEASE if lease is None else lease
+    return OutboxEmail.objects.filter(
+        status=OutboxEmail.SENDING,
+        claimed_at__lt=timezone.now() - timedelta(seconds=lease),
+    ).update(status=OutboxEmail.PENDING, claimed_at=None)
+
+
+def _fail(email, error):
+    attempts = email.attempts + 1
+    changes = {"attempts": attempts, "last_error": error, "claimed_at": None}
+    if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        logger.error("Dead-lettered email %s after %s attempts", email.pk, attempts)
+        changes["status"] = OutboxEmail.DEAD
+    else:
+        changes["status"] = OutboxEmail.PENDING
+        changes["next_attempt_at"] = timezone.now() + timedelta(
+            seconds=backoff(attempts)
+        )
+    OutboxEmail.objects.filter(pk=email.pk, status=OutboxEmail.SENDING).update(
+        **changes
+    )
+
+
+def _renew(emails):
+    """Extend the claim on ``emails`` so ``requeue_expired`` leaves them alone."""
+    OutboxEmail.objects.filter(
+        pk__in=[email.pk for email in emails], status=OutboxEmail.SENDING
+    ).update(claimed_at=timezone.now())
+
+
+def deliver(emails, connection):
+    """Send claimed emails over ``connection``; returns the number sent.
+
+    The caller owns the connection: it is opened here if needed and left
+    open, so consecutive batches reuse it. Each email is marked sent as soon
+    as the server accepts it, so a dispatcher that dies mid-batch resends
+    nothing, and the claim on the rest of the batch is renewed every half
+    lease while a slow server works through it.
+    """
+    sent = 0
+    renew_every = settings.EMAIL_OUTBOX_LEASE / 2
+    renewed = time.monotonic()
+    for position, email in enumerate(emails):
+        if time.monotonic() - renewed >= renew_every:
+            _renew(emails[position:])
+            renewed = time.monotonic()
+        try:
+            connection.open()
+        except Exception as exc:
+            # The server is unreachable: the rest of the batch would fail too.
+            for pending in emails[position:]:
+                _fail(pending, repr(exc))
+            break
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, email.to, connection=connection
+        )
+        try:
+            connection.send_messages([message])
+        except Exception as exc:
+            _fail(email, repr(exc))
+            # Start the next message on a fresh connection
+            connection.close()
+            continue
+        OutboxEmail.objects.filter(pk=email.pk, status=OutboxEmail.SENDING).update(
+            status=OutboxEmail.SENT, sent_at=timezone.now(), claimed_at=None
+        )
+        sent += 1
+    return sent
+
+
+def run_once(connection, batch_size=BATCH_SIZE):
+    """Claim and deliver one batch; returns the number of emails claimed."""
+    emails = claim_batch(batch_size)
+    if emails:
+        deliver(emails, connection)
+    return len(emails)
@@ -1,17 +1,63 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPServerDisconnected
+
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db.models import F
 from django.urls import reverse
+from django.utils import timezone
 
 import pytest
 
+from accounts import outbox
+from accounts.models import OutboxEmail
+
 User = get_user_model()
 
 
+def dispatch():
+    call_command("send_outbox", "--once", stdout=StringIO())
+
+
+class FlakyBackend(EmailBackend):
+    """Locmem backend that refuses some recipients and counts connections."""
+
+    opened = 0
+    refused = set()
+
+    def open(self):
+        if getattr(self, "is_open", False):
+            return False
+        FlakyBackend.opened += 1
+        self.is_open = True
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.refused:
+                raise SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def flaky(settings):
+    settings.EMAIL_BACKEND = "accounts.test_email.FlakyBackend"
+    FlakyBackend.opened = 0
+    FlakyBackend.refused = set()
+    return FlakyBackend
+
+
 @pytest.mark.django_db
 class TestEmailFunctionality:
 
     def test_welcome_email_sent_on_registration(self, client):
-        """Test that a welcome email is sent when a user registers."""
+        """Test that a welcome email is queued on registration and delivered."""
         url = reverse("register")
         data = {
             "username": "emailuser",
@@ -26,17 +72,21 @@ class TestEmailFunctionality:
 
         response = client.post(url, data)
 
-        # Verify registration succeeded
+        # Verify registration succeeded without talking to the mail server
         assert response.status_code == 302
         assert User.objects.filter(username="emailuser").exists()
+        assert len(mail.outbox) == 0
+        assert OutboxEmail.objects.get().status == OutboxEmail.PENDING
 
-        # Verify email was sent
+        # Verify email was sent by the dispatcher
+        dispatch()
         assert len(mail.outbox) == 1
         email = mail.outbox[0]
         assert email.subject == "Welcome to CodeQuest!"
         assert email.to == ["emailuser@example.com"]
         assert "emailuser" in email.body
         assert "Welcome to CodeQuest" in email.body
+        assert OutboxEmail.objects.get().status == OutboxEmail.SENT
 
     def test_no_email_sent_without_email_address(self, client):
         """Test that no email is sent when user registers without email."""
@@ -58,13 +108,14 @@ class TestEmailFunctionality:
         assert response.status_code == 302
         assert User.objects.filter(username="noemailuser").exists()
 
-        # Verify no email was sent
+        # Verify nothing was queued or sent
+        dispatch()
+        assert not OutboxEmail.objects.exists()
         assert len(mail.outbox) == 0
 
-    def test_email_failure_does_not_block_registration(self, client, settings):
-        """Test that email sending failure doesn't prevent registration."""
-        # Set invalid email backend to simulate failure
-        settings.EMAIL_BACKEND = "django.core.mail.backends.dummy.EmailBackend"
+    def test_email_failure_does_not_block_registration(self, client, flaky):
+        """Test that a mail server failure doesn't prevent registration."""
+        flaky.refused = {"failemailuser@example.com"}
 
         url = reverse("register")
         data = {
@@ -76,7 +127,101 @@ class TestEmailFunctionality:
         }
 
         response = client.post(url, data)
+        dispatch()
 
         # Verify registration succeeded despite email failure
         assert response.status_code == 302
         assert User.objects.filter(username="failemailuser").exists()
+        assert OutboxEmail.objects.get().status == OutboxEmail.PENDING
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_batches_share_one_connection(self, flaky):
+        mail.outbox = []
+        for i in range(25):
+            outbox.queue_mail("Hi", "Body", [f"user{i}@example.com"])
+        call_command("send_outbox", "--once", "--batch-size", "10", stdout=StringIO())
+        assert len(mail.outbox) == 25
+        assert flaky.opened == 1
+        assert OutboxEmail.objects.filter(status=OutboxEmail.SENT).count() == 25
+
+    def test_failures_back_off_then_dead_letter(self, flaky, settings):
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 3
+        flaky.refused = {"bad@example.com"}
+        mail.outbox = []
+        bad = outbox.queue_mail("Hi", "Body", ["bad@example.com"])
+        outbox.queue_mail("Hi", "Body", ["good@example.com"])
+
+        dispatch()
+        bad.refresh_from_db()
+        assert [m.to for m in mail.outbox] == [["good@example.com"]]
+        assert (bad.status, bad.attempts) == (OutboxEmail.PENDING, 1)
+        assert "SMTPServerDisconnected" in bad.last_error
+        assert bad.next_attempt_at > timezone.now() + timedelta(seconds=20)
+
+        # Not due yet
+        dispatch()
+        bad.refresh_from_db()
+        assert bad.attempts == 1
+
+        for attempts in (2, 3):
+            OutboxEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+            dispatch()
+        bad.refresh_from_db()
+        assert (bad.status, bad.attempts) == (OutboxEmail.DEAD, 3)
+        assert outbox.backoff(2) == 2 * outbox.backoff(1)
+
+    def test_expired_claims_are_requeued(self):
+        email = outbox.queue_mail("Hi", "Body", ["a@example.com"])
+        assert outbox.claim_batch() == [email]
+        assert outbox.claim_batch() == []
+        OutboxEmail.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        assert outbox.requeue_expired() == 1
+        assert outbox.claim_batch() == [email]
+
+    def test_sent_emails_survive_a_dispatcher_crash(self, flaky):
+        mail.outbox = []
+        first = outbox.queue_mail("Hi", "Body", ["first@example.com"])
+        second = outbox.queue_mail("Hi", "Body", ["second@example.com"])
+
+        class Crash(BaseException):
+            pass
+
+        def crash(messages):
+            if messages[0].to == ["second@example.com"]:
+                raise Crash()
+            return EmailBackend.send_messages(connection, messages)
+
+        connection = flaky()
+        connection.send_messages = crash
+        with pytest.raises(Crash):
+            outbox.deliver(outbox.claim_batch(), connection)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.status == OutboxEmail.SENT
+        assert second.status == OutboxEmail.SENDING
+
+    def test_slow_batches_renew_their_claim(self, flaky, settings, monkeypatch):
+        settings.EMAIL_OUTBOX_LEASE = 10
+        for i in range(3):
+            outbox.queue_mail("Hi", "Body", [f"user{i}@example.com"])
+        emails = outbox.claim_batch()
+        # Every send takes 4 seconds: three of them outlast the lease
+        clock = iter(range(0, 100, 4))
+        monkeypatch.setattr(outbox.time, "monotonic", lambda: next(clock))
+        requeued = []
+
+        def send(messages):
+            OutboxEmail.objects.filter(status=OutboxEmail.SENDING).update(
+                claimed_at=F("claimed_at") - timedelta(seconds=4)
+            )
+            requeued.append(outbox.requeue_expired())
+            return 1
+
+        connection = flaky()
+        connection.send_messages = send
+        assert outbox.deliver(emails, connection) == 3
+        assert requeued == [0, 0, 0]
+        assert OutboxEmail.objects.filter(status=OutboxEmail.SENT).count() == 3
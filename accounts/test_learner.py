@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import pytest
+
+from courses.models import Course, Enrollment
+
+User = get_user_model()
+
+
+def sql_for(client, method, url, **data):
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url, data)
+    assert response.status_code < 400
+    return [query["sql"] for query in queries]
+
+
+@pytest.mark.django_db
+class TestLearnerContext:
+
+    def test_login_does_not_rewrite_the_profile(self, client):
+        User.objects.create_user(username="alice", password="StrongPassword123!")
+        sql = sql_for(
+            client,
+            "post",
+            reverse("login"),
+            username="alice",
+            password="StrongPassword123!",
+        )
+        assert not [q for q in sql if "accounts_profile" in q]
+
+    def test_enrollments_are_cached_until_they_change(self, client):
+        user = User.objects.create_user(username="alice")
+        course = Course.objects.create(title="Practical Git", slug="practical-git")
+        other = Course.objects.create(title="Linux", slug="linux")
+        Enrollment.objects.create(user=user, course=course)
+        client.force_login(user)
+        url = reverse("courses:course_detail", args=[other.slug])
+
+        sql_for(client, "get", url)
+        sql = sql_for(client, "get", url)
+        assert not [q for q in sql if "courses_enrollment" in q]
+        # The profile comes with the user
+        assert not [q for q in sql if q.startswith('SELECT "accounts_profile"')]
+
+        response = client.get(url)
+        assert response.context["learner"].latest_enrollment.slug == course.slug
+        assert response.context["enrollment"] is None
+
+        client.post(reverse("courses:enroll", args=[other.slug]))
+        response = client.get(url)
+        assert response.context["enrollment"].course_id == other.id
+        assert [e.slug for e in response.context["learner"].enrollments] == [
+            "linux",
+            "practical-git",
+        ]
+
+        Enrollment.objects.filter(user=user, course=other).delete()
+        response = client.get(url)
+        assert response.context["enrollment"] is None
+
+    def test_course_edits_show_without_reenrolling(self, client):
+        user = User.objects.create_user(username="alice")
+        course = Course.objects.create(title="Practical Git", slug="practical-git")
+        Enrollment.objects.create(user=user, course=course)
+        client.force_login(user)
+        client.get(reverse("home"))
+
+        course.slug, course.title = "git-basics", "Git Basics"
+        course.save()
+        response = client.get(reverse("home"))
+        assert response.context["learner"].latest_enrollment.title == "Git Basics"
+        learning_center = reverse("courses:learning_center", args=["git-basics"])
+        assert learning_center in response.content.decode()
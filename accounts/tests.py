@@ -1,5 +1,8 @@
-from django.contrib.auth import get_user_model
+from io import StringIO
+
+from django.contrib.auth import BACKEND_SESSION_KEY, get_user_model
 from django.core import mail
+from django.core.management import call_command
 from django.urls import reverse
 
 import pytest
@@ -43,7 +46,9 @@ class TestAuthentication:
         assert user.email == "newuser@example.com"
         assert user.phone_number == "+9779800000000"
 
-        # Verify email sent
+        # Verify email queued, then sent by the dispatcher
+        assert len(mail.outbox) == 0
+        call_command("send_outbox", "--once", stdout=StringIO())
         assert len(mail.outbox) == 1
         assert mail.outbox[0].subject == "Welcome to CodeQuest!"
         assert mail.outbox[0].to == ["newuser@example.com"]
@@ -92,6 +97,22 @@ class TestAuthentication:
         assert "_auth_user_id" in client.session
         assert str(client.session["_auth_user_id"]) == str(user.pk)
 
+    def test_login_stores_the_profile_backend(self, client):
+        User.objects.create_user(username="testuser", password="password123")
+        client.post(
+            reverse("login"), {"username": "testuser", "password": "password123"}
+        )
+        assert client.session[BACKEND_SESSION_KEY] == (
+            "accounts.backends.ProfileModelBackend"
+        )
+
+    def test_sessions_from_before_the_profile_backend_still_work(self, client):
+        user = User.objects.create_user(username="testuser", password="password123")
+        client.force_login(user, backend="django.contrib.auth.backends.ModelBackend")
+        response = client.get(reverse("profile"))
+        assert response.status_code == 200
+        assert response.wsgi_request.user == user
+
     def test_login_user_invalid(self, client):
         """Test logging in with invalid credentials."""
         url = reverse("login")
@@ -1,17 +1,18 @@
 # Create your views here.
 # accounts/views.py
-from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView, LogoutView
-from django.core.mail import send_mail
+from django.db import transaction
 from django.shortcuts import redirect, render
 from django.utils.translation import gettext as _
 from django.views import View
 
+from courses import activity, rollups
 from courses.models import Course, Enrollment
 
+from . import outbox
 from .forms import CustomUserCreationForm
 
 
@@ -34,38 +35,30 @@ class RegisterView(View):
             email = form.cleaned_data.get("email")
             if email:
                 user.email = email.strip().lower()
-            user.save()
 
             display_name = form.cleaned_data.get("display_name") or user.username
             preferred_language = form.cleaned_data.get("preferred_language") or "en"
-            # ensure profile exists then update preferences
-            profile = user.profile
-            profile.display_name = display_name
-            profile.preferred_language = preferred_language
-            profile.save()
-
-            # Send welcome email
-            if user.email:
-                try:
-                    send_mail(
+            # Optimized: the welcome email is queued with the user row and sent
+            # by send_outbox, so signup never waits on the mail server
+            with transaction.atomic():
+                user.save()
+                # ensure profile exists then update preferences
+                profile = user.profile
+                profile.display_name = display_name
+                profile.preferred_language = preferred_language
+                profile.save()
+
+                if user.email:
+                    outbox.queue_mail(
                         subject=_("Welcome to CodeQuest!"),
                         message=_(
                             "Hi %(user)s,\n\nWelcome to CodeQuest! We are excited to have you on board.\n\nBest,\nThe CodeQuest Team"
                         )
                         % {"user": user.username},
-                        from_email=(
-                            settings.DEFAULT_FROM_EMAIL
-                            if hasattr(settings, "DEFAULT_FROM_EMAIL")
-                            else "noreply@codequest.com"
-                        ),
                         recipient_list=[user.email],
-                        fail_silently=True,
                     )
-                except Exception as e:
-                    # Log error but don't stop registration
-                    print(f"Failed to send email: {e}")
 
-            login(request, user)
+            login(request, user, backend="accounts.backends.ProfileModelBackend")
             messages.success(
                 request,
                 _("Welcome! Your account has been created."),
@@ -89,7 +82,9 @@ class DashboardView(LoginRequiredMixin, View):
         # Courses block - list all courses for selection
         courses = Course.objects.all()
         # user's enrollments
-        enrollments = request.user.enrollments.select_related("course").all()
+        enrollments = rollups.prefetch_totals(
+            request.user.enrollments.select_related("course")
+        )
         return render(
             request,
             self.template_name,
@@ -135,30 +130,24 @@ class ProfileView(LoginRequiredMixin, View):
     template_name = "accounts/profile.html"
 
     def get(self, request):
-        # Get user's enrollments with course info and calculate total XP
         enrollments = (
             Enrollment.objects.filter(user=request.user)
             .select_related("course")
             .order_by("-xp")
         )
-
-        total_xp = sum(e.xp or 0 for e in enrollments)
-        max_streak = max((e.streak or 0 for e in enrollments), default=0)
-
-        # Calculate total challenges completed
-        from courses.models import UserChallengeAttempt
-
-        total_challenges = UserChallengeAttempt.objects.filter(
-            user=request.user, is_correct=True
-        ).count()
-
+        # Optimized: totals are kept up to date on the profile row by every attempt
+        profile = request.user.profile
+        days = activity.Activity.of(profile.activity)
         return render(
             request,
             self.template_name,
             {
                 "enrollments": enrollments,
-                "total_xp": total_xp,
-                "max_streak": max_streak,
-                "total_challenges": total_challenges,
+                "total_xp": profile.xp,
+                "max_streak": days.longest_streak,
+                "total_challenges": profile.completed_challenges,
+                "day_streak": days.current_streak,
+                "active_days": days.active_days,
+                "heatmap": days.heatmap(),
             },
         )
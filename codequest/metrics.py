@@ -0,0 +1,202 @@
+# codequest/metrics.py
+"""Prometheus metrics for the site.
+
+``MetricsMiddleware`` records, per URL name, the request count, the latency
+and the number and total time of database queries (counted with a
+``connection.execute_wrapper``); for streaming responses these cover the
+body too, and are recorded once it has been sent. ``instrumented_cache``
+wraps the configured cache backend to count hits and misses. The app
+counters below are bumped on commit by the code that grades attempts and
+creates enrollments.
+
+``metrics_view`` serves the text exposition format to requests carrying
+``Authorization: Bearer <METRICS_TOKEN>``; without a token it is only open
+while ``DEBUG`` is on. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (it must be, to an empty directory,
+before the workers start), every worker writes its samples to mmap'd files
+in that directory and the view aggregates them, so any worker answers for
+all of them. Only counters and histograms are used, which need no cleanup
+when a worker exits.
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUESTS = Counter(
+    "codequest_http_requests_total",
+    "HTTP requests by URL name, method and status class",
+    ["view", "method", "status"],
+)
+LATENCY = Histogram(
+    "codequest_http_request_duration_seconds",
+    "Time to produce the response, by URL name",
+    ["view"],
+)
+DB_QUERIES = Histogram(
+    "codequest_db_queries_per_request",
+    "Database queries per request, by URL name",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+DB_TIME = Histogram(
+    "codequest_db_time_seconds_per_request",
+    "Total database time per request, by URL name",
+    ["view"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    "codequest_cache_requests_total",
+    "Cache lookups by result (hit or miss)",
+    ["result"],
+)
+ATTEMPTS_GRADED = Counter(
+    "codequest_attempts_graded_total",
+    "Attempts recorded, by result",
+    ["result"],
+)
+ENROLLMENTS_CREATED = Counter(
+    "codequest_enrollments_created_total",
+    "Enrollments created",
+)
+
+_MISSING = object()
+_hits = CACHE_REQUESTS.labels("hit")
+_misses = CACHE_REQUESTS.labels("miss")
+
+
+class _QueryTimer:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Time each request and its queries; put it first in ``MIDDLEWARE``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = _QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        if response.streaming and not response.is_async:
+            # The body runs its queries while the server sends it, after this
+            # returns; observe once it is exhausted or closed
+            response.streaming_content = self._stream(
+                response.streaming_content, request, response, queries, start
+            )
+        else:
+            self._observe(request, response, queries, start)
+        return response
+
+    def _stream(self, content, request, response, queries, start):
+        chunks = iter(content)
+        try:
+            while True:
+                # Only around each chunk, as the server may run other code
+                # (and the generator may be closed elsewhere) between them
+                with connection.execute_wrapper(queries):
+                    chunk = next(chunks, _MISSING)
+                if chunk is _MISSING:
+                    return
+                yield chunk
+        finally:
+            self._observe(request, response, queries, start)
+
+    def _observe(self, request, response, queries, start):
+        elapsed = time.perf_counter() - start
+        # Only resolved URL names become labels, so the series count is bounded
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        REQUESTS.labels(view, request.method, f"{response.status_code // 100}xx").inc()
+        LATENCY.labels(view).observe(elapsed)
+        DB_QUERIES.labels(view).observe(queries.count)
+        DB_TIME.labels(view).observe(queries.seconds)
+
+
+_instrumented = {}
+
+
+class _CountGet:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            _misses.inc()
+            return default
+        _hits.inc()
+        return value
+
+
+class _CountGetMany:
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        _hits.inc(len(found))
+        _misses.inc(len(keys) - len(found))
+        return found
+
+
+def instrumented_cache(location, params):
+    """Cache ``BACKEND`` that wraps ``params["INNER_BACKEND"]`` to count hits."""
+    params = dict(params)
+    backend = import_string(params.pop("INNER_BACKEND"))
+    cls = _instrumented.get(backend)
+    if cls is None:
+        mixins = (_CountGet,)
+        # The default get_many goes through get, which already counts
+        if backend.get_many is not BaseCache.get_many:
+            mixins += (_CountGetMany,)
+        cls = type(f"Instrumented{backend.__name__}", (*mixins, backend), {})
+        _instrumented[backend] = cls
+    return cls(location, params)
+
+
+def _registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Text exposition of every metric, aggregated over all workers."""
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Traffic and cache figures are not for the public
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -10,9 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,12 +40,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "codequest.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "accounts.learner.LearnerContextMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -63,6 +66,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "accounts.learner.learner",
             ],
         },
     },
@@ -85,12 +89,59 @@ DATABASES = {
     }
 }
 
+# Cache
+# Local memory is per process; point CACHE_BACKEND at a shared backend
+# (e.g. django.core.cache.backends.db.DatabaseCache) when running several workers.
+CACHES = {
+    "default": {
+        # Counts hits and misses for /metrics around CACHE_BACKEND
+        "BACKEND": "codequest.metrics.instrumented_cache",
+        "INNER_BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="codequest"),
+    }
+}
+
+# Sandbox grader (see courses/sandbox.py)
+SANDBOX_WORKERS = config("SANDBOX_WORKERS", default=os.cpu_count() or 1, cast=int)
+SANDBOX_MAX_QUEUE = config("SANDBOX_MAX_QUEUE", default=32, cast=int)
+SANDBOX_TIMEOUT = config("SANDBOX_TIMEOUT", default=5.0, cast=float)
+SANDBOX_MEMORY_MB = config("SANDBOX_MEMORY_MB", default=256, cast=int)
+
+# Graders whose submissions are queued for run_grading_worker (see courses/jobs.py)
+GRADING_ASYNC_GRADERS = config("GRADING_ASYNC_GRADERS", default="sandbox", cast=Csv())
+# Seconds before a job claimed by a dead worker is handed out again
+GRADING_JOB_LEASE = config("GRADING_JOB_LEASE", default=300, cast=int)
+
+# Attempt log archival (see courses/management/commands/archive_attempts.py)
+ATTEMPT_RETENTION_DAYS = config("ATTEMPT_RETENTION_DAYS", default=365, cast=int)
+ATTEMPT_ARCHIVE_DIR = config("ATTEMPT_ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+
+# Metrics (see codequest/metrics.py). Set PROMETHEUS_MULTIPROC_DIR in the
+# environment to an empty directory to aggregate over gunicorn workers.
+# /metrics requires "Authorization: Bearer <METRICS_TOKEN>"; left empty, it
+# is only served while DEBUG is on.
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 # Email Backend (Mailhog)
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = config("EMAIL_HOST", default="localhost")
 EMAIL_PORT = config("EMAIL_PORT", default=1025, cast=int)
 EMAIL_USE_TLS = False
 EMAIL_USE_SSL = False
+# Seconds before a stalled SMTP connect or send gives up
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=10, cast=int)
+
+# Absolute base URL for links in emails (weekly digest)
+SITE_URL = config("SITE_URL", default="http://localhost:8000")
+
+# Email outbox (see accounts/outbox.py); send_outbox delivers queued mail
+# Deliveries tried before an email is dead-lettered
+EMAIL_OUTBOX_MAX_ATTEMPTS = config("EMAIL_OUTBOX_MAX_ATTEMPTS", default=6, cast=int)
+# Seconds before an email claimed by a dead dispatcher is handed out again;
+# a live dispatcher renews its claim every half lease
+EMAIL_OUTBOX_LEASE = config("EMAIL_OUTBOX_LEASE", default=300, cast=int)
 
 
 # Password validation
@@ -112,6 +163,13 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 AUTH_USER_MODEL = "accounts.CustomUser"
+# Loads the profile with the user on every request. ModelBackend stays listed
+# for sessions started before the switch, which name it as their backend;
+# logging in again moves them over.
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.ProfileModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
 
 
 # Internationalization
@@ -0,0 +1,141 @@
+import os
+import subprocess
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import pytest
+from prometheus_client import REGISTRY
+
+from courses.models import Challenge, Course, Enrollment, Module
+from courses.submission import submit_attempt
+
+User = get_user_model()
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_requests_are_labelled_by_url_name(self, client):
+        view = "courses:dashboard"
+        before = sample(
+            "codequest_http_requests_total", view=view, method="GET", status="2xx"
+        )
+        queries = sample("codequest_db_queries_per_request_sum", view=view)
+        client.force_login(User.objects.create_user(username="alice"))
+        assert client.get(reverse(view)).status_code == 200
+        assert (
+            sample(
+                "codequest_http_requests_total", view=view, method="GET", status="2xx"
+            )
+            == before + 1
+        )
+        assert sample("codequest_http_request_duration_seconds_count", view=view)
+        assert sample("codequest_db_queries_per_request_sum", view=view) > queries
+
+    def test_unknown_paths_share_one_label(self, client):
+        labels = dict(view="unresolved", method="GET", status="4xx")
+        before = sample("codequest_http_requests_total", **labels)
+        client.get("/no-such-page/")
+        client.get("/another-missing-page/")
+        assert sample("codequest_http_requests_total", **labels) == before + 2
+
+    def test_cache_hits_and_misses_are_counted(self):
+        cache = caches["default"]
+        hits = sample("codequest_cache_requests_total", result="hit")
+        misses = sample("codequest_cache_requests_total", result="miss")
+        cache.set("metrics-test", None)
+        assert cache.get("metrics-test", "default") is None
+        assert cache.get("metrics-missing") is None
+        assert cache.get_many(["metrics-test", "metrics-missing"]) == {
+            "metrics-test": None
+        }
+        assert sample("codequest_cache_requests_total", result="hit") == hits + 2
+        assert sample("codequest_cache_requests_total", result="miss") == misses + 2
+
+    def test_attempts_and_enrollments_are_counted_on_commit(
+        self, django_capture_on_commit_callbacks
+    ):
+        user = User.objects.create_user(username="alice")
+        course = Course.objects.create(title="Practical Git", slug="practical-git")
+        module = Module.objects.create(course=course, title="Basics", order=1)
+        challenge = Challenge.objects.create(
+            module=module, prompt="say hi", expected_output="hi"
+        )
+        enrolled = sample("codequest_enrollments_created_total")
+        correct = sample("codequest_attempts_graded_total", result="correct")
+        with django_capture_on_commit_callbacks(execute=True):
+            enrollment = Enrollment.objects.create(user=user, course=course)
+            submit_attempt(enrollment, challenge, is_correct=True)
+        assert sample("codequest_enrollments_created_total") == enrolled + 1
+        assert sample("codequest_attempts_graded_total", result="correct") == (
+            correct + 1
+        )
+
+    def test_streamed_bodies_are_timed_until_sent(self, client):
+        view = "courses:export_progress"
+        course = Course.objects.create(title="Practical Git", slug="practical-git")
+        learner = User.objects.create_user(username="alice")
+        Enrollment.objects.create(user=learner, course=course)
+        coach = User.objects.create_user(username="coach", role="instructor")
+        course.instructors.add(coach)
+        client.force_login(coach)
+        requests = sample("codequest_db_queries_per_request_count", view=view)
+        queries = sample("codequest_db_queries_per_request_sum", view=view)
+
+        with CaptureQueriesContext(connection) as setup:
+            response = client.get(reverse(view, args=[course.slug]))
+        assert sample("codequest_db_queries_per_request_count", view=view) == requests
+        with CaptureQueriesContext(connection) as body:
+            b"".join(response.streaming_content)
+        assert len(body)
+        assert sample("codequest_db_queries_per_request_count", view=view) == (
+            requests + 1
+        )
+        assert sample("codequest_db_queries_per_request_sum", view=view) == (
+            queries + len(setup) + len(body)
+        )
+
+    def test_token_protects_the_endpoint(self, client, settings):
+        settings.METRICS_TOKEN = "s3cret"
+        assert client.get(reverse("metrics")).status_code == 403
+        response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+        assert response.status_code == 200
+        assert b"codequest_http_requests_total" in response.content
+
+    def test_endpoint_is_closed_without_a_token_unless_debugging(
+        self, client, settings
+    ):
+        settings.METRICS_TOKEN = ""
+        settings.DEBUG = False
+        assert client.get(reverse("metrics")).status_code == 403
+        settings.DEBUG = True
+        assert client.get(reverse("metrics")).status_code == 200
+
+
+WORKER = """
+from codequest import metrics
+metrics.ENROLLMENTS_CREATED.inc()
+metrics.ATTEMPTS_GRADED.labels("correct").inc(3)
+"""
+
+
+def test_workers_are_aggregated(client, settings, tmp_path, monkeypatch):
+    settings.METRICS_TOKEN = "s3cret"
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _worker in range(2):
+        subprocess.run(
+            [sys.executable, "-c", WORKER], env=env, cwd=settings.BASE_DIR, check=True
+        )
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+    assert b"codequest_enrollments_created_total 2.0" in response.content
+    assert b'codequest_attempts_graded_total{result="correct"} 6.0' in response.content
@@ -6,8 +6,11 @@ from django.urls import include, path
 
 from courses.views import home
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path("i18n/", include("django.conf.urls.i18n")),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 urlpatterns += i18n_patterns(
@@ -0,0 +1,196 @@
+# courses/activity.py
+"""Per-learner day activity bitmap on ``accounts.Profile``.
+
+``Profile.activity`` holds one bit per calendar day (in ``TIME_ZONE``)
+counted from ``EPOCH``: bit ``n`` of the little-endian integer is set when the
+learner made an attempt on ``EPOCH + n days``. A year of history is 46
+bytes. ``set_today`` is an expression for the profile UPDATE that
+``profile_stats.record_attempt`` already issues, so each attempt costs no
+extra query; day streaks and the heatmap are read with integer bit
+operations on the row instead of the attempt history.
+
+The same UPDATE keeps ``Profile.current_streak`` as the day streak ending on
+the learner's last active day (``streak_update``): unchanged when today's bit
+is already set, one more when yesterday's is, otherwise one. Readers that
+need the streak as of today use ``Activity.current_streak``, which also
+counts a streak that lapsed since as zero.
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.db.models import BinaryField, Case, F, Func, IntegerField, Value, When
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+EPOCH = date(2025, 1, 1)
+HEATMAP_DAYS = 365
+# SQLite has no bit functions; these are registered on each connection
+SQLITE_FUNCTION = "codequest_set_bit"
+SQLITE_GET_FUNCTION = "codequest_get_bit"
+
+
+def day_index(day):
+    return (day - EPOCH).days
+
+
+class SetBit(Func):
+    """``expression`` with bit ``n`` set, padded with zero bytes as needed."""
+
+    function = SQLITE_FUNCTION
+    output_field = BinaryField()
+
+    def __init__(self, expression, n, **extra):
+        super().__init__(expression, Value(n), **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        bits, params = compiler.compile(self.source_expressions[0])
+        n = self.source_expressions[1].value
+        # Bits are numbered from the right within each byte, as in from_bytes
+        sql = (
+            f"set_bit({bits} || decode(repeat('00', "
+            f"GREATEST(%s - length({bits}), 0)), 'hex'), %s, 1)"
+        )
+        return sql, (*params, n // 8 + 1, *params, n)
+
+
+class GetBit(Func):
+    """1 when bit ``n`` of ``expression`` is set, else 0."""
+
+    function = SQLITE_GET_FUNCTION
+    output_field = IntegerField()
+
+    def __init__(self, expression, n, **extra):
+        super().__init__(expression, Value(n), **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        bits, params = compiler.compile(self.source_expressions[0])
+        n = self.source_expressions[1].value
+        # get_bit raises past the end of the bytes
+        sql = f"CASE WHEN length({bits}) > %s THEN get_bit({bits}, %s) ELSE 0 END"
+        return sql, (*params, n // 8, *params, n)
+
+
+def get_bit(bitmap, n):
+    bitmap = bitmap or b""
+    return int(len(bitmap) > n // 8 and bitmap[n // 8] >> (n % 8) & 1)
+
+
+def set_bit(bitmap, n):
+    """``bytes`` of ``bitmap`` with bit ``n`` set."""
+    value = bytearray(bitmap or b"")
+    if len(value) <= n // 8:
+        value.extend(bytes(n // 8 + 1 - len(value)))
+    value[n // 8] |= 1 << (n % 8)
+    return bytes(value)
+
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        connection.connection.create_function(
+            SQLITE_FUNCTION, 2, set_bit, deterministic=True
+        )
+        connection.connection.create_function(
+            SQLITE_GET_FUNCTION, 2, get_bit, deterministic=True
+        )
+
+
+def set_today(field="activity"):
+    """Expression setting today's bit of ``field``, for use in an UPDATE."""
+    return SetBit(field, day_index(timezone.localdate()))
+
+
+def streak_update(field="activity", streak="current_streak"):
+    """Expression for ``streak`` in the UPDATE that sets today's bit.
+
+    It reads the bitmap before the update, as SQL does for every column.
+    """
+    today = day_index(timezone.localdate())
+    return Case(
+        When(Exact(GetBit(field, today), 1), then=F(streak)),
+        When(Exact(GetBit(field, today - 1), 1), then=F(streak) + 1),
+        default=Value(1),
+    )
+
+
+def from_days(days, bitmap=b""):
+    """``bitmap`` with the bits of ``days`` set (days before ``EPOCH`` are dropped)."""
+    bits = int.from_bytes(bitmap or b"", "little")
+    for day in days:
+        n = day_index(day)
+        if n >= 0:
+            bits |= 1 << n
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+@dataclass(frozen=True)
+class Activity:
+    """Read-side view of an activity bitmap as of ``today``."""
+
+    bits: int
+    today: date
+
+    @classmethod
+    def of(cls, bitmap, today=None):
+        return cls(
+            int.from_bytes(bytes(bitmap or b""), "little"),
+            today or timezone.localdate(),
+        )
+
+    @classmethod
+    def as_of_last_day(cls, bitmap):
+        """The bitmap seen from the learner's last active day."""
+        bits = int.from_bytes(bytes(bitmap or b""), "little")
+        last = EPOCH + timedelta(days=max(bits.bit_length() - 1, 0))
+        return cls(bits, last)
+
+    def _window(self, last, days):
+        """Bits of the ``days`` days ending at index ``last``, oldest lowest."""
+        first = last - days + 1
+        bits = self.bits >> first if first >= 0 else self.bits << -first
+        return bits & ((1 << days) - 1)
+
+    @property
+    def current_streak(self):
+        """Consecutive active days up to today, or to yesterday if today is
+        still open."""
+        last = day_index(self.today)
+        if last < 0:
+            return 0
+        if not self.bits >> last & 1:
+            last -= 1
+        if last < 0:
+            return 0
+        # The streak ends at the highest inactive day at or below ``last``
+        gaps = ~self.bits & ((1 << (last + 1)) - 1)
+        return last + 1 - gaps.bit_length()
+
+    @property
+    def longest_streak(self):
+        bits, longest = self.bits, 0
+        while bits:
+            # Each pass shortens every run of ones by one
+            bits &= bits >> 1
+            longest += 1
+        return longest
+
+    @property
+    def active_days(self):
+        return self.bits.bit_count()
+
+    def heatmap(self, days=HEATMAP_DAYS):
+        """Weeks (Monday first) of ``(date, active)`` cells ending today.
+
+        Cells before the first shown day are ``None`` so every week has seven.
+        """
+        start = self.today - timedelta(days=days - 1)
+        window = self._window(day_index(self.today), days)
+        cells = [None] * start.weekday()
+        cells += [
+            (start + timedelta(days=i), bool(window >> i & 1)) for i in range(days)
+        ]
+        weeks = []
+        for first in range(0, len(cells), 7):
+            last = first + 7
+            weeks.append(cells[first:last])
+        return weeks
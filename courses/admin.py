@@ -1,7 +1,94 @@
 # courses/admin.py
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast, NullIf
 
-from .models import Challenge, Course, Enrollment, Module, UserChallengeAttempt
+from .models import (
+    Challenge,
+    Course,
+    Enrollment,
+    GradingJob,
+    Module,
+    UserChallengeAttempt,
+)
+from .paginators import EstimatedCountPaginator
+
+
+class ModuleListFilter(admin.RelatedFieldListFilter):
+    """Module choices labelled "course — module" without a query per module."""
+
+    def field_choices(self, field, request, model_admin):
+        modules = Module.objects.select_related("course").order_by(
+            "course__title", "order"
+        )
+        return [(module.pk, str(module)) for module in modules]
+
+
+class AttemptModuleFilter(admin.SimpleListFilter):
+    """Filter attempts by module through an indexed ``challenge_id IN (...)``."""
+
+    title = "module"
+    parameter_name = "module"
+
+    def lookups(self, request, model_admin):
+        modules = Module.objects.select_related("course").order_by(
+            "course__title", "order"
+        )
+        return [(module.pk, str(module)) for module in modules]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(
+                challenge_id__in=Challenge.objects.filter(
+                    module_id=self.value()
+                ).values("pk")
+            )
+        return queryset
+
+
+class FirstTryFilter(admin.SimpleListFilter):
+    """Bucket challenges by how often learners solve them on the first try."""
+
+    title = "first-try success"
+    parameter_name = "first_try"
+    BUCKETS = {
+        "low": ("Below 30%", {"first_try_rate__lt": 0.3}),
+        "mid": ("30% to 70%", {"first_try_rate__gte": 0.3, "first_try_rate__lt": 0.7}),
+        "high": ("70% and above", {"first_try_rate__gte": 0.7}),
+        "none": ("No attempts yet", {"first_try_rate__isnull": True}),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(key, label) for key, (label, _) in self.BUCKETS.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() in self.BUCKETS:
+            return queryset.filter(**self.BUCKETS[self.value()][1])
+        return queryset
+
+
+class EstimatedCountChangeList(ChangeList):
+    """Follows the paginator when it recounts a page past an overestimate."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        if getattr(self.paginator, "exact", False):
+            self.result_count = self.paginator.count
+            self.page_num = min(self.page_num, self.paginator.num_pages)
+            self.can_show_all = self.result_count <= self.list_max_show_all
+            self.multi_page = self.result_count > self.list_per_page
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows."""
+
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) behind "N total"
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return EstimatedCountChangeList
 
 
 class ChallengeInline(admin.TabularInline):
@@ -21,35 +108,108 @@ class CourseAdmin(admin.ModelAdmin):
     list_display = ("title", "slug", "is_active", "total_enrolled", "created_at")
     search_fields = ("title", "slug")
     prepopulated_fields = {"slug": ("title",)}
+    autocomplete_fields = ("instructors",)
     inlines = [ModuleInline]
     readonly_fields = ("created_at",)
 
+    def get_queryset(self, request):
+        # Optimized: count enrollments in the changelist query, not once per row
+        return super().get_queryset(request).annotate(enrolled=Count("enrollments"))
+
+    @admin.display(description="Total enrolled", ordering="enrolled")
+    def total_enrolled(self, obj):
+        return obj.enrolled
+
 
 @admin.register(Module)
 class ModuleAdmin(admin.ModelAdmin):
     list_display = ("title", "course", "order", "points", "created_at")
     list_filter = ("course",)
+    list_select_related = ("course",)
+    search_fields = ("title", "course__title")
+    autocomplete_fields = ("course",)
     inlines = [ChallengeInline]
     readonly_fields = ("created_at",)
 
 
 @admin.register(Challenge)
 class ChallengeAdmin(admin.ModelAdmin):
-    list_display = ("title", "module", "difficulty", "created_at")
-    list_filter = ("difficulty", "module")
-    search_fields = ("prompt",)
+    list_display = (
+        "title",
+        "module",
+        "difficulty",
+        "grader",
+        "match_mode",
+        "attempts",
+        "success_rate",
+        "first_try_rate",
+        "median_solve_seconds",
+        "created_at",
+    )
+    list_filter = (
+        "difficulty",
+        FirstTryFilter,
+        "grader",
+        "match_mode",
+        ("module", ModuleListFilter),
+    )
+    list_select_related = ("module__course", "stats")
+    search_fields = ("title", "prompt")
+    autocomplete_fields = ("module",)
     readonly_fields = ("created_at",)
 
+    def get_queryset(self, request):
+        # Optimized: difficulty signals come from the ChallengeStats row
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                first_try_rate=Cast(F("stats__first_try_correct"), FloatField())
+                / NullIf(F("stats__first_tries"), 0)
+            )
+        )
+
+    @staticmethod
+    def _percent(rate):
+        return "-" if rate is None else f"{rate:.0%}"
+
+    @admin.display(ordering="stats__attempts")
+    def attempts(self, obj):
+        return getattr(getattr(obj, "stats", None), "attempts", 0)
+
+    @admin.display(ordering="stats__correct")
+    def success_rate(self, obj):
+        stats = getattr(obj, "stats", None)
+        return self._percent(stats.success_rate if stats else None)
+
+    @admin.display(description="First-try success", ordering="first_try_rate")
+    def first_try_rate(self, obj):
+        return self._percent(obj.first_try_rate)
+
+    @admin.display(
+        description="Median solve (s)", ordering="stats__median_solve_seconds"
+    )
+    def median_solve_seconds(self, obj):
+        stats = getattr(obj, "stats", None)
+        if stats is None or stats.median_solve_seconds is None:
+            return "-"
+        return round(stats.median_solve_seconds)
+
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(LargeTableAdmin):
     list_display = ("user", "course", "xp", "streak", "progress", "enrolled_at")
     list_filter = ("course",)
+    list_select_related = ("user", "course")
+    # Exact lookups so the search can use the username and email indexes
+    search_fields = ("user__username__exact", "user__email__exact")
+    autocomplete_fields = ("user", "course")
+    raw_id_fields = ("current_module", "next_challenge")
     readonly_fields = ("enrolled_at",)
 
 
 @admin.register(UserChallengeAttempt)
-class UserChallengeAttemptAdmin(admin.ModelAdmin):
+class UserChallengeAttemptAdmin(LargeTableAdmin):
     list_display = (
         "user",
         "challenge",
@@ -58,6 +218,23 @@ class UserChallengeAttemptAdmin(admin.ModelAdmin):
         "time_seconds",
         "submitted_at",
     )
-    list_filter = ("is_correct", "challenge__module")
-    search_fields = ("user__email",)
+    list_filter = ("is_correct", AttemptModuleFilter)
+    list_select_related = ("user", "challenge__module")
+    search_fields = ("user__username__exact", "user__email__exact")
+    raw_id_fields = ("user", "challenge")
     readonly_fields = ("submitted_at",)
+    # Newest first by primary key, which needs no index on submitted_at
+    ordering = ("-id",)
+
+
+@admin.register(GradingJob)
+class GradingJobAdmin(LargeTableAdmin):
+    list_display = ("id", "enrollment", "challenge", "status", "created_at")
+    list_filter = ("status",)
+    list_select_related = (
+        "enrollment__user",
+        "enrollment__course",
+        "challenge__module",
+    )
+    raw_id_fields = ("enrollment", "challenge", "attempt")
+    readonly_fields = ("created_at", "claimed_at", "finished_at")
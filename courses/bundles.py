@@ -0,0 +1,339 @@
+# courses/bundles.py
+"""Course bundles: a course, its modules and challenges as plain data.
+
+``export_bundle`` turns a course into a dict that serializes to JSON or YAML.
+``import_bundle`` diffs a bundle against the stored rows and applies only the
+differences in one transaction with bulk operations, so re-importing an
+unchanged bundle reads three queries and writes nothing.
+
+Exported modules and challenges carry their ``id``, and rows are matched on
+it first, so renaming a challenge, reordering modules or moving a challenge
+to another module updates the row in place and keeps its attempts and
+progress. Entries without a known ``id`` (hand-written, or from another
+site) fall back to ``order`` for modules and ``title`` (or ``prompt``) within
+the module for challenges. Rows left unmatched are deleted, but not when
+learners have attempts or progress on them unless ``allow_delete`` is given.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import grading, structure
+from .models import (
+    Challenge,
+    ChallengeProgress,
+    Course,
+    Module,
+    ModuleProgress,
+    UserChallengeAttempt,
+)
+
+COURSE_FIELDS = ("title", "description", "is_active")
+MODULE_FIELDS = ("title", "content", "points", "skill_tags")
+CHALLENGE_FIELDS = (
+    "prompt",
+    "expected_output",
+    "match_mode",
+    "accepted_answers",
+    "ignore_case",
+    "grader",
+    "setup_script",
+    "difficulty",
+)
+
+
+class BundleError(ValueError):
+    """The bundle is malformed or contains invalid challenge rules."""
+
+
+class HistoryError(BundleError):
+    """The import would delete modules or challenges learners have worked on."""
+
+
+@dataclass
+class ImportResult:
+    created: dict = field(default_factory=dict)
+    updated: dict = field(default_factory=dict)
+    deleted: dict = field(default_factory=dict)
+    # Learner rows on the deleted modules and challenges
+    history: dict = field(default_factory=dict)
+
+    @property
+    def changed(self):
+        return any(
+            count
+            for counts in (self.created, self.updated, self.deleted)
+            for count in counts.values()
+        )
+
+    def summary(self):
+        parts = []
+        for label, counts in (
+            ("created", self.created),
+            ("updated", self.updated),
+            ("deleted", self.deleted),
+        ):
+            parts += [
+                f"{count} {name} {label}" for name, count in counts.items() if count
+            ]
+        summary = ", ".join(parts) or "no changes"
+        history = [f"{count} {name}" for name, count in self.history.items() if count]
+        if history:
+            summary += f" (deleting {', '.join(history)})"
+        return summary
+
+
+def export_bundle(course):
+    """Return ``course`` with its modules and challenges as a plain dict."""
+    challenges = {}
+    for challenge in Challenge.objects.filter(module__course=course).order_by("id"):
+        challenges.setdefault(challenge.module_id, []).append(
+            {"id": challenge.pk, "title": challenge.title}
+            | {name: getattr(challenge, name) for name in CHALLENGE_FIELDS}
+        )
+    return {
+        "slug": course.slug,
+        **{name: getattr(course, name) for name in COURSE_FIELDS},
+        "modules": [
+            {"id": module.pk, "order": module.order}
+            | {name: getattr(module, name) for name in MODULE_FIELDS}
+            | {"challenges": challenges.get(module.id, [])}
+            for module in course.modules.order_by("order", "id")
+        ],
+    }
+
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise BundleError("YAML bundles need PyYAML (pip install PyYAML).") from None
+    return yaml
+
+
+def load(path, fmt=None):
+    """Read a bundle from ``path`` (``.json``, ``.yaml`` or ``.yml``)."""
+    fmt = fmt or Path(path).suffix.lstrip(".")
+    text = Path(path).read_text(encoding="utf-8")
+    if fmt in ("yaml", "yml"):
+        return _yaml().safe_load(text)
+    return json.loads(text)
+
+
+def dump(bundle, fmt="json"):
+    if fmt in ("yaml", "yml"):
+        return _yaml().safe_dump(bundle, allow_unicode=True, sort_keys=False)
+    return json.dumps(bundle, indent=2, ensure_ascii=False) + "\n"
+
+
+def _key(data):
+    """Identity of a challenge within its module."""
+    return data.get("title") or data.get("prompt")
+
+
+def _check_ids(kind, items):
+    ids = [item["id"] for item in items if item.get("id") is not None]
+    if len(set(ids)) != len(ids):
+        raise BundleError(f"Every {kind} 'id' must be unique.")
+
+
+def _validate(bundle):
+    if not isinstance(bundle, dict) or not bundle.get("slug"):
+        raise BundleError("A bundle needs a course 'slug'.")
+    orders = [module.get("order") for module in bundle.get("modules", [])]
+    if None in orders or len(set(orders)) != len(orders):
+        raise BundleError("Every module needs a unique 'order'.")
+    modules = bundle.get("modules", [])
+    _check_ids("module", modules)
+    _check_ids("challenge", [c for m in modules for c in m.get("challenges", [])])
+    errors = []
+    for module in bundle.get("modules", []):
+        keys = [_key(c) for c in module.get("challenges", [])]
+        if not all(keys) or len(set(keys)) != len(keys):
+            errors.append(
+                f"module {module['order']}: challenges need a unique title or prompt"
+            )
+        for data in module.get("challenges", []):
+            challenge = Challenge(
+                **{name: data[name] for name in CHALLENGE_FIELDS if name in data}
+            )
+            try:
+                grading.compile_matcher(challenge)
+            except grading.InvalidRule as exc:
+                errors.append(f"module {module['order']} / {_key(data)}: {exc}")
+    if errors:
+        raise BundleError("\n".join(errors))
+
+
+def _assign(obj, data, names):
+    """Copy ``names`` present in ``data`` onto ``obj``; return the changed ones."""
+    changed = []
+    for name in names:
+        if name in data and getattr(obj, name) != data[name]:
+            setattr(obj, name, data[name])
+            changed.append(name)
+    return changed
+
+
+def import_bundle(bundle, dry_run=False, allow_delete=False):
+    """Create or update the course described by ``bundle``; returns an ImportResult.
+
+    Raises ``HistoryError`` when a module or challenge to delete has learner
+    attempts or progress, unless ``allow_delete`` (or ``dry_run``) is set.
+    """
+    _validate(bundle)
+    result = ImportResult(
+        created=dict.fromkeys(("courses", "modules", "challenges"), 0),
+        updated=dict.fromkeys(("courses", "modules", "challenges"), 0),
+        deleted=dict.fromkeys(("modules", "challenges"), 0),
+    )
+    with transaction.atomic():
+        course = Course.objects.filter(slug=bundle["slug"]).first()
+        if course is None:
+            course = Course(slug=bundle["slug"])
+            _assign(course, bundle, COURSE_FIELDS)
+            course.save()
+            result.created["courses"] = 1
+        elif _assign(course, bundle, COURSE_FIELDS):
+            course.save(update_fields=list(COURSE_FIELDS))
+            result.updated["courses"] = 1
+
+        modules, stale_modules = _sync_modules(
+            course, bundle.get("modules", []), result
+        )
+        stale_challenges = _sync_challenges(
+            course, modules, bundle.get("modules", []), result
+        )
+        if stale_modules or stale_challenges:
+            result.history = _history(stale_modules, stale_challenges)
+            if any(result.history.values()) and not (allow_delete or dry_run):
+                raise HistoryError(
+                    "The import would delete modules or challenges with learner "
+                    f"history ({result.summary()}); rerun with --allow-delete "
+                    "to delete them anyway."
+                )
+            _delete(stale_modules, stale_challenges, result)
+
+        if dry_run:
+            transaction.set_rollback(True)
+        elif result.changed:
+            # Bulk operations bypass the signals that invalidate snapshots
+            transaction.on_commit(structure.bump_generation)
+    return result
+
+
+def _match(data, by_id, by_key, key, claimed):
+    """The unclaimed row for ``data``: by ``id`` first, then by ``key``."""
+    row = by_id.get(data.get("id"))
+    if row is None or row.pk in claimed:
+        row = by_key.get(key)
+    if row is None or row.pk in claimed:
+        return None
+    claimed.add(row.pk)
+    return row
+
+
+def _sync_modules(course, module_data, result):
+    """Create and update modules; returns ``({order: module}, stale module pks)``."""
+    rows = list(course.modules.order_by("id"))
+    by_id = {module.pk: module for module in rows}
+    by_order = {}
+    for module in rows:
+        by_order.setdefault(module.order, module)
+
+    modules, claimed = {}, set()
+    to_create, to_update, changed_fields = [], [], set()
+    for data in module_data:
+        order = data["order"]
+        module = _match(data, by_id, by_order, order, claimed)
+        if module is None:
+            module = Module(course=course, order=order)
+            _assign(module, data, MODULE_FIELDS)
+            to_create.append(module)
+        else:
+            changed = _assign(module, data, ("order", *MODULE_FIELDS))
+            if changed:
+                to_update.append(module)
+                changed_fields.update(changed)
+        modules[order] = module
+
+    Module.objects.bulk_create(to_create)
+    if to_update:
+        Module.objects.bulk_update(to_update, sorted(changed_fields))
+    result.created["modules"] = len(to_create)
+    result.updated["modules"] = len(to_update)
+    return modules, [module.pk for module in rows if module.pk not in claimed]
+
+
+def _sync_challenges(course, modules, module_data, result):
+    """Create, update and move challenges; returns the stale challenge pks."""
+    rows = list(Challenge.objects.filter(module__course=course).order_by("id"))
+    by_id = {challenge.pk: challenge for challenge in rows}
+    by_key = {}
+    for challenge in rows:
+        by_key.setdefault(
+            (challenge.module_id, challenge.title or challenge.prompt), challenge
+        )
+
+    claimed = set()
+    to_create, to_update, changed_fields = [], [], set()
+    for data in module_data:
+        module = modules[data["order"]]
+        for challenge_data in data.get("challenges", []):
+            challenge = _match(
+                challenge_data,
+                by_id,
+                by_key,
+                (module.pk, _key(challenge_data)),
+                claimed,
+            )
+            if challenge is None:
+                challenge = Challenge(module=module)
+                _assign(challenge, challenge_data, ("title", *CHALLENGE_FIELDS))
+                to_create.append(challenge)
+                continue
+            changed = _assign(challenge, challenge_data, ("title", *CHALLENGE_FIELDS))
+            if challenge.module_id != module.pk:
+                challenge.module = module
+                changed.append("module")
+            if changed:
+                to_update.append(challenge)
+                changed_fields.update(changed)
+
+    Challenge.objects.bulk_create(to_create)
+    if to_update:
+        Challenge.objects.bulk_update(to_update, sorted(changed_fields))
+    result.created["challenges"] = len(to_create)
+    result.updated["challenges"] = len(to_update)
+    return [challenge.pk for challenge in rows if challenge.pk not in claimed]
+
+
+def _history(module_ids, challenge_ids):
+    """Count the learner rows that deleting these modules and challenges removes."""
+    on_challenges = Q(challenge_id__in=challenge_ids) | Q(
+        challenge__module_id__in=module_ids
+    )
+    return {
+        "attempts": UserChallengeAttempt.objects.filter(on_challenges).count(),
+        "challenge progress rows": ChallengeProgress.objects.filter(
+            on_challenges
+        ).count(),
+        "module progress rows": ModuleProgress.objects.filter(
+            module_id__in=module_ids
+        ).count(),
+    }
+
+
+def _delete(module_ids, challenge_ids, result):
+    # Challenges first, so those of deleted modules are counted too
+    challenges = Challenge.objects.filter(
+        Q(pk__in=challenge_ids) | Q(module_id__in=module_ids)
+    )
+    result.deleted["challenges"] = challenges.delete()[1].get(Challenge._meta.label, 0)
+    result.deleted["modules"] = (
+        Module.objects.filter(pk__in=module_ids).delete()[1].get(Module._meta.label, 0)
+    )
@@ -0,0 +1,229 @@
+# courses/challenge_stats.py
+"""Per-challenge difficulty signals kept in ``ChallengeStats``.
+
+Counters are bumped with one ``F()`` UPDATE per attempt, in the submission
+transaction; a first solve also feeds the learner's time-to-solve (seconds
+summed over their attempts so far) into a P² quantile sketch of constant size,
+so the median needs neither the attempt history nor a sort. Reading any
+signal is one row, and the admin can sort and filter on them.
+
+The UPDATE locks the challenge's row until the submission commits, which
+serializes concurrent submissions on the same challenge for that short
+moment; it is issued last for that reason.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from . import rollups
+from .models import Challenge, ChallengeProgress, ChallengeStats, UserChallengeAttempt
+
+BATCH_SIZE = 500
+REPLAYED_FIELDS = [
+    "attempts",
+    "correct",
+    "solvers",
+    "first_tries",
+    "first_try_correct",
+    "solve_time_sketch",
+    "median_solve_seconds",
+    "updated_at",
+]
+
+
+class P2Quantile:
+    """Streaming quantile estimate (Jain & Chlamtac's P² algorithm).
+
+    Keeps five markers whatever the number of observations; the state is a
+    JSON-serializable dict.
+    """
+
+    def __init__(self, state=None, p=0.5):
+        state = state or {}
+        self.p = state.get("p", p)
+        self.count = state.get("count", 0)
+        self.heights = list(state.get("heights", []))
+        self.positions = list(state.get("positions", []))
+        self.desired = list(state.get("desired", []))
+
+    @property
+    def state(self):
+        return {
+            "p": self.p,
+            "count": self.count,
+            "heights": self.heights,
+            "positions": self.positions,
+            "desired": self.desired,
+        }
+
+    def value(self):
+        if not self.count:
+            return None
+        if self.count <= 5:
+            ordered = sorted(self.heights)
+            index = self.p * (len(ordered) - 1)
+            low = int(index)
+            high = min(low + 1, len(ordered) - 1)
+            return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+        return self.heights[2]
+
+    def add(self, x):
+        x = float(x)
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(x)
+            if self.count == 5:
+                p = self.p
+                self.heights.sort()
+                self.positions = [1, 2, 3, 4, 5]
+                self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+            return
+
+        q, n = self.heights, self.positions
+        if x < q[0]:
+            q[0] = x
+            cell = 0
+        elif x >= q[4]:
+            q[4] = x
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(cell + 1, 5):
+            n[i] += 1
+        p = self.p
+        for i, step in enumerate((0, p / 2, p, (1 + p) / 2, 1)):
+            self.desired[i] += step
+
+        for i in (1, 2, 3):
+            drift = self.desired[i] - n[i]
+            if (drift >= 1 and n[i + 1] - n[i] > 1) or (
+                drift <= -1 and n[i - 1] - n[i] < -1
+            ):
+                d = 1 if drift > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+
+def _ensure_row(challenge_id):
+    # No savepoint needed, unlike get_or_create; a concurrent insert just wins
+    ChallengeStats.objects.bulk_create(
+        [ChallengeStats(challenge_id=challenge_id)], ignore_conflicts=True
+    )
+
+
+def record_attempt(attempt, first_solve):
+    """Apply one attempt; call inside the submission transaction.
+
+    One UPDATE for most attempts; a first solve also locks the row to read
+    the sketch and sums the learner's time on the challenge.
+    """
+    first_try = attempt.attempt_no == 1
+    rows = ChallengeStats.objects.filter(challenge_id=attempt.challenge_id)
+    changes = dict(
+        attempts=F("attempts") + 1,
+        correct=F("correct") + int(attempt.is_correct),
+        solvers=F("solvers") + int(first_solve),
+        first_tries=F("first_tries") + int(first_try),
+        first_try_correct=F("first_try_correct")
+        + int(first_try and attempt.is_correct),
+    )
+    if not first_solve:
+        if not rows.update(**changes):
+            _ensure_row(attempt.challenge_id)
+            rows.update(**changes)
+        return
+
+    locked = rows.select_for_update().values_list("solve_time_sketch", flat=True)
+    state = locked.first()
+    if state is None:
+        _ensure_row(attempt.challenge_id)
+        state = locked.get()
+    seconds = UserChallengeAttempt.objects.filter(
+        user_id=attempt.user_id, challenge_id=attempt.challenge_id
+    ).aggregate(total=Sum("time_seconds"))["total"]
+    sketch = P2Quantile(state)
+    sketch.add(seconds or 0)
+    rows.update(
+        **changes,
+        solve_time_sketch=sketch.state,
+        median_solve_seconds=sketch.value(),
+    )
+
+
+def _replay(challenge, totals, solvers):
+    """Stats of ``challenge`` from the rollups and the attempts still in the log."""
+    stats = ChallengeStats(
+        challenge=challenge,
+        attempts=totals["attempts"],
+        correct=totals["correct"],
+        solvers=solvers,
+    )
+    sketch = P2Quantile()
+    spent, solved = {}, set()
+    attempts = (
+        UserChallengeAttempt.objects.filter(challenge=challenge)
+        .order_by("id")
+        .values_list("user_id", "is_correct", "attempt_no", "time_seconds")
+    )
+    for user_id, is_correct, attempt_no, seconds in attempts.iterator():
+        if attempt_no == 1:
+            stats.first_tries += 1
+            stats.first_try_correct += is_correct
+        spent[user_id] = spent.get(user_id, 0) + seconds
+        if is_correct and user_id not in solved:
+            solved.add(user_id)
+            sketch.add(spent[user_id])
+    stats.solve_time_sketch = sketch.state
+    stats.median_solve_seconds = sketch.value()
+    return stats
+
+
+@transaction.atomic
+def _rebuild_batch(pks):
+    # Submissions for these challenges wait until the batch is written: the
+    # challenge locks hold back inserts of missing rows (their foreign key
+    # check), the stats locks hold back updates of existing ones
+    list(Challenge.objects.select_for_update().filter(pk__in=pks).values_list("pk"))
+    list(ChallengeStats.objects.select_for_update().filter(challenge_id__in=pks))
+    batch = rollups.prefetch_totals(Challenge.objects.filter(pk__in=pks))
+    solvers = dict(
+        ChallengeProgress.objects.filter(challenge_id__in=pks, is_solved=True)
+        .values("challenge_id")
+        .annotate(total=Count("id"))
+        .values_list("challenge_id", "total")
+        .order_by()
+    )
+    ChallengeStats.objects.filter(challenge_id__in=pks).delete()
+    # An upsert, so a row that slipped in anyway is overwritten, not a failure
+    ChallengeStats.objects.bulk_create(
+        [_replay(c, c._attempt_totals, solvers.get(c.pk, 0)) for c in batch],
+        update_conflicts=True,
+        unique_fields=["challenge"],
+        update_fields=REPLAYED_FIELDS,
+    )
+
+
+def rebuild(challenges=None, batch_size=BATCH_SIZE):
+    """Recompute ``ChallengeStats``; returns the number of challenges written.
+
+    Attempt and correct counts come from the rollups and solver counts from
+    progress rows, so both include archived attempts; first-try rates and the
+    time-to-solve sketch only see attempts still in the log.
+    """
+    if challenges is None:
+        challenges = Challenge.objects.all()
+    pks = list(challenges.order_by("pk").values_list("pk", flat=True))
+    for first in range(0, len(pks), batch_size):
+        last = first + batch_size
+        _rebuild_batch(pks[first:last])
+    return len(pks)
@@ -0,0 +1,101 @@
+# courses/coaching.py
+"""Stuck-learner signals for the coach dashboard.
+
+``submit_attempt`` keeps three signals on each ``Enrollment`` as attempts
+arrive: failures in a row on the same challenge, the time of the last first
+solve and the time the last streak was broken. Challenge failure counts come
+from ``ChallengeStats``. The dashboard filters those columns for the coach's
+courses and never reads the attempt log.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ChallengeStats, Course, Enrollment
+
+FAILURE_THRESHOLD = 3
+INACTIVE_DAYS = 7
+STREAK_RESET_DAYS = 3
+STUCK_LIMIT = 200
+MOST_FAILED = 5
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    failures: int = FAILURE_THRESHOLD
+    inactive_days: int = INACTIVE_DAYS
+    streak_reset_days: int = STREAK_RESET_DAYS
+
+
+def is_coach(user):
+    return user.is_authenticated and (user.role == "instructor" or user.is_staff)
+
+
+def can_coach(user, course_id):
+    """Whether ``user`` may see learner data of the course; staff see all."""
+    if not is_coach(user):
+        return False
+    return user.is_staff or user.taught_courses.filter(pk=course_id).exists()
+
+
+def coached_courses(user):
+    """Courses ``user`` instructs; staff who instruct none see every course."""
+    courses = Course.objects.filter(instructors=user)
+    if user.is_staff and not courses.exists():
+        courses = Course.objects.all()
+    return list(courses.order_by("title"))
+
+
+def stuck_learners(courses, thresholds=Thresholds(), limit=STUCK_LIMIT):
+    """Return ``(enrollments, total)`` of stuck learners, most failures first.
+
+    Each enrollment gets a ``reasons`` list naming the signals that fired.
+    """
+    now = timezone.now()
+    inactive_before = now - timedelta(days=thresholds.inactive_days)
+    reset_after = now - timedelta(days=thresholds.streak_reset_days)
+    failing = Q(consecutive_failures__gte=thresholds.failures)
+    inactive = Q(progress__lt=100, active_at__lt=inactive_before)
+    reset = Q(streak_reset_at__gte=reset_after)
+    stuck = (
+        Enrollment.objects.filter(course__in=courses)
+        .annotate(active_at=Coalesce("last_progress_at", "enrolled_at"))
+        .filter(failing | inactive | reset)
+    )
+    enrollments = list(
+        stuck.select_related(
+            "user__profile", "course", "failing_challenge__module"
+        ).order_by("-consecutive_failures", "active_at", "pk")[:limit]
+    )
+    total = len(enrollments) if len(enrollments) < limit else stuck.count()
+    for enrollment in enrollments:
+        enrollment.reasons = []
+        if enrollment.consecutive_failures >= thresholds.failures:
+            enrollment.reasons.append("failing")
+        if enrollment.progress < 100 and enrollment.active_at < inactive_before:
+            enrollment.reasons.append("inactive")
+        if enrollment.streak_reset_at and enrollment.streak_reset_at >= reset_after:
+            enrollment.reasons.append("streak_reset")
+    return enrollments, total
+
+
+def most_failed_challenges(courses, limit=MOST_FAILED):
+    """``{course_id: [ChallengeStats, ...]}`` with the most wrong answers first."""
+    stats = (
+        ChallengeStats.objects.filter(
+            challenge__module__course__in=courses, attempts__gt=F("correct")
+        )
+        .annotate(failures=F("attempts") - F("correct"))
+        .select_related("challenge__module")
+        .order_by("-failures", "challenge_id")
+    )
+    by_course = {course.pk: [] for course in courses}
+    for row in stats:
+        top = by_course[row.challenge.module.course_id]
+        if len(top) < limit:
+            top.append(row)
+    return by_course
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+import pytest
+
+from courses import structure
+from courses.models import Challenge, Course, Enrollment, Module
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Leaderboards and structure snapshots must not leak between tests."""
+    cache.clear()
+    # Flushed tables restart the generation, so a later test could match it
+    structure._catalog = None
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def learner(db):
+    return User.objects.create_user(username="learner", password="password123")
+
+
+@pytest.fixture
+def course(db):
+    """A two-module course: two challenges in module 1, one in module 2."""
+    course = Course.objects.create(title="Practical Git", slug="practical-git")
+    first = Module.objects.create(course=course, title="Basics", order=1, points=10)
+    second = Module.objects.create(course=course, title="Branching", order=2, points=20)
+    Challenge.objects.create(module=first, prompt="init", expected_output="git init")
+    Challenge.objects.create(
+        module=first, prompt="status", expected_output="git status"
+    )
+    Challenge.objects.create(
+        module=second, prompt="branch", expected_output="git branch"
+    )
+    return course
+
+
+@pytest.fixture
+def challenges(course):
+    return list(Challenge.objects.filter(module__course=course).order_by("id"))
+
+
+@pytest.fixture
+def tagged(course):
+    """``course`` with skill tags on both modules and a hard challenge."""
+    Module.objects.filter(course=course, order=1).update(
+        skill_tags={"topics": ["init", "status"]}
+    )
+    Module.objects.filter(course=course, order=2).update(
+        skill_tags={"topics": ["branch"]}
+    )
+    Challenge.objects.filter(module__course=course, prompt="branch").update(
+        difficulty="hard"
+    )
+    structure.bump_generation()
+    return course
+
+
+@pytest.fixture
+def enrollment(learner, course):
+    return Enrollment.objects.create(user=learner, course=course)
+
+
+@pytest.fixture
+def learner_client(client, learner):
+    client.force_login(learner)
+    return client
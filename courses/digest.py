@@ -0,0 +1,214 @@
+# courses/digest.py
+"""Weekly progress digest for every learner.
+
+Learners are processed in primary-key chunks. For each chunk a fixed number
+of grouped queries fetch the week's attempts and XP, the modules finished,
+and the open enrollments whose learning-center cursor gives the next step;
+names and links come from the structure snapshot. Each digest is rendered in
+the learner's ``Profile.preferred_language`` and the chunk is queued in the
+email outbox with one bulk insert, keyed per learner and ISO week so a rerun
+queues nothing twice. ``send_outbox`` delivers them.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Subquery, Sum
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone, translation
+from django.utils.translation import gettext as _
+
+from accounts import outbox
+
+from . import activity, structure
+from .models import ChallengeProgress, Enrollment, ModuleProgress, UserChallengeAttempt
+
+CHUNK_SIZE = 1000
+NEXT_STEPS = 2
+TEMPLATE = "emails/weekly_digest.txt"
+
+
+@dataclass
+class NextStep:
+    course: str
+    module: str
+    slug: str
+
+    @property
+    def url(self):
+        # Reversed at render time, under the learner's language prefix
+        path = reverse("courses:learning_center", args=[self.slug])
+        return settings.SITE_URL.rstrip("/") + path
+
+
+@dataclass
+class Digest:
+    user_id: object
+    name: str
+    email: str
+    language: str
+    streak: int
+    attempts: int = 0
+    correct: int = 0
+    xp: int = 0
+    modules_finished: int = 0
+    next_steps: list = field(default_factory=list)
+
+    @property
+    def is_empty(self):
+        return not (self.attempts or self.next_steps)
+
+
+def week_key(user_id, end):
+    year, week, _day = end.isocalendar()
+    return f"weekly-digest:{user_id}:{year}-W{week:02d}"
+
+
+def _learners(after, limit, today):
+    users = get_user_model().objects.filter(is_active=True).exclude(email="")
+    if after is not None:
+        users = users.filter(pk__gt=after)
+    return [
+        Digest(
+            user_id=pk,
+            name=display_name or username,
+            email=email,
+            language=language or settings.LANGUAGE_CODE,
+            streak=activity.Activity.of(bitmap, today).current_streak,
+        )
+        for pk, username, email, display_name, language, bitmap in users.filter(
+            Exists(Enrollment.objects.filter(user_id=OuterRef("pk")))
+        )
+        .order_by("pk")
+        .values_list(
+            "pk",
+            "username",
+            "email",
+            "profile__display_name",
+            "profile__preferred_language",
+            "profile__activity",
+        )[:limit]
+    ]
+
+
+def _add_activity(digests, start, end):
+    rows = (
+        UserChallengeAttempt.objects.filter(
+            user_id__in=list(digests), submitted_at__gte=start, submitted_at__lt=end
+        )
+        .values("user_id")
+        .annotate(
+            attempts=Count("id"),
+            correct=Count("id", filter=Q(is_correct=True)),
+            xp=Sum("challenge__module__points", filter=Q(is_correct=True)),
+        )
+        .order_by()
+    )
+    for row in rows:
+        digest = digests[row["user_id"]]
+        digest.attempts, digest.correct = row["attempts"], row["correct"]
+        digest.xp = row["xp"] or 0
+
+
+def _add_modules_finished(digests, start, end):
+    # A module was finished when its last challenge was solved
+    last_solve = (
+        ChallengeProgress.objects.filter(
+            enrollment_id=OuterRef("enrollment_id"),
+            challenge__module_id=OuterRef("module_id"),
+            is_solved=True,
+        )
+        .values("enrollment_id")
+        .annotate(last=Max("solved_at"))
+        .values("last")
+    )
+    finished = Counter(
+        ModuleProgress.objects.filter(
+            enrollment__user_id__in=list(digests), is_complete=True
+        )
+        .annotate(finished_at=Subquery(last_solve))
+        .filter(finished_at__gte=start, finished_at__lt=end)
+        .values_list("enrollment__user_id", flat=True)
+    )
+    for user_id, count in finished.items():
+        digests[user_id].modules_finished = count
+
+
+def _add_next_steps(digests):
+    enrollments = (
+        Enrollment.objects.filter(user_id__in=list(digests), progress__lt=100)
+        .order_by(
+            "user_id", F("last_progress_at").desc(nulls_last=True), "-enrolled_at"
+        )
+        .values_list("user_id", "course_id", "next_challenge_id")
+    )
+    for user_id, course_id, challenge_id in enrollments:
+        digest = digests[user_id]
+        course = structure.get_course(pk=course_id)
+        if len(digest.next_steps) >= NEXT_STEPS or course is None:
+            continue
+        # No cursor yet means nothing solved: start at the first module
+        module = course.module_by_challenge.get(challenge_id) or next(
+            iter(course.modules), None
+        )
+        if module is None:
+            continue
+        digest.next_steps.append(NextStep(course.title, module.title, course.slug))
+
+
+def build(end=None, chunk_size=CHUNK_SIZE):
+    """Yield one list of ``Digest`` per chunk of learners for the week to ``end``.
+
+    Learners with no attempts this week and nothing left to do are skipped.
+    """
+    end = end or timezone.now()
+    start = end - timedelta(days=7)
+    after = None
+    while True:
+        learners = _learners(after, chunk_size, timezone.localdate(end))
+        if not learners:
+            return
+        after = learners[-1].user_id
+        digests = {digest.user_id: digest for digest in learners}
+        _add_activity(digests, start, end)
+        _add_modules_finished(digests, start, end)
+        _add_next_steps(digests)
+        yield [digest for digest in learners if not digest.is_empty]
+
+
+def render(digest, template=None):
+    """``(subject, body)`` of ``digest`` in the learner's language."""
+    template = template or get_template(TEMPLATE)
+    with translation.override(digest.language):
+        subject = _("Your CodeQuest week")
+        body = template.render({"digest": digest})
+    return subject, body
+
+
+def queue(end=None, chunk_size=CHUNK_SIZE, dry_run=False):
+    """Render and queue the week's digests; returns the number rendered."""
+    end = end or timezone.now()
+    template = get_template(TEMPLATE)
+    total = 0
+    for digests in build(end, chunk_size):
+        emails = []
+        for digest in digests:
+            subject, body = render(digest, template)
+            emails.append(
+                {
+                    "subject": subject,
+                    "message": body,
+                    "recipient_list": [digest.email],
+                    "key": week_key(digest.user_id, end),
+                }
+            )
+        if not dry_run:
+            with transaction.atomic():
+                outbox.queue_many(emails)
+        total += len(emails)
+    return total
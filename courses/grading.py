@@ -0,0 +1,188 @@
+# courses/grading.py
+"""Answer evaluation engine.
+
+Each ``Challenge.match_mode`` names an evaluator in ``EVALUATORS``. An
+evaluator turns a challenge's rules into a matcher (a callable taking the
+learner's answer) once; matchers are cached per process keyed by challenge id
+and the stored hash of the rule content (``Challenge.rules_hash``, kept
+current by ``save()`` and the bulk writes of its queryset), so editing a
+challenge recompiles it and every other submission only pays for the match
+itself, however large the rules.
+"""
+
+import hashlib
+import json
+import re
+import shlex
+import threading
+from collections import OrderedDict
+
+from . import sandbox
+
+MODE_EXACT = "exact"
+MODE_WHITESPACE = "whitespace"
+MODE_REGEX = "regex"
+MODE_TOKENS = "tokens"
+MODE_ANY_OF = "any_of"
+
+GRADER_ANSWER = "answer"
+GRADER_SANDBOX = "sandbox"
+
+MATCHER_CACHE_SIZE = 4096
+
+EVALUATORS = {}
+
+_WHITESPACE = re.compile(r"\s+")
+_SHORT_FLAGS = re.compile(r"^-[A-Za-z]{2,}$")
+
+
+class InvalidRule(ValueError):
+    """The challenge's answer rules cannot be compiled."""
+
+
+def register(mode):
+    """Register ``compile_fn(challenge) -> matcher`` as the evaluator for ``mode``."""
+
+    def decorator(compile_fn):
+        EVALUATORS[mode] = compile_fn
+        return compile_fn
+
+    return decorator
+
+
+def _fold(text, ignore_case):
+    return text.casefold() if ignore_case else text
+
+
+def normalize_whitespace(text):
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _tokens(text):
+    """Split a command line into an order-insensitive token set.
+
+    Quoting is removed and clustered short flags are expanded, so
+    ``ls -la "My Dir"`` and ``ls 'My Dir' -a -l`` compare equal.
+    """
+    try:
+        parts = shlex.split(text)
+    except ValueError:
+        parts = text.split()
+    tokens = set()
+    for part in parts:
+        if _SHORT_FLAGS.match(part):
+            tokens.update(f"-{flag}" for flag in part[1:])
+        else:
+            tokens.add(part)
+    return frozenset(tokens)
+
+
+@register(MODE_EXACT)
+def compile_exact(challenge):
+    ignore_case = challenge.ignore_case
+    expected = _fold(challenge.expected_output.strip(), ignore_case)
+    return lambda answer: _fold(answer.strip(), ignore_case) == expected
+
+
+@register(MODE_WHITESPACE)
+def compile_whitespace(challenge):
+    ignore_case = challenge.ignore_case
+    expected = _fold(normalize_whitespace(challenge.expected_output), ignore_case)
+    return lambda answer: _fold(normalize_whitespace(answer), ignore_case) == expected
+
+
+@register(MODE_REGEX)
+def compile_regex(challenge):
+    flags = re.IGNORECASE if challenge.ignore_case else 0
+    try:
+        pattern = re.compile(challenge.expected_output.strip(), flags)
+    except re.error as exc:
+        raise InvalidRule(f"Invalid regular expression: {exc}") from exc
+    return lambda answer: pattern.fullmatch(answer.strip()) is not None
+
+
+@register(MODE_TOKENS)
+def compile_tokens(challenge):
+    ignore_case = challenge.ignore_case
+    expected = _tokens(_fold(challenge.expected_output, ignore_case))
+    return lambda answer: _tokens(_fold(answer, ignore_case)) == expected
+
+
+@register(MODE_ANY_OF)
+def compile_any_of(challenge):
+    ignore_case = challenge.ignore_case
+    accepted = frozenset(
+        _fold(normalize_whitespace(answer), ignore_case)
+        for answer in [challenge.expected_output, *(challenge.accepted_answers or [])]
+    )
+    return lambda answer: _fold(normalize_whitespace(answer), ignore_case) in accepted
+
+
+def rule_hash(challenge):
+    """Hash of everything that affects how ``challenge`` is graded."""
+    rules = [
+        challenge.match_mode,
+        challenge.expected_output,
+        challenge.accepted_answers or [],
+        challenge.ignore_case,
+    ]
+    payload = json.dumps(rules, sort_keys=True, ensure_ascii=False).encode()
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def compile_matcher(challenge):
+    """Build a matcher for ``challenge`` without touching the cache."""
+    try:
+        compile_fn = EVALUATORS[challenge.match_mode]
+    except KeyError:
+        raise InvalidRule(f"Unknown match mode '{challenge.match_mode}'.") from None
+    return compile_fn(challenge)
+
+
+_lock = threading.Lock()
+_matchers = OrderedDict()
+
+
+def get_matcher(challenge):
+    """Return the cached matcher for ``challenge``, compiling it on first use."""
+    # The stored hash keeps a hit flat as rules grow; unsaved challenges have none
+    key = (challenge.pk, challenge.rules_hash or rule_hash(challenge))
+    with _lock:
+        matcher = _matchers.get(key)
+        if matcher is not None:
+            _matchers.move_to_end(key)
+            return matcher
+    matcher = compile_matcher(challenge)
+    with _lock:
+        _matchers[key] = matcher
+        while len(_matchers) > MATCHER_CACHE_SIZE:
+            _matchers.popitem(last=False)
+    return matcher
+
+
+def evaluate(challenge, answer):
+    """Return True when ``answer`` satisfies the challenge's rules."""
+    try:
+        matcher = get_matcher(challenge)
+    except InvalidRule:
+        # A broken rule must not accept anything; authors see the error in admin.
+        return False
+    return matcher(answer)
+
+
+def grade(challenge, answer):
+    """Grade a submission with the challenge's grader.
+
+    Sandbox challenges run the snippet and match its output against the rules;
+    raises ``sandbox.SandboxBusy`` when the sandbox pool is saturated.
+    """
+    if challenge.grader == GRADER_SANDBOX:
+        return judge_output(
+            challenge, sandbox.run(answer, setup_script=challenge.setup_script)
+        )
+    return evaluate(challenge, answer)
+
+
+def judge_output(challenge, result):
+    """Return True when a ``sandbox.SandboxResult`` satisfies the rules."""
+    return not result.timed_out and evaluate(challenge, result.stdout)
@@ -0,0 +1,142 @@
+# courses/jobs.py
+"""Database-backed grading queue.
+
+Submissions whose grader is listed in ``settings.GRADING_ASYNC_GRADERS`` are
+stored as pending ``GradingJob`` rows instead of being graded inside the
+request. ``run_grading_worker`` processes claim them in batches with
+``SELECT ... FOR UPDATE SKIP LOCKED`` (so any number of workers can share the
+table without blocking each other), grade them and record the attempt through
+``submission.submit_attempt``. Jobs whose worker died are handed out again
+once their lease expires.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import grading, sandbox, submission
+from .models import GradingJob
+
+logger = logging.getLogger(__name__)
+
+
+def is_async(challenge):
+    return challenge.grader in settings.GRADING_ASYNC_GRADERS
+
+
+def enqueue(enrollment, challenge, answer, time_seconds=0):
+    return GradingJob.objects.create(
+        enrollment=enrollment,
+        challenge=challenge,
+        answer=answer,
+        time_seconds=max(time_seconds, 0),
+    )
+
+
+def claim_batch(size):
+    """Mark up to ``size`` pending jobs as running and return them."""
+    with transaction.atomic():
+        ids = list(
+            GradingJob.objects.select_for_update(skip_locked=True)
+            .filter(status=GradingJob.PENDING)
+            .order_by("id")
+            .values_list("id", flat=True)[:size]
+        )
+        if not ids:
+            return []
+        GradingJob.objects.filter(pk__in=ids).update(
+            status=GradingJob.RUNNING, claimed_at=timezone.now()
+        )
+    return list(
+        GradingJob.objects.filter(pk__in=ids)
+        .select_related("enrollment", "challenge__module")
+        .order_by("id")
+    )
+
+
+def requeue_expired(lease=None):
+    """Return running jobs whose lease has expired to the pending state."""
+    lease = settings.GRADING_JOB_LEASE if lease is None else lease
+    return GradingJob.objects.filter(
+        status=GradingJob.RUNNING,
+        claimed_at__lt=timezone.now() - timedelta(seconds=lease),
+    ).update(status=GradingJob.PENDING, claimed_at=None)
+
+
+def _release(job):
+    GradingJob.objects.filter(pk=job.pk, status=GradingJob.RUNNING).update(
+        status=GradingJob.PENDING, claimed_at=None
+    )
+
+
+def _fail(job, error):
+    GradingJob.objects.filter(pk=job.pk, status=GradingJob.RUNNING).update(
+        status=GradingJob.FAILED, error=error, finished_at=timezone.now()
+    )
+
+
+@transaction.atomic
+def _record(job, is_correct):
+    # Only the claim that is still current may record the attempt; a job whose
+    # lease expired may already have been picked up by another worker.
+    claimed = (
+        GradingJob.objects.select_for_update()
+        .filter(pk=job.pk, status=GradingJob.RUNNING, claimed_at=job.claimed_at)
+        .exists()
+    )
+    if not claimed:
+        return False
+    result = submission.submit_attempt(
+        job.enrollment, job.challenge, is_correct, job.time_seconds
+    )
+    job.status = GradingJob.DONE
+    job.attempt = result.attempt
+    job.earned_xp = result.earned_xp
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "attempt", "earned_xp", "finished_at"])
+    return True
+
+
+def process_batch(jobs):
+    """Grade claimed jobs and write their results; returns the number recorded.
+
+    Sandbox runs for the whole batch are submitted to the pool up front so
+    they execute in parallel.
+    """
+    runs = {}
+    for job in jobs:
+        if job.challenge.grader != grading.GRADER_SANDBOX:
+            continue
+        try:
+            runs[job.pk] = sandbox.get_pool().submit(
+                job.answer, job.challenge.setup_script
+            )
+        except sandbox.SandboxBusy:
+            runs[job.pk] = None
+
+    recorded = 0
+    for job in jobs:
+        try:
+            if job.pk not in runs:
+                is_correct = grading.evaluate(job.challenge, job.answer)
+            elif runs[job.pk] is None:
+                _release(job)
+                continue
+            else:
+                is_correct = grading.judge_output(job.challenge, runs[job.pk].result())
+            recorded += _record(job, is_correct)
+        except Exception as exc:
+            logger.exception("Grading job %s failed", job.pk)
+            _fail(job, str(exc) or exc.__class__.__name__)
+    return recorded
+
+
+def run_once(batch_size=10):
+    """Claim and process one batch; returns the number of jobs claimed."""
+    jobs = claim_batch(batch_size)
+    if jobs:
+        process_batch(jobs)
+    return len(jobs)
@@ -0,0 +1,201 @@
+# courses/leaderboard.py
+"""Per-course leaderboards.
+
+Two materialized structures back every leaderboard read:
+
+* ``LeaderboardBucket`` rows count learners per (course, xp). A learner's rank
+  is one plus the number of learners in higher buckets, so it costs one row per
+  distinct score above them instead of one row per learner.
+* The top entries of each course are cached and only dropped when an XP change
+  can actually reorder them.
+
+Both are updated from ``record_xp_change`` whenever ``Enrollment.xp`` moves and
+can be rebuilt with ``manage.py rebuild_leaderboards``.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+
+from .models import Course, Enrollment, LeaderboardBucket
+
+LEADERBOARD_SIZE = 5
+CACHE_TIMEOUT = 60 * 10
+
+
+def _top_key(course_id):
+    return f"leaderboard:top:{course_id}"
+
+
+def _shift_bucket(course_id, xp, delta):
+    if xp <= 0:
+        # Learners without XP share the last place; they need no bucket.
+        return
+    if delta < 0:
+        LeaderboardBucket.objects.filter(
+            course_id=course_id, xp=xp, learners__gt=0
+        ).update(learners=F("learners") + delta)
+        return
+    updated = LeaderboardBucket.objects.filter(course_id=course_id, xp=xp).update(
+        learners=F("learners") + delta
+    )
+    if not updated:
+        _, created = LeaderboardBucket.objects.get_or_create(
+            course_id=course_id, xp=xp, defaults={"learners": delta}
+        )
+        if not created:
+            LeaderboardBucket.objects.filter(course_id=course_id, xp=xp).update(
+                learners=F("learners") + delta
+            )
+
+
+def record_xp_change(enrollment, old_xp, new_xp):
+    """Move ``enrollment`` from its old score bucket to the new one.
+
+    Call inside the transaction that changes ``Enrollment.xp``; the cached
+    top entries are dropped after commit if the change can affect them.
+    """
+    old_xp, new_xp = old_xp or 0, new_xp or 0
+    if old_xp == new_xp:
+        return
+    _shift_bucket(enrollment.course_id, old_xp, -1)
+    _shift_bucket(enrollment.course_id, new_xp, 1)
+
+    top = cache.get(_top_key(enrollment.course_id))
+    if top is None:
+        return
+    in_top = any(entry["enrollment_id"] == enrollment.pk for entry in top)
+    reaches_top = len(top) < LEADERBOARD_SIZE or new_xp >= top[-1]["xp"]
+    if in_top or reaches_top:
+        course_id = enrollment.course_id
+        transaction.on_commit(lambda: cache.delete(_top_key(course_id)))
+
+
+def forget_enrollment(enrollment):
+    """Remove a deleted enrollment from its course leaderboard."""
+    _shift_bucket(enrollment.course_id, enrollment.xp or 0, -1)
+    cache.delete(_top_key(enrollment.course_id))
+
+
+def _load_top(course_id):
+    rows = (
+        Enrollment.objects.filter(course_id=course_id)
+        .select_related("user__profile")
+        .order_by("-xp", "enrolled_at")[:LEADERBOARD_SIZE]
+    )
+    return [
+        {
+            "enrollment_id": row.pk,
+            "user_id": row.user_id,
+            "name": row.user.profile.display_name or row.user.username,
+            "xp": row.xp,
+        }
+        for row in rows
+    ]
+
+
+def top_entries(course_ids):
+    """Return ``{course_id: [entry, ...]}`` with one cache read for all courses."""
+    keys = {_top_key(cid): cid for cid in course_ids}
+    cached = cache.get_many(keys)
+    tops = {keys[key]: entries for key, entries in cached.items()}
+    missing = {}
+    for cid in course_ids:
+        if cid not in tops:
+            tops[cid] = _load_top(cid)
+            missing[_top_key(cid)] = tops[cid]
+    if missing:
+        cache.set_many(missing, CACHE_TIMEOUT)
+    return tops
+
+
+def _bucket_standings(enrollments):
+    """Rank and nearest scores above and below each enrollment, in one query."""
+    filters = Q()
+    aggregates = {}
+    for e in enrollments:
+        xp = e.xp or 0
+        course = Q(course_id=e.course_id)
+        filters |= course
+        aggregates[f"ahead_{e.pk}"] = Sum("learners", filter=course & Q(xp__gt=xp))
+        # Emptied buckets are kept with zero learners; they are nobody's score
+        occupied = course & Q(learners__gt=0)
+        aggregates[f"above_{e.pk}"] = Min("xp", filter=occupied & Q(xp__gt=xp))
+        aggregates[f"below_{e.pk}"] = Max("xp", filter=occupied & Q(xp__lt=xp))
+    row = LeaderboardBucket.objects.filter(filters).aggregate(**aggregates)
+    return {
+        e.pk: {
+            "rank": (row[f"ahead_{e.pk}"] or 0) + 1,
+            "next_xp": row[f"above_{e.pk}"],
+            "previous_xp": row[f"below_{e.pk}"],
+        }
+        for e in enrollments
+    }
+
+
+def ranks(enrollments):
+    """Return ``{enrollment_id: rank}`` for any number of enrollments in one query."""
+    enrollments = list(enrollments)
+    if not enrollments:
+        return {}
+    return {pk: row["rank"] for pk, row in _bucket_standings(enrollments).items()}
+
+
+def standings(enrollments):
+    """Top entries, the learner's rank and neighbouring scores per enrollment.
+
+    ``next_xp`` is the closest higher score in the course (``None`` at the
+    top) and ``previous_xp`` the closest lower one (``None`` when nobody with
+    XP is behind). Both come from the score buckets, so the cost does not
+    grow with the course. One cache read and one bucket query however many
+    courses are involved; the result is keyed by course id.
+    """
+    enrollments = list(enrollments)
+    if not enrollments:
+        return {}
+    tops = top_entries([e.course_id for e in enrollments])
+    buckets = _bucket_standings(enrollments)
+    return {
+        e.course_id: {
+            "top": tops[e.course_id],
+            **buckets[e.pk],
+            "xp_to_next": (
+                None
+                if buckets[e.pk]["next_xp"] is None
+                else buckets[e.pk]["next_xp"] - (e.xp or 0)
+            ),
+        }
+        for e in enrollments
+    }
+
+
+@transaction.atomic
+def rebuild(course_ids=None):
+    """Refill the score buckets from ``Enrollment`` and drop cached top entries."""
+    buckets = LeaderboardBucket.objects.all()
+    enrollments = Enrollment.objects.all()
+    if course_ids is not None:
+        buckets = buckets.filter(course_id__in=course_ids)
+        enrollments = enrollments.filter(course_id__in=course_ids)
+    # XP changes update their enrollment before shifting buckets, so with the
+    # enrollments locked none can land between the count and the write
+    list(enrollments.select_for_update().values_list("pk"))
+    rows = list(
+        enrollments.filter(xp__gt=0)
+        .values("course_id", "xp")
+        .annotate(learners=Count("id"))
+        .order_by()
+    )
+    # Upserted in place, so readers never see a course without buckets
+    buckets.update(learners=0)
+    LeaderboardBucket.objects.bulk_create(
+        [LeaderboardBucket(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=["course", "xp"],
+        update_fields=["learners"],
+    )
+    buckets.filter(learners=0).delete()
+    if course_ids is None:
+        course_ids = Course.objects.values_list("id", flat=True)
+    cache.delete_many([_top_key(cid) for cid in course_ids])
+    return len(rows)
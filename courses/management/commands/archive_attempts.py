@@ -0,0 +1,82 @@
+"""
+Management command to move old raw attempts into compressed cold storage.
+
+Attempts older than the retention window that are already rolled up are
+written as gzip-compressed JSON lines (one file per id range, so a re-run
+after a crash overwrites rather than duplicates) and then deleted. Totals
+keep coming from the rollup tables.
+"""
+
+import gzip
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from courses import rollups
+from courses.models import UserChallengeAttempt
+
+FIELDS = (
+    "id",
+    "user_id",
+    "challenge_id",
+    "is_correct",
+    "attempt_no",
+    "time_seconds",
+    "submitted_at",
+)
+
+
+class Command(BaseCommand):
+    help = "Archive rolled-up attempts older than the retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ATTEMPT_RETENTION_DAYS)
+        parser.add_argument("--output-dir", default=settings.ATTEMPT_ARCHIVE_DIR)
+        parser.add_argument("--batch-size", type=int, default=50000)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Count without writing"
+        )
+
+    def handle(self, *args, **options):
+        output_dir = Path(options["output_dir"])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        # Never archive what the rollups have not seen, or totals would drop.
+        candidates = UserChallengeAttempt.objects.filter(
+            id__lte=rollups.high_water_mark(),
+            submitted_at__lt=timezone.now() - timedelta(days=options["days"]),
+        ).order_by("id")
+        if options["dry_run"]:
+            self.stdout.write(f"{candidates.count()} attempt(s) would be archived.")
+            return
+
+        archived = 0
+        while True:
+            rows = list(candidates.values(*FIELDS)[: options["batch_size"]])
+            if not rows:
+                break
+            path = output_dir / f"attempts-{rows[0]['id']}-{rows[-1]['id']}.jsonl.gz"
+            self._write(path, rows)
+            with transaction.atomic():
+                candidates.filter(
+                    id__gte=rows[0]["id"], id__lte=rows[-1]["id"]
+                ).delete()
+            archived += len(rows)
+            self.stdout.write(f"{path.name}: {len(rows)} attempt(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} attempt(s)."))
+
+    def _write(self, path, rows):
+        partial = path.with_suffix(".partial")
+        with gzip.open(partial, "wt", encoding="utf-8") as archive:
+            for row in rows:
+                archive.write(json.dumps(row, default=str) + "\n")
+            archive.flush()
+            os.fsync(archive.fileno())
+        # Only a complete file gets the final name.
+        partial.replace(path)
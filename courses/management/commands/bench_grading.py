@@ -0,0 +1,78 @@
+"""
+Management command to benchmark answer evaluation per match mode.
+
+Grades a fixed-size answer against synthetic challenges of growing rule
+complexity and reports the cost per submission with and without the compiled
+matcher cache. No database access is needed.
+"""
+
+import re
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from courses import grading
+from courses.models import Challenge
+
+# A typical submission; its length stays fixed while the rules grow.
+ANSWER = "git commit -am 'word0 done'"
+
+
+def _challenge(pk, mode, size):
+    words = [f"word{i}" for i in range(size)]
+    if mode == grading.MODE_REGEX:
+        expected = "git commit -am '(?:" + "|".join(words) + ") done'"
+    elif mode == grading.MODE_TOKENS:
+        expected = "git commit " + " ".join(f"--{w}" for w in words)
+    else:
+        expected = " ".join(words)
+    challenge = Challenge(
+        pk=pk,
+        match_mode=mode,
+        expected_output=expected,
+        accepted_answers=words if mode == grading.MODE_ANY_OF else [],
+    )
+    challenge.rules_hash = grading.rule_hash(challenge)
+    return challenge
+
+
+def _compile_and_match(challenge):
+    re.purge()  # defeat the re module's own pattern cache
+    return grading.compile_matcher(challenge)(ANSWER)
+
+
+class Command(BaseCommand):
+    help = "Benchmark answer evaluation cost per submission for every match mode"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=2000)
+        parser.add_argument(
+            "--sizes",
+            default="1,10,100,1000",
+            help="Comma-separated rule sizes (alternatives, tokens or answers)",
+        )
+
+    def handle(self, *args, **options):
+        number = options["number"]
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        self.stdout.write(
+            f"{'mode':<12}{'size':>7}{'cached µs':>12}{'uncached µs':>14}"
+        )
+        pk = 0
+        for mode in grading.EVALUATORS:
+            for size in sizes:
+                pk += 1
+                challenge = _challenge(pk, mode, size)
+                grading.evaluate(challenge, ANSWER)  # warm the matcher cache
+                cached = timeit.timeit(
+                    lambda: grading.evaluate(challenge, ANSWER), number=number
+                )
+                uncached = timeit.timeit(
+                    lambda: _compile_and_match(challenge),
+                    number=max(number // 10, 1),
+                )
+                self.stdout.write(
+                    f"{mode:<12}{size:>7}"
+                    f"{cached / number * 1e6:>12.2f}"
+                    f"{uncached / max(number // 10, 1) * 1e6:>14.2f}"
+                )
@@ -0,0 +1,70 @@
+"""
+Management command to benchmark the sandbox grader.
+
+Pushes a batch of shell snippets through a fresh sandbox pool and reports
+graded submissions per second, per worker core, and the per-run latency
+percentiles. No database access is needed.
+"""
+
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import grading, sandbox
+from courses.models import Challenge
+
+SNIPPET = "mkdir -p demo && cd demo && touch notes.txt && ls"
+
+
+class Command(BaseCommand):
+    help = "Benchmark sandboxed grading throughput (submissions/s per core)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--submissions", type=int, default=200)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1, help="Pool size"
+        )
+
+    def handle(self, *args, **options):
+        submissions = options["submissions"]
+        workers = options["workers"]
+        if min(submissions, workers) < 1:
+            raise CommandError("--submissions and --workers must be >= 1")
+
+        challenge = Challenge(pk=0, expected_output="notes.txt")
+        started = time.perf_counter()
+        pool = sandbox.SandboxPool(
+            workers, max_queue=submissions, limits=sandbox.limits_from_settings()
+        )
+        startup = time.perf_counter() - started
+        try:
+            started = time.perf_counter()
+            futures = [pool.submit(SNIPPET) for _ in range(submissions)]
+            results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+            stats = pool.stats()
+        finally:
+            pool.shutdown()
+
+        correct = sum(grading.evaluate(challenge, r.stdout) for r in results)
+        durations = sorted(r.duration * 1000 for r in results)
+        quantiles = statistics.quantiles(durations, n=100) if len(results) > 1 else []
+        rate = submissions / elapsed
+        self.stdout.write(f"pool of {workers} workers started in {startup:.2f}s")
+        self.stdout.write(
+            f"{submissions} submissions in {elapsed:.2f}s: {rate:.1f}/s, "
+            f"{rate / workers:.1f}/s per core"
+        )
+        if quantiles:
+            self.stdout.write(
+                f"run latency ms: p50 {quantiles[49]:.1f}, p95 {quantiles[94]:.1f}, "
+                f"max {durations[-1]:.1f}"
+            )
+        self.stdout.write(
+            f"timeouts {stats['timeouts']}, rejected {stats['rejected']}, "
+            f"graded correct {correct}/{submissions}"
+        )
+        if correct != submissions:
+            raise CommandError("Some sandbox runs produced unexpected output.")
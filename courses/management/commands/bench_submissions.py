@@ -0,0 +1,127 @@
+"""
+Management command to benchmark concurrent challenge submissions.
+
+Creates a throwaway course and learners, fires parallel submitters at the
+attempt_challenge view and verifies that no XP or attempt numbers were lost.
+Everything it creates is deleted afterwards.
+"""
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import reverse
+
+from courses.models import Challenge, Course, Enrollment, Module, UserChallengeAttempt
+
+User = get_user_model()
+
+POINTS = 10
+
+
+class Command(BaseCommand):
+    help = "Fire parallel submitters at attempt_challenge and check XP totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--submitters", type=int, default=8)
+        parser.add_argument("--attempts", type=int, default=25)
+        parser.add_argument(
+            "--learners",
+            type=int,
+            default=2,
+            help="Learners shared by the submitters; fewer learners means more contention",
+        )
+
+    def handle(self, *args, **options):
+        submitters = options["submitters"]
+        attempts = options["attempts"]
+        learner_count = min(options["learners"], submitters)
+        if min(submitters, attempts, learner_count) < 1:
+            raise CommandError("--submitters, --attempts and --learners must be >= 1")
+        if connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING(
+                    "SQLite serializes writers; numbers are not representative."
+                )
+            )
+
+        tag = uuid.uuid4().hex[:8]
+        course = Course.objects.create(title=f"Bench {tag}", slug=f"bench-{tag}")
+        module = Module.objects.create(course=course, title="Bench", points=POINTS)
+        challenge = Challenge.objects.create(
+            module=module, prompt="echo ok", expected_output="ok"
+        )
+        learners = [
+            User.objects.create_user(username=f"bench-{tag}-{i}")
+            for i in range(learner_count)
+        ]
+        Enrollment.objects.bulk_create(
+            Enrollment(user=learner, course=course) for learner in learners
+        )
+        url = reverse("courses:attempt_challenge", args=[challenge.pk])
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "localhost"
+
+        def submitter(index):
+            client = Client(HTTP_HOST=host)
+            client.force_login(learners[index % learner_count])
+            correct = 0
+            try:
+                for n in range(attempts):
+                    # Every third answer is wrong to exercise the streak reset path.
+                    answer = "nope" if n % 3 == 2 else "ok"
+                    response = client.post(url, {"answer": answer, "time_seconds": 1})
+                    if response.status_code != 302:
+                        raise CommandError(f"Unexpected status {response.status_code}")
+                    correct += answer == "ok"
+            finally:
+                connection.close()
+            return index % learner_count, correct
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=submitters) as pool:
+                results = list(pool.map(submitter, range(submitters)))
+            elapsed = time.perf_counter() - started
+            self._report(course, learners, results, submitters * attempts, elapsed)
+        finally:
+            course.delete()
+            User.objects.filter(pk__in=[learner.pk for learner in learners]).delete()
+
+    def _report(self, course, learners, results, total, elapsed):
+        expected_xp = {learner.pk: 0 for learner in learners}
+        for learner_index, correct in results:
+            expected_xp[learners[learner_index].pk] += correct * POINTS
+        actual_xp = dict(
+            Enrollment.objects.filter(course=course).values_list("user_id", "xp")
+        )
+        numbering = (
+            UserChallengeAttempt.objects.filter(challenge__module__course=course)
+            .values("user_id")
+            .annotate(n=Count("id"), last=Max("attempt_no"))
+        )
+
+        self.stdout.write(
+            f"{total} submissions in {elapsed:.2f}s "
+            f"({total / elapsed:.1f} submissions/s)"
+        )
+        problems = [
+            f"user {user_id}: expected {xp} XP, got {actual_xp.get(user_id)}"
+            for user_id, xp in expected_xp.items()
+            if actual_xp.get(user_id) != xp
+        ]
+        problems += [
+            f"user {row['user_id']}: {row['n']} attempts numbered up to {row['last']}"
+            for row in numbering
+            if row["n"] != row["last"]
+        ]
+        if problems:
+            raise CommandError("Lost updates detected:\n" + "\n".join(problems))
+        self.stdout.write(
+            self.style.SUCCESS("XP totals and attempt numbers consistent.")
+        )
@@ -0,0 +1,38 @@
+"""
+Management command to export a course with its modules and challenges.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import bundles
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Export a course bundle as JSON or YAML"
+
+    def add_arguments(self, parser):
+        parser.add_argument("slug")
+        parser.add_argument("-o", "--output", help="File to write (default: stdout)")
+        parser.add_argument("--format", choices=["json", "yaml"])
+
+    def handle(self, *args, **options):
+        course = Course.objects.filter(slug=options["slug"]).first()
+        if course is None:
+            raise CommandError(f"No course with slug '{options['slug']}'.")
+        output = options["output"]
+        fmt = options["format"] or (
+            "yaml" if output and output.endswith((".yaml", ".yml")) else "json"
+        )
+        try:
+            text = bundles.dump(bundles.export_bundle(course), fmt)
+        except bundles.BundleError as exc:
+            raise CommandError(str(exc))
+        if output:
+            with open(output, "w", encoding="utf-8") as out:
+                out.write(text)
+            self.stdout.write(
+                self.style.SUCCESS(f"Exported {course.slug} to {output}.")
+            )
+        else:
+            self.stdout.write(text, ending="")
@@ -0,0 +1,47 @@
+"""
+Management command to stream per-learner progress to CSV or JSON Lines.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import reports
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Export per-learner progress of one or more courses"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "slugs", nargs="*", metavar="SLUG", help="Courses to export (default: all)"
+        )
+        parser.add_argument("-o", "--output", help="File to write (default: stdout)")
+        parser.add_argument("--format", choices=sorted(reports.FORMATS))
+        parser.add_argument("--chunk-size", type=int, default=reports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options["slugs"]:
+            courses = courses.filter(slug__in=options["slugs"])
+            missing = set(options["slugs"]) - set(
+                courses.values_list("slug", flat=True)
+            )
+            if missing:
+                raise CommandError(f"No course with slug {', '.join(sorted(missing))}.")
+        output = options["output"]
+        fmt = options["format"] or (
+            "jsonl" if output and output.endswith((".jsonl", ".ndjson")) else "csv"
+        )
+        lines = reports.lines(
+            list(courses.values_list("pk", flat=True)), fmt, options["chunk_size"]
+        )
+        if not output:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        count = -1 if fmt == "csv" else 0
+        with open(output, "w", encoding="utf-8", newline="") as out:
+            for line in lines:
+                out.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} row(s) to {output}."))
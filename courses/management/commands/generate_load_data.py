@@ -0,0 +1,373 @@
+"""
+Management command to generate a large, reproducible synthetic dataset.
+
+Creates courses, modules and challenges, then users who enroll with a skewed
+course popularity and make a Pareto-distributed number of attempts (a few
+power users, a long tail of occasional learners) that progress through each
+course in order. Progress counters, XP, profile totals, leaderboards and
+challenge stats match the attempt log.
+
+Everything derives from --seed, and timestamps are anchored to --end-date,
+so the same arguments always produce the same rows. Attempts are written
+with PostgreSQL COPY (batched INSERTs elsewhere). All users share one
+pre-hashed password. Run rollup_attempts afterwards to fill the rollups.
+"""
+
+import csv
+import io
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import Profile
+from courses import activity, challenge_stats, leaderboard, structure
+from courses.models import (
+    Challenge,
+    ChallengeProgress,
+    Course,
+    Enrollment,
+    Module,
+    ModuleProgress,
+    UserChallengeAttempt,
+)
+from courses.progress import percent_complete
+
+User = get_user_model()
+
+ATTEMPT_COLUMNS = (
+    "user_id",
+    "challenge_id",
+    "is_correct",
+    "submitted_at",
+    "attempt_no",
+    "time_seconds",
+)
+
+
+class Command(BaseCommand):
+    help = "Generate courses, users and attempts in bulk for capacity planning"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=200)
+        parser.add_argument("--modules", type=int, default=8, help="Per course")
+        parser.add_argument("--challenges", type=int, default=5, help="Per module")
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--attempts", type=int, default=10_000_000)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of course popularity",
+        )
+        parser.add_argument(
+            "--activity-alpha",
+            type=float,
+            default=1.3,
+            help="Pareto shape of attempts per user; lower is more skewed",
+        )
+        parser.add_argument("--accuracy", type=float, default=0.6)
+        parser.add_argument("--days", type=int, default=180, help="History span")
+        parser.add_argument(
+            "--end-date",
+            type=date.fromisoformat,
+            help="Last day of the generated history (YYYY-MM-DD, default today)",
+        )
+        parser.add_argument("--user-batch", type=int, default=2000)
+        parser.add_argument("--password", default="loadtest-password")
+        parser.add_argument(
+            "--purge",
+            action="store_true",
+            help="Delete data generated earlier with the same seed first",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["courses"], options["modules"], options["challenges"]) < 1:
+            raise CommandError("--courses, --modules and --challenges must be >= 1")
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.prefix = f"load{options['seed']}"
+        self.end = datetime.combine(
+            options["end_date"] or timezone.localdate(),
+            datetime.min.time(),
+            tzinfo=dt_timezone.utc,
+        )
+        self.use_copy = connection.vendor == "postgresql"
+        if options["purge"]:
+            self._purge()
+        elif Course.objects.filter(slug__startswith=f"{self.prefix}-").exists():
+            raise CommandError(f"Seed {options['seed']} already generated; use --purge")
+
+        started = time.perf_counter()
+        courses = self._create_catalog()
+        budgets = self._attempt_budgets()
+        popularity = [1 / (rank + 1) ** options["skew"] for rank in range(len(courses))]
+        password = make_password(options["password"])  # hashed once for all users
+
+        written = 0
+        for first in range(0, options["users"], options["user_batch"]):
+            last = min(first + options["user_batch"], options["users"])
+            with transaction.atomic():
+                written += self._create_learners(
+                    range(first, last), courses, popularity, budgets, password
+                )
+            self.stdout.write(f"{last} users, {written} attempts")
+
+        course_ids = [course["id"] for course in courses]
+        leaderboard.rebuild(course_ids)
+        challenge_stats.rebuild(
+            Challenge.objects.filter(module__course_id__in=course_ids)
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(courses)} courses, {options['users']} users and "
+                f"{written} attempts in {time.perf_counter() - started:.0f}s. "
+                "Run rollup_attempts next."
+            )
+        )
+
+    def _purge(self):
+        users = User.objects.filter(username__startswith=f"{self.prefix}-")
+        UserChallengeAttempt.objects.filter(user__in=users).delete()
+        users.delete()
+        Course.objects.filter(slug__startswith=f"{self.prefix}-").delete()
+        structure.bump_generation()
+
+    def _create_catalog(self):
+        options = self.options
+        with transaction.atomic():
+            courses = Course.objects.bulk_create(
+                Course(
+                    title=f"Load course {self.prefix} {i}",
+                    slug=f"{self.prefix}-{i}",
+                    description="Generated by generate_load_data.",
+                )
+                for i in range(options["courses"])
+            )
+            modules = Module.objects.bulk_create(
+                Module(
+                    course=course,
+                    title=f"Module {order}",
+                    order=order,
+                    points=10 * order,
+                )
+                for course in courses
+                for order in range(1, options["modules"] + 1)
+            )
+            challenges = Challenge.objects.bulk_create(
+                Challenge(
+                    module=module,
+                    title=f"Challenge {module.order}.{n}",
+                    prompt=f"Type answer {module.order}.{n}",
+                    expected_output=f"answer {module.order}.{n}",
+                )
+                for module in modules
+                for n in range(1, options["challenges"] + 1)
+            )
+        # bulk_create skips the signals that invalidate the structure snapshot
+        structure.bump_generation()
+
+        plans = {
+            course.id: {"id": course.id, "challenges": [], "module_sizes": {}}
+            for course in courses
+        }
+        for challenge in challenges:
+            module = challenge.module
+            plan = plans[module.course_id]
+            plan["challenges"].append((challenge.id, module.id, module.points))
+            plan["module_sizes"][module.id] = plan["module_sizes"].get(module.id, 0) + 1
+        return list(plans.values())
+
+    def _attempt_budgets(self):
+        weights = [
+            self.rng.paretovariate(self.options["activity_alpha"])
+            for _ in range(self.options["users"])
+        ]
+        scale = self.options["attempts"] / sum(weights) if weights else 0
+        return [int(weight * scale) for weight in weights]
+
+    def _create_learners(self, indexes, courses, popularity, budgets, password):
+        users, profiles, plans = [], [], []
+        for i in indexes:
+            user = User(
+                id=uuid.UUID(int=self.rng.getrandbits(128), version=4),
+                username=f"{self.prefix}-{i}",
+                email=f"{self.prefix}-{i}@example.com",
+                password=password,
+            )
+            users.append(user)
+            enrolled = {
+                course["id"]: course
+                for course in self.rng.choices(
+                    courses, weights=popularity, k=self.rng.randint(1, 3)
+                )
+            }
+            share = budgets[i] // len(enrolled)
+            profile = Profile(user=user, display_name=user.username)
+            for course in enrolled.values():
+                plan = self._simulate(course, share)
+                plan["enrollment"].user = user
+                self._add_to_profile(profile, plan)
+                plans.append(plan)
+            profiles.append(profile)
+
+        User.objects.bulk_create(users)
+        Profile.objects.bulk_create(profiles)
+        Enrollment.objects.bulk_create(plan["enrollment"] for plan in plans)
+        for plan in plans:
+            for row in plan["challenge_progress"] + plan["module_progress"]:
+                row.enrollment = plan["enrollment"]
+        ChallengeProgress.objects.bulk_create(
+            row for plan in plans for row in plan["challenge_progress"]
+        )
+        ModuleProgress.objects.bulk_create(
+            row for plan in plans for row in plan["module_progress"]
+        )
+        attempts = [
+            (plan["enrollment"].user_id, *attempt)
+            for plan in plans
+            for attempt in plan["attempts"]
+        ]
+        self._write_attempts(attempts)
+        return len(attempts)
+
+    def _add_to_profile(self, profile, plan):
+        enrollment = plan["enrollment"]
+        profile.xp += enrollment.xp
+        profile.completed_challenges += sum(
+            row.is_solved for row in plan["challenge_progress"]
+        )
+        profile.activity = activity.from_days(
+            (timezone.localdate(attempt[2]) for attempt in plan["attempts"]),
+            profile.activity,
+        )
+        profile.current_streak = activity.Activity.as_of_last_day(
+            profile.activity
+        ).current_streak
+        if plan["attempts"]:
+            last = plan["attempts"][-1][2]
+            profile.last_active = max(filter(None, (profile.last_active, last)))
+
+    def _simulate(self, course, budget):
+        """Walk one learner through ``course`` in order for ``budget`` attempts."""
+        rng = self.rng
+        order = course["challenges"]
+        span = timedelta(days=self.options["days"])
+        moment = self.end - span * rng.random()
+        gap = (self.end - moment) / max(budget, 1)
+        counts, solved_at = {}, {}
+        attempts = []
+        position = xp = streak = 0
+        for _ in range(budget):
+            if position < len(order):
+                challenge_id, module_id, points = order[position]
+            else:
+                # Course finished: keep practising random challenges
+                challenge_id, module_id, points = rng.choice(order)
+            correct = rng.random() < self.options["accuracy"]
+            counts[challenge_id] = counts.get(challenge_id, 0) + 1
+            moment += gap * rng.uniform(0.2, 1.8)
+            attempts.append(
+                (
+                    challenge_id,
+                    correct,
+                    min(moment, self.end),
+                    counts[challenge_id],
+                    int(rng.lognormvariate(3.5, 0.8)),
+                )
+            )
+            if correct:
+                xp += points
+                streak += 1
+                solved_at.setdefault(challenge_id, min(moment, self.end))
+                if position < len(order) and order[position][0] == challenge_id:
+                    position += 1
+            else:
+                streak = 0
+
+        solved_per_module = {}
+        module_of = {cid: mid for cid, mid, _ in order}
+        for challenge_id in solved_at:
+            module_id = module_of[challenge_id]
+            solved_per_module[module_id] = solved_per_module.get(module_id, 0) + 1
+        module_progress = [
+            ModuleProgress(
+                module_id=module_id,
+                solved_count=count,
+                is_complete=count == course["module_sizes"][module_id],
+            )
+            for module_id, count in solved_per_module.items()
+        ]
+        completed = sum(row.is_complete for row in module_progress)
+        return {
+            "enrollment": Enrollment(
+                course_id=course["id"],
+                xp=xp,
+                streak=streak,
+                completed_modules=completed,
+                progress=percent_complete(completed, len(course["module_sizes"])),
+            ),
+            "challenge_progress": [
+                ChallengeProgress(
+                    challenge_id=challenge_id,
+                    attempts=count,
+                    is_solved=challenge_id in solved_at,
+                    solved_at=solved_at.get(challenge_id),
+                )
+                for challenge_id, count in counts.items()
+            ],
+            "module_progress": module_progress,
+            "attempts": attempts,
+        }
+
+    def _write_attempts(self, rows):
+        if not rows:
+            return
+        table = UserChallengeAttempt._meta.db_table
+        if not self.use_copy:
+            # Plain INSERTs rather than bulk_create, which would overwrite the
+            # generated submitted_at with auto_now_add.
+            fields = [UserChallengeAttempt._meta.get_field(c) for c in ATTEMPT_COLUMNS]
+            sql = (
+                f"INSERT INTO {table} ({', '.join(ATTEMPT_COLUMNS)}) "
+                f"VALUES ({', '.join(['%s'] * len(fields))})"
+            )
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    sql,
+                    [
+                        [
+                            f.get_db_prep_value(v, connection)
+                            for f, v in zip(fields, row)
+                        ]
+                        for row in rows
+                    ],
+                )
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for user_id, challenge_id, correct, submitted_at, attempt_no, seconds in rows:
+            writer.writerow(
+                (
+                    user_id.hex,
+                    challenge_id,
+                    "t" if correct else "f",
+                    submitted_at.isoformat(),
+                    attempt_no,
+                    seconds,
+                )
+            )
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(ATTEMPT_COLUMNS)}) FROM STDIN WITH CSV",
+                buffer,
+            )
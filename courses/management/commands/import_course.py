@@ -0,0 +1,61 @@
+"""
+Management command to import a course bundle written by export_course.
+
+Only the differences from the stored course are written, in one transaction.
+Modules and challenges that learners have attempts or progress on are only
+deleted with --allow-delete; --dry-run shows how many learner rows would go.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import bundles
+
+
+class Command(BaseCommand):
+    help = "Create or update a course from a JSON or YAML bundle"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["json", "yaml"])
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Show the changes without saving"
+        )
+        parser.add_argument(
+            "--allow-delete",
+            action="store_true",
+            help="Delete modules and challenges even when learners have history",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            bundle = bundles.load(options["path"], options["format"])
+            result = bundles.import_bundle(
+                bundle,
+                dry_run=options["dry_run"],
+                allow_delete=options["allow_delete"],
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        prefix = "Would apply" if options["dry_run"] else "Applied"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix} to {bundle['slug']}: {result.summary()} "
+                f"({time.perf_counter() - started:.2f}s)."
+            )
+        )
+        if not options["dry_run"] and (
+            result.created["challenges"] or result.deleted["challenges"]
+        ):
+            self.stdout.write(
+                "Challenges were added or removed; run reconcile_progress "
+                f"--course {bundle['slug']} to refresh enrollment progress."
+            )
+        if not options["dry_run"] and any(result.history.values()):
+            self.stdout.write(
+                "Learner history was deleted; run reconcile_profiles to bring "
+                "profile totals back in line."
+            )
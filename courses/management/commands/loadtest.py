@@ -0,0 +1,378 @@
+"""
+Management command to load-test the learner journey over HTTP.
+
+Synthetic learners log in and repeatedly walk home -> course detail ->
+enroll -> learning center -> attempt challenge -> profile. Requests run
+in-process through the Django test client (the default, which also counts
+queries per request) or against a running server with --base-url.
+
+Unless --keep-users is given, the synthetic learners are deleted afterwards
+and their attempts taken back out of the rollups and challenge stats.
+
+Reports p50/p95/p99 latency, throughput and queries per request per
+endpoint, and can save the run as a JSON baseline and compare with one;
+--max-regression turns the comparison into a pass/fail check for CI.
+"""
+
+import json
+import math
+import os
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from courses import challenge_stats, rollups, structure
+from courses.models import Challenge, Enrollment, UserChallengeAttempt
+
+User = get_user_model()
+
+PASSWORD = "loadtest-password"
+JOURNEY = (
+    "home",
+    "courses:course_detail",
+    "courses:enroll",
+    "courses:learning_center",
+    "courses:attempt_challenge",
+    "profile",
+)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class InProcessSession:
+    """Drives the app through the test client and counts queries per request."""
+
+    def __init__(self, user):
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "localhost"
+        self.client = Client(HTTP_HOST=host)
+        self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            response = getattr(self.client, method)(path, data or {})
+        return response.status_code, queries
+
+    def close(self):
+        connection.close()
+
+
+class HttpSession:
+    """Drives a running server with a cookie jar, logging in through the form."""
+
+    def __init__(self, user, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect()
+        )
+        login = reverse("login")
+        self.request("get", login)
+        status, _ = self.request(
+            "post", login, {"username": user.username, "password": PASSWORD}
+        )
+        if status != 302:
+            raise CommandError(f"Login failed for {user.username} ({status})")
+
+    def _csrf_token(self):
+        return next((c.value for c in self.cookies if c.name == "csrftoken"), "")
+
+    def request(self, method, path, data=None):
+        url = self.base_url + path
+        body = None
+        headers = {"Referer": url}
+        if method == "post":
+            token = self._csrf_token()
+            body = urllib.parse.urlencode(
+                {**(data or {}), "csrfmiddlewaretoken": token}
+            ).encode()
+            headers["X-CSRFToken"] = token
+        request = urllib.request.Request(url, data=body, headers=headers)
+        try:
+            with self.opener.open(request, timeout=30) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as exc:
+            return exc.code, None
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Load-test the learner journey and report latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--journeys", type=int, default=5, help="Per user")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--accuracy", type=float, default=0.7, help="Share of correct answers"
+        )
+        parser.add_argument("--course", help="Only use the course with this slug")
+        parser.add_argument("--base-url", help="Target a running server instead")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the results as a JSON baseline")
+        parser.add_argument("--compare", help="Baseline JSON to compare against")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            help="Fail when an endpoint's p95 grows by more than this percent",
+        )
+        parser.add_argument(
+            "--keep-users", action="store_true", help="Do not delete synthetic users"
+        )
+
+    def handle(self, *args, **options):
+        if min(options["users"], options["journeys"], options["concurrency"]) < 1:
+            raise CommandError("--users, --journeys and --concurrency must be >= 1")
+        courses = self._courses(options["course"])
+        users = self._create_users(options["users"])
+        answers = dict(
+            Challenge.objects.filter(
+                module__course_id__in=[c.id for c in courses]
+            ).values_list("id", "expected_output")
+        )
+        samples = []
+        lock = threading.Lock()
+
+        def learner(index):
+            rng = random.Random(options["seed"] * 100003 + index)
+            if options["base_url"]:
+                session = HttpSession(users[index], options["base_url"])
+            else:
+                session = InProcessSession(users[index])
+            try:
+                for _ in range(options["journeys"]):
+                    course = rng.choice(courses)
+                    for sample in self._journey(
+                        session, users[index], course, answers, rng, options
+                    ):
+                        with lock:
+                            samples.append(sample)
+            finally:
+                session.close()
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                list(pool.map(learner, range(len(users))))
+            elapsed = time.perf_counter() - started
+        finally:
+            if not options["keep_users"]:
+                self._delete_users(users)
+
+        results = self._summarize(samples, elapsed, options)
+        self._print(results)
+        self._save_and_compare(results, options)
+
+    def _save_and_compare(self, results, options):
+        regressions = []
+        if options["compare"]:
+            regressions = self._compare(
+                results, options["compare"], options["max_regression"]
+            )
+        if options["output"]:
+            with open(options["output"], "w") as out:
+                json.dump(results, out, indent=2)
+            self.stdout.write(f"Baseline written to {options['output']}")
+        if regressions:
+            raise CommandError(
+                f"p95 regressed by more than {options['max_regression']:g}%: "
+                + ", ".join(regressions)
+            )
+
+    def _courses(self, slug):
+        courses = [
+            c
+            for c in structure.catalog().courses
+            if c.is_active and c.challenge_ids and slug in (None, c.slug)
+        ]
+        if not courses:
+            raise CommandError("No course with challenges; run seed_courses first.")
+        return courses
+
+    def _create_users(self, count):
+        tag = uuid.uuid4().hex[:8]
+        password = make_password(PASSWORD)  # hashed once for every user
+        users = User.objects.bulk_create(
+            User(username=f"loadtest-{tag}-{i}", password=password)
+            for i in range(count)
+        )
+        Profile.objects.bulk_create(
+            Profile(user=user, display_name=user.username) for user in users
+        )
+        return users
+
+    def _delete_users(self, users):
+        """Delete the synthetic learners and their share of the challenge stats."""
+        attempts = UserChallengeAttempt.objects.filter(user__in=users)
+        challenge_ids = set(attempts.values_list("challenge_id", flat=True))
+        with transaction.atomic():
+            rollups.delete_attempts(attempts)
+            User.objects.filter(pk__in=[u.pk for u in users]).delete()
+        challenge_stats.rebuild(Challenge.objects.filter(pk__in=challenge_ids))
+
+    def _journey(self, session, user, course, answers, rng, options):
+        def timed(name, method, path, data=None):
+            started = time.perf_counter()
+            status, queries = session.request(method, path, data)
+            return {
+                "endpoint": name,
+                "ms": (time.perf_counter() - started) * 1000,
+                "ok": status < 400,
+                "queries": queries,
+            }
+
+        yield timed("home", "get", reverse("home"))
+        yield timed(
+            "courses:course_detail",
+            "get",
+            reverse("courses:course_detail", args=[course.slug]),
+        )
+        yield timed(
+            "courses:enroll", "get", reverse("courses:enroll", args=[course.slug])
+        )
+        yield timed(
+            "courses:learning_center",
+            "get",
+            reverse("courses:learning_center", args=[course.slug]),
+        )
+        # The learning center page does not expose the challenge id, so take
+        # it from the learner's cursor (outside the timed requests).
+        challenge_id = (
+            Enrollment.objects.filter(user=user, course_id=course.id)
+            .values_list("next_challenge_id", flat=True)
+            .first()
+        ) or rng.choice(course.challenge_ids)
+        correct = rng.random() < options["accuracy"]
+        yield timed(
+            "courses:attempt_challenge",
+            "post",
+            reverse("courses:attempt_challenge", args=[challenge_id]),
+            {
+                "answer": answers[challenge_id] if correct else "not the answer",
+                "time_seconds": rng.randint(5, 120),
+            },
+        )
+        yield timed("profile", "get", reverse("profile"))
+
+    def _summarize(self, samples, elapsed, options):
+        endpoints = {}
+        for name in JOURNEY:
+            rows = [s for s in samples if s["endpoint"] == name]
+            latencies = sorted(s["ms"] for s in rows)
+            queries = [s["queries"] for s in rows if s["queries"] is not None]
+            endpoints[name] = {
+                "requests": len(rows),
+                "errors": sum(not s["ok"] for s in rows),
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+                "queries_per_request": (
+                    sum(queries) / len(queries) if queries else None
+                ),
+            }
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        journeys = options["users"] * options["journeys"]
+        return {
+            "commit": commit,
+            "created_at": timezone.now().isoformat(),
+            "mode": "http" if options["base_url"] else "in-process",
+            "database": connection.vendor,
+            "cpu_count": os.cpu_count(),
+            "config": {
+                key: options[key]
+                for key in ("users", "journeys", "concurrency", "accuracy", "seed")
+            },
+            "elapsed_s": elapsed,
+            "requests_per_s": len(samples) / elapsed,
+            "journeys_per_s": journeys / elapsed,
+            "endpoints": endpoints,
+        }
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{'endpoint':<28}{'reqs':>6}{'err':>5}{'p50 ms':>9}"
+            f"{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+        )
+        for name, row in results["endpoints"].items():
+            queries = row["queries_per_request"]
+            queries = "-" if queries is None else f"{queries:.1f}"
+            self.stdout.write(
+                f"{name:<28}{row['requests']:>6}{row['errors']:>5}"
+                f"{row['p50_ms'] or 0:>9.1f}{row['p95_ms'] or 0:>9.1f}"
+                f"{row['p99_ms'] or 0:>9.1f}"
+                f"{queries:>9}"
+            )
+        self.stdout.write(
+            f"{results['requests_per_s']:.1f} requests/s, "
+            f"{results['journeys_per_s']:.2f} journeys/s "
+            f"({results['mode']}, {results['database']}, "
+            f"concurrency {results['config']['concurrency']})"
+        )
+
+    def _compare(self, results, path, max_regression=None):
+        """Print the changes against a baseline; returns the regressed endpoints."""
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = []
+        self.stdout.write(f"Compared with {path} ({baseline.get('commit')}):")
+        for name, row in results["endpoints"].items():
+            before = baseline["endpoints"].get(name)
+            if not before or not before["p95_ms"] or row["p95_ms"] is None:
+                continue
+            change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            self.stdout.write(
+                f"  {name:<28} p95 {before['p95_ms']:.1f} -> "
+                f"{row['p95_ms']:.1f} ms ({change:+.0f}%)"
+            )
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+        change = (results["requests_per_s"] - baseline["requests_per_s"]) / baseline[
+            "requests_per_s"
+        ]
+        self.stdout.write(f"  throughput {change * 100:+.0f}%")
+        return regressions
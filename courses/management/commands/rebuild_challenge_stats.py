@@ -0,0 +1,24 @@
+"""
+Management command to backfill or repair the per-challenge statistics.
+"""
+
+from django.core.management.base import BaseCommand
+
+from courses import challenge_stats
+from courses.models import Challenge
+
+
+class Command(BaseCommand):
+    help = "Recompute ChallengeStats from the rollups, progress rows and attempt log"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--course", help="Only rebuild challenges of the course with this slug"
+        )
+
+    def handle(self, *args, **options):
+        challenges = Challenge.objects.all()
+        if options["course"]:
+            challenges = challenges.filter(module__course__slug=options["course"])
+        count = challenge_stats.rebuild(challenges)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats of {count} challenge(s)."))
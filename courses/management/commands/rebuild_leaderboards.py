@@ -0,0 +1,28 @@
+"""
+Management command to rebuild course leaderboards from Enrollment XP.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import leaderboard
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Rebuild leaderboard score buckets and cached top entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--course", help="Only rebuild the leaderboard of the course with this slug"
+        )
+
+    def handle(self, *args, **options):
+        course_ids = None
+        if options["course"]:
+            course = Course.objects.filter(slug=options["course"]).first()
+            if course is None:
+                raise CommandError(f"Course '{options['course']}' does not exist.")
+            course_ids = [course.pk]
+
+        buckets = leaderboard.rebuild(course_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} score bucket(s)."))
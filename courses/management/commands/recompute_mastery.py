@@ -0,0 +1,39 @@
+"""
+Management command to rebuild per-skill mastery from the attempt log.
+
+Run after changing the mastery model or a module's skill tags.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import mastery, structure
+
+
+class Command(BaseCommand):
+    help = "Recompute Enrollment.mastery by replaying the attempt log"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", help="Only recompute the course with this slug")
+        parser.add_argument("--batch-size", type=int, default=mastery.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        courses = [
+            course
+            for course in structure.catalog().courses
+            if options["course"] in (None, course.slug)
+        ]
+        if options["course"] and not courses:
+            raise CommandError(f"No course with slug '{options['course']}'.")
+
+        started = time.perf_counter()
+        count = 0
+        for course in courses:
+            count += mastery.recompute(course.id, options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed mastery for {count} enrollment(s) "
+                f"in {time.perf_counter() - started:.1f}s."
+            )
+        )
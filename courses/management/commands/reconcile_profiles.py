@@ -0,0 +1,27 @@
+"""
+Management command to repair drift in the write-through Profile totals.
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from courses import profile_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute Profile xp, completed challenges, streak and last activity"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only reconcile the user with this username")
+        parser.add_argument("--batch-size", type=int, default=profile_stats.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.all()
+        if options["user"]:
+            profiles = profiles.filter(user__username=options["user"])
+        repaired = profile_stats.rebuild(profiles, options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled {profiles.count()} profile(s), {repaired} repaired."
+            )
+        )
@@ -0,0 +1,35 @@
+"""
+Management command to rebuild incremental progress counters from the attempt log.
+"""
+
+from django.core.management.base import BaseCommand
+
+from courses.models import Enrollment
+from courses.progress import course_module_challenges, rebuild_progress
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-enrollment progress counters from UserChallengeAttempt"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--course", help="Only reconcile enrollments of the course with this slug"
+        )
+
+    def handle(self, *args, **options):
+        enrollments = Enrollment.objects.order_by("course_id", "pk")
+        if options["course"]:
+            enrollments = enrollments.filter(course__slug=options["course"])
+
+        # Course structure is loaded once per course, not once per enrollment
+        structures = {}
+        count = 0
+        for enrollment in enrollments.iterator():
+            if enrollment.course_id not in structures:
+                structures[enrollment.course_id] = course_module_challenges(
+                    enrollment.course_id
+                )
+            rebuild_progress(enrollment, structures[enrollment.course_id])
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {count} enrollment(s)."))
@@ -0,0 +1,26 @@
+"""
+Management command to fold new attempts into the daily rollup tables.
+
+Safe to run often (e.g. every few minutes from cron); each run only reads
+attempts above the stored high-water mark.
+"""
+
+from django.core.management.base import BaseCommand
+
+from courses import rollups
+
+
+class Command(BaseCommand):
+    help = "Roll up UserChallengeAttempt rows above the high-water mark"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=rollups.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        count = rollups.roll_up(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rolled up {count} attempt(s); "
+                f"high-water mark {rollups.high_water_mark()}."
+            )
+        )
@@ -0,0 +1,52 @@
+"""
+Management command to process queued grading jobs.
+
+Claims pending jobs in batches with SELECT ... FOR UPDATE SKIP LOCKED, so
+several workers (on one or many hosts) can run side by side. Stops cleanly
+on SIGINT/SIGTERM after the current batch.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from courses import jobs
+
+
+class Command(BaseCommand):
+    help = "Grade queued submissions (GradingJob) until stopped"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument(
+            "--idle-sleep",
+            type=float,
+            default=0.5,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain the queue once and exit"
+        )
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        processed = 0
+        while self.running:
+            close_old_connections()
+            jobs.requeue_expired()
+            claimed = jobs.run_once(options["batch_size"])
+            processed += claimed
+            if not claimed:
+                if options["once"]:
+                    break
+                time.sleep(options["idle_sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)."))
+
+    def _stop(self, signum, frame):
+        self.running = False
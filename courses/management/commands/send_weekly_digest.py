@@ -0,0 +1,36 @@
+"""
+Management command to queue the weekly progress digest for every learner.
+"""
+
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from courses import digest
+
+
+class Command(BaseCommand):
+    help = "Render weekly digests and queue them in the email outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--week-ending",
+            help="Last day of the week to report, YYYY-MM-DD (default: now)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=digest.CHUNK_SIZE)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Render without queueing"
+        )
+
+    def handle(self, *args, **options):
+        end = timezone.now()
+        if options["week_ending"]:
+            try:
+                day = datetime.strptime(options["week_ending"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--week-ending must be YYYY-MM-DD.")
+            end = timezone.make_aware(datetime.combine(day, time.max))
+        count = digest.queue(end, options["chunk_size"], options["dry_run"])
+        verb = "Rendered" if options["dry_run"] else "Queued"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {count} digest(s)."))
@@ -0,0 +1,187 @@
+# courses/mastery.py
+"""Per-skill mastery estimates.
+
+Each enrollment keeps an Elo-style rating per skill in ``Enrollment.mastery``.
+A module's skills are the ``topics`` in its ``skill_tags``; an attempt at one
+of its challenges moves every one of those ratings towards the outcome:
+
+    p = 1 / (1 + exp(difficulty - rating))
+    rating += K * (correct - p)
+
+``record_attempt`` applies one attempt on the submission path. ``recompute``
+replays the attempt log of a whole course with NumPy, advancing all
+(learner, skill) ratings that are at the same step of their history in one
+vectorized update, so that it produces the same ratings as the incremental
+path after the model or the skill tags change.
+"""
+
+import math
+
+from django.db import transaction
+
+import numpy as np
+
+from . import structure
+from .models import Challenge, Enrollment, UserChallengeAttempt
+
+K = 0.4
+DIFFICULTY = {"easy": -1.0, "medium": 0.0, "hard": 1.0}
+BATCH_SIZE = 1000
+
+
+def skills(module):
+    """Skill names of a module (or ``ModuleSnapshot``) from its ``skill_tags``."""
+    tags = module.skill_tags or {}
+    return tuple(dict.fromkeys(tags.get("topics") or ()))
+
+
+def difficulty(challenge):
+    return DIFFICULTY.get(challenge.difficulty, 0.0)
+
+
+def probability(rating, challenge_difficulty=0.0):
+    """Expected chance of a correct answer at ``rating``."""
+    return 1 / (1 + math.exp(challenge_difficulty - rating))
+
+
+def update(mastery, skill_names, challenge_difficulty, is_correct):
+    """Return ``mastery`` with one attempt applied to ``skill_names``."""
+    mastery = dict(mastery)
+    for skill in skill_names:
+        rating = mastery.get(skill, 0.0)
+        expected = probability(rating, challenge_difficulty)
+        mastery[skill] = rating + K * (float(is_correct) - expected)
+    return mastery
+
+
+def record_attempt(enrollment, challenge, is_correct):
+    """Apply an attempt to the enrollment's mastery.
+
+    Must be called inside the submission transaction after the enrollment row
+    was updated, so that concurrent attempts are serialized on its row lock.
+    """
+    course = structure.get_course(pk=enrollment.course_id)
+    module = course and course.module_by_challenge.get(challenge.id)
+    skill_names = skills(module) if module else ()
+    if not skill_names:
+        return enrollment.mastery
+    row = Enrollment.objects.filter(pk=enrollment.pk)
+    enrollment.mastery = update(
+        row.values_list("mastery", flat=True).get(),
+        skill_names,
+        difficulty(challenge),
+        is_correct,
+    )
+    row.update(mastery=enrollment.mastery)
+    return enrollment.mastery
+
+
+def _attempt_matrix(course, enrollments):
+    """One row per (attempt, skill) in log order: learner, skill, b, outcome."""
+    learner_of = {e.user_id: i for i, e in enumerate(enrollments)}
+    challenge_skills = {
+        challenge_id: skills(module)
+        for challenge_id, module in course.module_by_challenge.items()
+    }
+    names = sorted({s for names in challenge_skills.values() for s in names})
+    skill_index = {name: i for i, name in enumerate(names)}
+    difficulties = {
+        pk: DIFFICULTY.get(level, 0.0)
+        for pk, level in Challenge.objects.filter(
+            module__course_id=course.id
+        ).values_list("pk", "difficulty")
+    }
+    learners, skill_ids, levels, outcomes = [], [], [], []
+    attempts = (
+        UserChallengeAttempt.objects.filter(
+            challenge__module__course_id=course.id, user_id__in=learner_of
+        )
+        .order_by("id")
+        .values_list("user_id", "challenge_id", "is_correct")
+    )
+    for user_id, challenge_id, is_correct in attempts.iterator():
+        for skill in challenge_skills.get(challenge_id, ()):
+            learners.append(learner_of[user_id])
+            skill_ids.append(skill_index[skill])
+            levels.append(difficulties.get(challenge_id, 0.0))
+            outcomes.append(is_correct)
+    return (
+        names,
+        np.array(learners, dtype=np.int64),
+        np.array(skill_ids, dtype=np.int64),
+        np.array(levels, dtype=np.float64),
+        np.array(outcomes, dtype=np.float64),
+    )
+
+
+def replay(learners, skill_ids, levels, outcomes, shape):
+    """Ratings after replaying the events in order, as a (learners, skills) array.
+
+    Events are grouped by their position in each (learner, skill) history;
+    every group touches each cell at most once and is applied in one step.
+    """
+    ratings = np.zeros(shape)
+    seen = np.zeros(shape, dtype=bool)
+    if not len(learners):
+        return ratings, seen
+    cell = learners * shape[1] + skill_ids
+    order = np.argsort(cell, kind="stable")
+    sorted_cells = cell[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_cells)) + 1]
+    lengths = np.diff(np.r_[starts, len(cell)])
+    step = np.empty(len(cell), dtype=np.int64)
+    step[order] = np.arange(len(cell)) - np.repeat(starts, lengths)
+
+    flat = ratings.reshape(-1)
+    by_step = np.argsort(step, kind="stable")
+    bounds = np.r_[0, np.cumsum(np.bincount(step))]
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        events = by_step[first:last]
+        cells = cell[events]
+        expected = 1 / (1 + np.exp(levels[events] - flat[cells]))
+        flat[cells] += K * (outcomes[events] - expected)
+    seen.reshape(-1)[cell] = True
+    return ratings, seen
+
+
+def _recompute_batch(course, pks):
+    with transaction.atomic():
+        # Locked like on the submission path, so no attempt lands in between
+        # reading the log and writing the ratings.
+        enrollments = list(
+            Enrollment.objects.select_for_update().filter(pk__in=pks).order_by("pk")
+        )
+        names, learners, skill_ids, levels, outcomes = _attempt_matrix(
+            course, enrollments
+        )
+        ratings, seen = replay(
+            learners, skill_ids, levels, outcomes, (len(enrollments), len(names))
+        )
+        for i, enrollment in enumerate(enrollments):
+            enrollment.mastery = {
+                name: float(ratings[i, j]) for j, name in enumerate(names) if seen[i, j]
+            }
+        Enrollment.objects.bulk_update(enrollments, ["mastery"])
+    return len(enrollments)
+
+
+def recompute(course_id, batch_size=BATCH_SIZE):
+    """Rebuild ``Enrollment.mastery`` for every enrollment of a course.
+
+    Enrollments are processed ``batch_size`` at a time, each batch in its own
+    transaction. Only attempts still in the log count; archived attempts are
+    not replayed. Returns the number of enrollments written.
+    """
+    course = structure.get_course(pk=course_id)
+    if course is None:
+        return 0
+    pks = list(
+        Enrollment.objects.filter(course_id=course_id)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    count = 0
+    for first in range(0, len(pks), batch_size):
+        last = first + batch_size
+        count += _recompute_batch(course, pks[first:last])
+    return count
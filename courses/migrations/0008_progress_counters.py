@@ -0,0 +1,86 @@
+# Generated by Django 5.0 on 2026-10-17 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0007_alter_enrollment_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="completed_modules",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="ChallengeProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_solved", models.BooleanField(default=False)),
+                ("solved_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "challenge",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="courses.challenge",
+                    ),
+                ),
+                (
+                    "enrollment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="challenge_progress",
+                        to="courses.enrollment",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("enrollment", "challenge")},
+            },
+        ),
+        migrations.CreateModel(
+            name="ModuleProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("solved_count", models.PositiveIntegerField(default=0)),
+                ("is_complete", models.BooleanField(default=False)),
+                (
+                    "enrollment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="module_progress",
+                        to="courses.enrollment",
+                    ),
+                ),
+                (
+                    "module",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="courses.module"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("enrollment", "module")},
+            },
+        ),
+    ]
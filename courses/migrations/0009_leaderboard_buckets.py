@@ -0,0 +1,66 @@
+# Generated by Django 5.0 on 2026-10-17 06:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_buckets(apps, schema_editor):
+    Enrollment = apps.get_model("courses", "Enrollment")
+    LeaderboardBucket = apps.get_model("courses", "LeaderboardBucket")
+    rows = (
+        Enrollment.objects.filter(xp__gt=0)
+        .values("course_id", "xp")
+        .annotate(learners=models.Count("id"))
+        .order_by()
+    )
+    LeaderboardBucket.objects.bulk_create(
+        LeaderboardBucket(**row) for row in rows.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0008_progress_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("xp", models.PositiveIntegerField()),
+                ("learners", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["course", "-xp"], name="enrollment_course_xp_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="leaderboardbucket",
+            name="course",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="leaderboard_buckets",
+                to="courses.course",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="leaderboardbucket",
+            unique_together={("course", "xp")},
+        ),
+        migrations.RunPython(fill_buckets, migrations.RunPython.noop),
+    ]
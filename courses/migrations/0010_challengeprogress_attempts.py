@@ -0,0 +1,62 @@
+# Generated by Django 5.0 on 2026-10-17 06:07
+
+from django.db import migrations, models
+
+
+def renumber_duplicate_attempts(apps, schema_editor):
+    """Give every (user, challenge) pair a gap-free 1..n attempt_no sequence.
+
+    The old count()-then-insert allocation could hand the same number to
+    concurrent submissions; the unique constraint added next needs them gone.
+    """
+    UserChallengeAttempt = apps.get_model("courses", "UserChallengeAttempt")
+    duplicated = (
+        UserChallengeAttempt.objects.values("user_id", "challenge_id", "attempt_no")
+        .annotate(n=models.Count("id"))
+        .filter(n__gt=1)
+        .values_list("user_id", "challenge_id")
+        .distinct()
+        .order_by()
+    )
+    for user_id, challenge_id in list(duplicated):
+        attempts = list(
+            UserChallengeAttempt.objects.filter(
+                user_id=user_id, challenge_id=challenge_id
+            ).order_by("submitted_at", "id")
+        )
+        for number, attempt in enumerate(attempts, start=1):
+            attempt.attempt_no = number
+        UserChallengeAttempt.objects.bulk_update(attempts, ["attempt_no"])
+
+
+def fill_attempt_counters(apps, schema_editor):
+    ChallengeProgress = apps.get_model("courses", "ChallengeProgress")
+    UserChallengeAttempt = apps.get_model("courses", "UserChallengeAttempt")
+    last_attempt = (
+        UserChallengeAttempt.objects.filter(
+            user__enrollments=models.OuterRef("enrollment_id"),
+            challenge_id=models.OuterRef("challenge_id"),
+        )
+        .order_by("-attempt_no")
+        .values("attempt_no")[:1]
+    )
+    ChallengeProgress.objects.update(
+        attempts=models.functions.Coalesce(models.Subquery(last_attempt), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_leaderboard_buckets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="challengeprogress",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(renumber_duplicate_attempts, migrations.RunPython.noop),
+        migrations.RunPython(fill_attempt_counters, migrations.RunPython.noop),
+    ]
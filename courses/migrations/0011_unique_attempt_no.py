@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-17 06:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0010_challengeprogress_attempts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="userchallengeattempt",
+            constraint=models.UniqueConstraint(
+                fields=("user", "challenge", "attempt_no"), name="unique_attempt_no"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-17 06:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0011_unique_attempt_no"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="current_module",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="courses.module",
+            ),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="cursor_generation",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="next_challenge",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="courses.challenge",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.0 on 2026-10-17 06:13
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def rule_hash(challenge):
+    """Frozen copy of ``courses.grading.rule_hash`` as of this migration."""
+    rules = [
+        challenge.match_mode,
+        challenge.expected_output,
+        challenge.accepted_answers or [],
+        challenge.ignore_case,
+    ]
+    payload = json.dumps(rules, sort_keys=True, ensure_ascii=False).encode()
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def fill_rules_hash(apps, schema_editor):
+    Challenge = apps.get_model("courses", "Challenge")
+    challenges = list(Challenge.objects.all())
+    for challenge in challenges:
+        challenge.rules_hash = rule_hash(challenge)
+    Challenge.objects.bulk_update(challenges, ["rules_hash"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0012_enrollment_cursor"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="challenge",
+            name="accepted_answers",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="challenge",
+            name="ignore_case",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="challenge",
+            name="match_mode",
+            field=models.CharField(
+                choices=[
+                    ("exact", "Exact"),
+                    ("whitespace", "Normalized whitespace"),
+                    ("regex", "Regular expression"),
+                    ("tokens", "Token set (any order)"),
+                    ("any_of", "Any accepted answer"),
+                ],
+                default="exact",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="challenge",
+            name="rules_hash",
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.RunPython(fill_rules_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0 on 2026-10-17 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0013_challenge_match_rules"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="challenge",
+            name="grader",
+            field=models.CharField(
+                choices=[
+                    ("answer", "Compare the submitted text"),
+                    ("sandbox", "Run the submission and compare its output"),
+                ],
+                default="answer",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="challenge",
+            name="setup_script",
+            field=models.TextField(blank=True),
+        ),
+    ]
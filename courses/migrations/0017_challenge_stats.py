@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-17 06:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0016_attempt_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChallengeStats",
+            fields=[
+                (
+                    "challenge",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="courses.challenge",
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("correct", models.PositiveIntegerField(default=0)),
+                ("solvers", models.PositiveIntegerField(default=0)),
+                ("first_tries", models.PositiveIntegerField(default=0)),
+                ("first_try_correct", models.PositiveIntegerField(default=0)),
+                ("solve_time_sketch", models.JSONField(blank=True, default=dict)),
+                ("median_solve_seconds", models.FloatField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "challenge stats",
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.0 on 2026-10-17 06:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_last_progress_at(apps, schema_editor):
+    """Start from each enrollment's latest solve."""
+    Enrollment = apps.get_model("courses", "Enrollment")
+    ChallengeProgress = apps.get_model("courses", "ChallengeProgress")
+    latest = (
+        ChallengeProgress.objects.filter(
+            enrollment_id=models.OuterRef("pk"), is_solved=True
+        )
+        .order_by("-solved_at")
+        .values("solved_at")[:1]
+    )
+    Enrollment.objects.update(last_progress_at=models.Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0017_challenge_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="instructors",
+            field=models.ManyToManyField(
+                blank=True, related_name="taught_courses", to=settings.AUTH_USER_MODEL
+            ),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="consecutive_failures",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="failing_challenge",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="courses.challenge",
+            ),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="last_progress_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="streak_reset_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_last_progress_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0 on 2026-10-17 07:44
+
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    """The single row every worker reads; bumped in place from now on."""
+    StructureGeneration = apps.get_model("courses", "StructureGeneration")
+    StructureGeneration.objects.create(pk=1, value=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0018_coach_signals"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StructureGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 # courses/models.py
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 
 
 class Course(models.Model):
@@ -8,6 +9,9 @@ class Course(models.Model):
     slug = models.SlugField(unique=True)
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    instructors = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, blank=True, related_name="taught_courses"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -41,26 +45,144 @@ class Module(models.Model):
         return f"{self.course.title} — {self.title}"
 
 
+class ChallengeQuerySet(models.QuerySet):
+    """Keeps ``rules_hash`` current on the bulk writes that skip ``save()``."""
+
+    def _rehash(self, objs):
+        from .grading import rule_hash
+
+        for obj in objs:
+            obj.rules_hash = rule_hash(obj)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self._rehash(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if set(fields) & set(Challenge.RULE_FIELDS):
+            objs = list(objs)
+            self._rehash(objs)
+            fields = [*fields, "rules_hash"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if not kwargs.keys() & set(Challenge.RULE_FIELDS):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            # The filter may no longer match once the rule fields change
+            pks = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            changed = list(
+                self.model.objects.filter(pk__in=pks).only(*Challenge.RULE_FIELDS)
+            )
+            self._rehash(changed)
+            self.model.objects.bulk_update(changed, ["rules_hash"])
+        return rows
+
+
 class Challenge(models.Model):
+    MATCH_MODE_CHOICES = [
+        ("exact", "Exact"),
+        ("whitespace", "Normalized whitespace"),
+        ("regex", "Regular expression"),
+        ("tokens", "Token set (any order)"),
+        ("any_of", "Any accepted answer"),
+    ]
+    GRADER_CHOICES = [
+        ("answer", "Compare the submitted text"),
+        ("sandbox", "Run the submission and compare its output"),
+    ]
+    # Fields that change how answers are graded; see courses.grading
+    RULE_FIELDS = ("match_mode", "expected_output", "accepted_answers", "ignore_case")
+
     module = models.ForeignKey(
         Module, on_delete=models.CASCADE, related_name="challenges"
     )
     title = models.CharField(max_length=200, blank=True)
     prompt = models.TextField()
     expected_output = models.TextField()
+    match_mode = models.CharField(
+        max_length=20, choices=MATCH_MODE_CHOICES, default="exact"
+    )
+    accepted_answers = models.JSONField(default=list, blank=True)
+    ignore_case = models.BooleanField(default=False)
+    grader = models.CharField(max_length=20, choices=GRADER_CHOICES, default="answer")
+    # Shell run in the sandbox directory before the learner's snippet.
+    setup_script = models.TextField(blank=True)
+    rules_hash = models.CharField(max_length=16, blank=True, editable=False)
     difficulty = models.CharField(max_length=20, default="easy")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ChallengeQuerySet.as_manager()
+
     def __str__(self):
         return (self.title or f"Challenge for {self.module.title}")[:80]
 
+    def clean(self):
+        from .grading import InvalidRule, compile_matcher
+
+        try:
+            compile_matcher(self)
+        except InvalidRule as exc:
+            raise ValidationError({"expected_output": str(exc)})
+
+    def save(self, *args, **kwargs):
+        from .grading import rule_hash
+
+        self.rules_hash = rule_hash(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(self.RULE_FIELDS):
+            kwargs["update_fields"] = {*update_fields, "rules_hash"}
+        super().save(*args, **kwargs)
+
+    def _stat(self, name):
+        try:
+            return getattr(self.stats, name)
+        except ChallengeStats.DoesNotExist:
+            # Not backfilled yet (see rebuild_challenge_stats)
+            from .rollups import challenge_totals
+
+            return challenge_totals(self)[name]
+
     @property
     def total_attempts(self):
-        return self.userchallengeattempt_set.count()
+        return self._stat("attempts")
 
     @property
     def correct_attempts(self):
-        return self.userchallengeattempt_set.filter(is_correct=True).count()
+        return self._stat("correct")
+
+
+class ChallengeStats(models.Model):
+    """Running difficulty signals of a challenge, updated with every attempt."""
+
+    challenge = models.OneToOneField(
+        Challenge, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    solvers = models.PositiveIntegerField(default=0)
+    first_tries = models.PositiveIntegerField(default=0)
+    first_try_correct = models.PositiveIntegerField(default=0)
+    # P² sketch of the seconds learners spent until their first solve
+    solve_time_sketch = models.JSONField(default=dict, blank=True)
+    median_solve_seconds = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "challenge stats"
+
+    def __str__(self):
+        return f"Stats of challenge {self.challenge_id}"
+
+    @property
+    def success_rate(self):
+        return self.correct / self.attempts if self.attempts else None
+
+    @property
+    def first_try_rate(self):
+        return self.first_try_correct / self.first_tries if self.first_tries else None
 
 
 class Enrollment(models.Model):
@@ -73,33 +195,52 @@ class Enrollment(models.Model):
     enrolled_at = models.DateTimeField(auto_now_add=True)
 
     progress = models.PositiveIntegerField(default=0)
+    completed_modules = models.PositiveIntegerField(default=0)
     streak = models.PositiveIntegerField(default=0)
     xp = models.PositiveIntegerField(default=0)
 
     # Correct JSONField
     mastery = models.JSONField(default=dict, blank=True)
 
+    # Resumable cursor for the learning center, valid for one structure generation
+    current_module = models.ForeignKey(
+        Module, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    next_challenge = models.ForeignKey(
+        Challenge, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    cursor_generation = models.BigIntegerField(null=True, blank=True)
+
+    # "Stuck learner" signals for the coach dashboard, kept by submit_attempt
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    failing_challenge = models.ForeignKey(
+        Challenge, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    last_progress_at = models.DateTimeField(null=True, blank=True)
+    streak_reset_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         unique_together = ("user", "course")
         ordering = ("-enrolled_at",)
+        indexes = [
+            models.Index(fields=["course", "-xp"], name="enrollment_course_xp_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} → {self.course.title}"
 
+    # Optimized: read daily rollups plus the un-rolled tail, not the whole log
     @property
     def total_attempts(self):
-        return UserChallengeAttempt.objects.filter(
-            user=self.user, challenge__module__course=self.course
-        ).count()
+        from .rollups import enrollment_totals
+
+        return enrollment_totals(self)["attempts"]
 
     @property
     def total_minutes_spent(self):
-        total_seconds = (
-            UserChallengeAttempt.objects.filter(
-                user=self.user, challenge__module__course=self.course
-            ).aggregate(total=models.Sum("time_seconds"))["total"]
-            or 0
-        )
+        from .rollups import enrollment_totals
+
+        total_seconds = enrollment_totals(self)["time_seconds"]
         return int(total_seconds / 60)
 
 
@@ -114,6 +255,163 @@ class UserChallengeAttempt(models.Model):
 
     class Meta:
         ordering = ("-submitted_at",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "challenge", "attempt_no"], name="unique_attempt_no"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} attempt {self.attempt_no} on {self.challenge_id}"
+
+
+class ChallengeProgress(models.Model):
+    """Per-enrollment state for one challenge, kept in step with the attempt log."""
+
+    enrollment = models.ForeignKey(
+        Enrollment, on_delete=models.CASCADE, related_name="challenge_progress"
+    )
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
+    # Last attempt_no handed out; allocating from here avoids a COUNT per attempt.
+    attempts = models.PositiveIntegerField(default=0)
+    is_solved = models.BooleanField(default=False)
+    solved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("enrollment", "challenge")
+
+    def __str__(self):
+        return f"{self.enrollment} / {self.challenge_id}"
+
+
+class ModuleProgress(models.Model):
+    """Per-enrollment solved counter for one module."""
+
+    enrollment = models.ForeignKey(
+        Enrollment, on_delete=models.CASCADE, related_name="module_progress"
+    )
+    module = models.ForeignKey(Module, on_delete=models.CASCADE)
+    solved_count = models.PositiveIntegerField(default=0)
+    is_complete = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ("enrollment", "module")
+
+    def __str__(self):
+        return f"{self.enrollment} / {self.module_id}: {self.solved_count}"
+
+
+class LeaderboardBucket(models.Model):
+    """Number of learners in a course holding exactly ``xp`` points.
+
+    Ranks are derived from these buckets, so a rank lookup costs one row per
+    distinct score above the learner rather than one row per learner.
+    """
+
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="leaderboard_buckets"
+    )
+    xp = models.PositiveIntegerField()
+    learners = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("course", "xp")
+
+    def __str__(self):
+        return f"{self.course_id} @ {self.xp} XP: {self.learners}"
+
+
+class DailyEnrollmentRollup(models.Model):
+    """Attempt totals of one learner in one course for one day."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    day = models.DateField()
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    time_seconds = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "course", "day")
+
+    def __str__(self):
+        return f"{self.user_id} / {self.course_id} on {self.day}: {self.attempts}"
+
+
+class DailyChallengeRollup(models.Model):
+    """Attempt totals of one challenge for one day."""
+
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
+    day = models.DateField()
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    time_seconds = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("challenge", "day")
+
+    def __str__(self):
+        return f"{self.challenge_id} on {self.day}: {self.attempts}"
+
+
+class RollupCheckpoint(models.Model):
+    """High-water mark: attempts with ``id <= last_attempt_id`` are rolled up."""
+
+    name = models.CharField(max_length=50, unique=True)
+    last_attempt_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_attempt_id}"
+
+
+class StructureGeneration(models.Model):
+    """One-row counter of course structure changes; see ``courses.structure``."""
+
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"generation {self.value}"
+
+
+class GradingJob(models.Model):
+    """A submission waiting for (or done with) grading by ``run_grading_worker``."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    enrollment = models.ForeignKey(
+        Enrollment, on_delete=models.CASCADE, related_name="grading_jobs"
+    )
+    challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
+    answer = models.TextField()
+    time_seconds = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempt = models.OneToOneField(
+        UserChallengeAttempt, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    earned_xp = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="gradingjob_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
@@ -0,0 +1,75 @@
+# courses/paginators.py
+"""Paginator for admin changelists over very large tables.
+
+An exact ``COUNT(*)`` reads the whole table (or every row matching the
+filters) just to number the pages. On PostgreSQL, ``EstimatedCountPaginator``
+takes the row count from the planner's statistics instead: ``pg_class``
+for an unfiltered table and the ``EXPLAIN`` estimate for a filtered one.
+Small results, or ones the estimate puts under ``EXACT_BELOW``, are still
+counted exactly, as is everything on other databases.
+
+Estimates for filtered changelists can be far off. When a page past the real
+end comes back empty (or one past the estimated end is asked for), the rows
+are counted exactly and the page number is clamped to the last real page.
+"""
+
+import json
+
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+EXACT_BELOW = 10_000
+
+
+class EstimatedCountPaginator(Paginator):
+    # Whether count came from the planner, and whether to stop asking it
+    estimated = False
+    exact = False
+
+    @cached_property
+    def count(self):
+        estimate = None if self.exact else self._estimated_count()
+        if estimate is None or estimate < EXACT_BELOW:
+            return super().count
+        self.estimated = True
+        return estimate
+
+    def page(self, number):
+        try:
+            page = super().page(number)
+        except EmptyPage:
+            if not self.estimated:
+                raise
+        else:
+            if page.object_list or not self.estimated:
+                return page
+        # The estimate was wrong: count exactly, then serve the last real page
+        self.estimated, self.exact = False, True
+        for name in ("count", "num_pages"):
+            self.__dict__.pop(name, None)
+        return super().page(min(int(number), self.num_pages))
+
+    def _estimated_count(self):
+        queryset = self.object_list
+        connection = connections[getattr(queryset, "db", "default")]
+        if not hasattr(queryset, "query") or connection.vendor != "postgresql":
+            return None
+        return self._estimate(queryset, connection)
+
+    def _estimate(self, queryset, connection):
+        with connection.cursor() as cursor:
+            if not queryset.query.where and not queryset.query.distinct:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                # -1 until the table has been analyzed
+                return row[0] if row and row[0] >= 0 else None
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
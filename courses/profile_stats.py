@@ -0,0 +1,149 @@
+# courses/profile_stats.py
+"""Write-through learner totals on ``accounts.Profile``.
+
+``Profile.xp`` (sum of enrollment XP), ``completed_challenges`` (distinct
+challenges solved), ``last_active``, the day ``activity`` bitmap and
+``current_streak``, the day streak ending on the last active day (both see
+``activity``), are updated in the transaction of every attempt and enrollment
+change, so the profile page reads one row. ``rebuild`` recomputes them from
+enrollments, progress rows and the attempt log and repairs any drift.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+
+from accounts.models import Profile
+
+from . import activity
+from .models import ChallengeProgress, Enrollment, UserChallengeAttempt
+
+FIELDS = ("xp", "completed_challenges", "current_streak", "last_active", "activity")
+BATCH_SIZE = 1000
+
+
+def _per_user(queryset, user_field, aggregate):
+    return Subquery(
+        queryset.order_by().values(user_field).annotate(total=aggregate).values("total")
+    )
+
+
+def record_attempt(enrollment, earned_xp, first_solve):
+    """Apply one attempt; call inside the submission transaction."""
+    Profile.objects.filter(user_id=enrollment.user_id).update(
+        xp=F("xp") + earned_xp,
+        completed_challenges=F("completed_challenges") + int(first_solve),
+        current_streak=activity.streak_update(),
+        last_active=timezone.now(),
+        activity=activity.set_today(),
+    )
+
+
+def record_enrollment(enrollment):
+    Profile.objects.filter(user_id=enrollment.user_id).update(
+        last_active=timezone.now(),
+        # Invalidates the enrollment list cached by accounts.learner
+        context_version=F("context_version") + 1,
+    )
+
+
+def forget_enrollment(enrollment):
+    """Take an enrollment's XP and solves off the profile before it is deleted."""
+    solved = ChallengeProgress.objects.filter(
+        enrollment=enrollment, is_solved=True
+    ).count()
+    Profile.objects.filter(user_id=enrollment.user_id).update(
+        context_version=F("context_version") + 1,
+        xp=Greatest(F("xp") - (enrollment.xp or 0), 0),
+        completed_challenges=Greatest(F("completed_challenges") - solved, 0),
+    )
+
+
+def _with_expected(profiles):
+    user = OuterRef("user_id")
+    enrollments = Enrollment.objects.filter(user_id=user)
+    return profiles.annotate(
+        expected_xp=Coalesce(_per_user(enrollments, "user_id", Sum("xp")), 0),
+        expected_completed=Coalesce(
+            _per_user(
+                ChallengeProgress.objects.filter(
+                    enrollment__user_id=user, is_solved=True
+                ),
+                "enrollment__user_id",
+                Count("id"),
+            ),
+            0,
+        ),
+        last_attempt=_per_user(
+            UserChallengeAttempt.objects.filter(user_id=user),
+            "user_id",
+            Max("submitted_at"),
+        ),
+        last_enrolled=_per_user(enrollments, "user_id", Max("enrolled_at")),
+    )
+
+
+def _value(value):
+    # BinaryField values come back as memoryview on PostgreSQL
+    return bytes(value) if isinstance(value, memoryview) else value
+
+
+def _active_days(profiles):
+    days = {}
+    for user_id, day in (
+        UserChallengeAttempt.objects.filter(
+            user_id__in=[profile.user_id for profile in profiles]
+        )
+        .annotate(day=TruncDate("submitted_at"))
+        .values_list("user_id", "day")
+        .distinct()
+        .order_by()
+    ):
+        days.setdefault(user_id, []).append(day)
+    return days
+
+
+def _rebuild_batch(pks):
+    changed = []
+    with transaction.atomic():
+        profiles = list(
+            _with_expected(
+                Profile.objects.select_for_update().filter(pk__in=pks).order_by("pk")
+            )
+        )
+        days = _active_days(profiles)
+        for profile in profiles:
+            # Archived attempts leave no trace, so activity never moves back.
+            moments = (profile.last_active, profile.last_attempt, profile.last_enrolled)
+            bitmap = activity.from_days(days.get(profile.user_id, ()), profile.activity)
+            expected = {
+                "xp": profile.expected_xp,
+                "completed_challenges": profile.expected_completed,
+                "current_streak": activity.Activity.as_of_last_day(
+                    bitmap
+                ).current_streak,
+                "last_active": max(filter(None, moments), default=None),
+                "activity": bitmap,
+            }
+            if any(
+                _value(getattr(profile, name)) != value
+                for name, value in expected.items()
+            ):
+                for name, value in expected.items():
+                    setattr(profile, name, value)
+                changed.append(profile)
+        Profile.objects.bulk_update(changed, FIELDS)
+    return len(changed)
+
+
+def rebuild(profiles=None, batch_size=BATCH_SIZE):
+    """Recompute profile totals; returns the number of profiles that drifted."""
+    if profiles is None:
+        profiles = Profile.objects.all()
+    pks = list(profiles.order_by("pk").values_list("pk", flat=True))
+    repaired = 0
+    for first in range(0, len(pks), batch_size):
+        last = first + batch_size
+        repaired += _rebuild_batch(pks[first:last])
+    return repaired
@@ -0,0 +1,216 @@
+# courses/progress.py
+"""Incremental course progress.
+
+Progress used to be recomputed from the whole attempt log on every submission.
+Instead each enrollment keeps one ``ChallengeProgress`` row per attempted
+challenge and one ``ModuleProgress`` counter per module, updated in the same
+transaction as the attempt insert, so an attempt costs a constant number of
+queries regardless of course size or history length.
+"""
+
+from django.db import transaction
+from django.db.models import F, Max, Min, Q
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from . import structure
+from .models import ChallengeProgress, Enrollment, ModuleProgress, UserChallengeAttempt
+
+
+def percent_complete(completed_modules, total_modules):
+    """Convert a completed-module count into the stored percentage."""
+    if not total_modules:
+        return 0
+    return min(int((completed_modules / total_modules) * 100), 100)
+
+
+def allocate_attempt(enrollment, challenge):
+    """Reserve the next ``attempt_no`` for ``enrollment`` on ``challenge``.
+
+    Returns ``(challenge_progress_id, attempt_no)``. The counter is bumped with
+    an atomic UPDATE, so concurrent submissions are serialized on the progress
+    row instead of racing on a COUNT of earlier attempts. Must be called inside
+    the transaction that inserts the attempt.
+    """
+    rows = ChallengeProgress.objects.filter(enrollment=enrollment, challenge=challenge)
+    if not rows.update(attempts=F("attempts") + 1):
+        # First attempt: continue after any attempts logged before this row existed.
+        last_attempt_no = UserChallengeAttempt.objects.filter(
+            user_id=enrollment.user_id, challenge=challenge
+        ).aggregate(last=Max("attempt_no"))["last"]
+        _, created = ChallengeProgress.objects.get_or_create(
+            enrollment=enrollment,
+            challenge=challenge,
+            defaults={"attempts": (last_attempt_no or 0) + 1},
+        )
+        if not created:
+            rows.update(attempts=F("attempts") + 1)
+    return rows.values_list("pk", "attempts").get()
+
+
+def record_solve(enrollment, challenge, challenge_progress_id):
+    """Apply a correct attempt to the enrollment's progress counters.
+
+    Must be called inside the transaction that inserts the attempt. Returns
+    True when this attempt is the learner's first correct answer for the
+    challenge.
+    """
+    # The conditional update doubles as the "first solve" check and is safe
+    # against concurrent submissions: only one of them can flip the flag.
+    first_solve = ChallengeProgress.objects.filter(
+        pk=challenge_progress_id, is_solved=False
+    ).update(is_solved=True, solved_at=timezone.now())
+    if not first_solve:
+        return False
+
+    module_progress, _ = ModuleProgress.objects.get_or_create(
+        enrollment=enrollment, module_id=challenge.module_id
+    )
+    ModuleProgress.objects.filter(pk=module_progress.pk).update(
+        solved_count=F("solved_count") + 1
+    )
+    solved_count = (
+        ModuleProgress.objects.filter(pk=module_progress.pk)
+        .values_list("solved_count", flat=True)
+        .get()
+    )
+    course = structure.get_course(pk=enrollment.course_id)
+    module = course.module(challenge.module_id)
+    if module is None or solved_count < len(module.challenge_ids):
+        return True
+
+    module_completed = ModuleProgress.objects.filter(
+        pk=module_progress.pk, is_complete=False
+    ).update(is_complete=True)
+    if module_completed:
+        total_modules = course.module_count
+        Enrollment.objects.filter(pk=enrollment.pk).update(
+            completed_modules=F("completed_modules") + 1,
+            progress=Least((F("completed_modules") + 1) * 100 / total_modules, 100),
+        )
+    return True
+
+
+def next_unsolved(course, solved_challenge_ids):
+    """Return ``(module, challenge_id)`` of the first unsolved challenge in order."""
+    for module in course.modules:
+        for challenge_id in module.challenge_ids:
+            if challenge_id not in solved_challenge_ids:
+                return module, challenge_id
+    return None, None
+
+
+def move_cursor(enrollment, course=None):
+    """Point the learning-center cursor at the next unsolved challenge.
+
+    Called after every first solve and lazily by the learning center when the
+    cursor was computed against an older structure generation. A cursor with
+    no next challenge means the course is complete.
+    """
+    if course is None:
+        course = structure.get_course(pk=enrollment.course_id)
+    generation = structure.catalog().generation
+    solved = set(
+        ChallengeProgress.objects.filter(
+            enrollment=enrollment, is_solved=True
+        ).values_list("challenge_id", flat=True)
+    )
+    module, challenge_id = next_unsolved(course, solved)
+    enrollment.current_module_id = module.id if module else None
+    enrollment.next_challenge_id = challenge_id
+    enrollment.cursor_generation = generation
+    Enrollment.objects.filter(pk=enrollment.pk).update(
+        current_module_id=enrollment.current_module_id,
+        next_challenge_id=challenge_id,
+        cursor_generation=generation,
+    )
+    return module, challenge_id
+
+
+def course_module_challenges(course_id):
+    """Return ``{module_id: (challenge_id, ...)}`` for every module of a course."""
+    course = structure.get_course(pk=course_id)
+    if course is None:
+        return {}
+    return {m.id: m.challenge_ids for m in course.modules}
+
+
+@transaction.atomic
+def rebuild_progress(enrollment, module_challenges=None):
+    """Rebuild every progress counter of ``enrollment`` from the attempt log.
+
+    Archived attempts are no longer in the log, so existing challenge rows act
+    as a floor: attempt counts and solves are never taken back.
+    """
+    if module_challenges is None:
+        module_challenges = course_module_challenges(enrollment.course_id)
+
+    attempt_log = (
+        UserChallengeAttempt.objects.filter(
+            user_id=enrollment.user_id,
+            challenge__module__course_id=enrollment.course_id,
+        )
+        .values("challenge_id")
+        .annotate(
+            last_attempt_no=Max("attempt_no"),
+            first_solved=Min("submitted_at", filter=Q(is_correct=True)),
+        )
+        .values_list("challenge_id", "last_attempt_no", "first_solved")
+        .order_by()
+    )
+    first_solves = {}
+    attempt_counts = {}
+    for challenge_id, attempts, solved_at in ChallengeProgress.objects.filter(
+        enrollment=enrollment
+    ).values_list("challenge_id", "attempts", "solved_at"):
+        first_solves[challenge_id] = solved_at
+        attempt_counts[challenge_id] = attempts
+    for challenge_id, last_attempt_no, first_solved in attempt_log:
+        known = first_solves.get(challenge_id)
+        first_solves[challenge_id] = min(
+            (t for t in (known, first_solved) if t), default=None
+        )
+        attempt_counts[challenge_id] = max(
+            attempt_counts.get(challenge_id, 0), last_attempt_no
+        )
+
+    ChallengeProgress.objects.filter(enrollment=enrollment).delete()
+    ModuleProgress.objects.filter(enrollment=enrollment).delete()
+
+    ChallengeProgress.objects.bulk_create(
+        ChallengeProgress(
+            enrollment=enrollment,
+            challenge_id=challenge_id,
+            attempts=attempt_counts[challenge_id],
+            is_solved=solved_at is not None,
+            solved_at=solved_at,
+        )
+        for challenge_id, solved_at in first_solves.items()
+    )
+
+    solved = {cid for cid, solved_at in first_solves.items() if solved_at}
+    module_rows = []
+    for module_id, challenge_ids in module_challenges.items():
+        solved_count = sum(1 for cid in challenge_ids if cid in solved)
+        if not solved_count:
+            continue
+        module_rows.append(
+            ModuleProgress(
+                enrollment=enrollment,
+                module_id=module_id,
+                solved_count=solved_count,
+                is_complete=solved_count == len(challenge_ids),
+            )
+        )
+    ModuleProgress.objects.bulk_create(module_rows)
+
+    enrollment.completed_modules = sum(1 for row in module_rows if row.is_complete)
+    enrollment.progress = percent_complete(
+        enrollment.completed_modules, len(module_challenges)
+    )
+    enrollment.last_progress_at = max(
+        filter(None, [enrollment.last_progress_at, *first_solves.values()]),
+        default=None,
+    )
+    enrollment.save(update_fields=["completed_modules", "progress", "last_progress_at"])
+    return enrollment
@@ -0,0 +1,187 @@
+# courses/recommendations.py
+"""Next-challenge recommendations from a learner's skill profile.
+
+Each worker keeps a per-course index from skill tag to the challenges that
+practise it, ordered by difficulty, rebuilt when the structure generation
+moves. For every skill the learner's ``Enrollment.mastery`` rating gives the
+difficulty at which they are expected to succeed ``TARGET`` of the time; the
+unsolved challenges nearest to it are scored, weakest skills first, and the
+top ``k`` are returned with the reason they were picked.
+
+Results are cached per enrollment under a key that includes a hash of the
+mastery and the cursor, so every attempt that moves mastery invalidates them
+and the learning center renders them without touching the catalog.
+"""
+
+import bisect
+import hashlib
+import json
+import math
+import threading
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.utils.translation import gettext as _
+
+from . import mastery, structure
+from .models import Challenge, ChallengeProgress
+
+# Expected chance of success that recommendations aim for
+TARGET = 0.7
+TOP_K = 3
+CACHE_TIMEOUT = 60 * 60
+
+
+@dataclass(frozen=True)
+class Candidate:
+    challenge_id: int
+    module_id: int
+    title: str
+    difficulty: float
+    level: str
+
+
+@dataclass(frozen=True)
+class Recommendation:
+    challenge_id: int
+    module_id: int
+    title: str
+    skill: str
+    level: str
+    mastery_percent: int  # expected success on a medium challenge
+    new_skill: bool
+
+    @property
+    def reason(self):
+        if self.new_skill:
+            return _("Introduces %(skill)s, a skill you have not practised yet.") % {
+                "skill": self.skill
+            }
+        return _(
+            "Practises %(skill)s (mastery %(mastery)s%%) at %(level)s difficulty."
+        ) % {"skill": self.skill, "mastery": self.mastery_percent, "level": self.level}
+
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def _build_index(course):
+    modules = {module.id: module for module in course.modules}
+    index = {}
+    for pk, module_id, title, level in Challenge.objects.filter(
+        module_id__in=modules
+    ).values_list("pk", "module_id", "title", "difficulty"):
+        module = modules[module_id]
+        candidate = Candidate(
+            challenge_id=pk,
+            module_id=module_id,
+            title=title or module.title,
+            difficulty=mastery.DIFFICULTY.get(level, 0.0),
+            level=level,
+        )
+        for skill in mastery.skills(module):
+            index.setdefault(skill, []).append((module.order, candidate))
+    return {
+        skill: tuple(
+            candidate
+            for order, candidate in sorted(
+                entries, key=lambda e: (e[1].difficulty, e[0], e[1].challenge_id)
+            )
+        )
+        for skill, entries in index.items()
+    }
+
+
+def skill_index(course):
+    """``{skill: (Candidate, ...)}`` for a ``CourseSnapshot``, easiest first."""
+    generation = structure.catalog().generation
+    with _lock:
+        cached = _indexes.get(course.id)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    index = _build_index(course)
+    with _lock:
+        _indexes[course.id] = (generation, index)
+    return index
+
+
+def _nearest(candidates, ideal, exclude, limit):
+    """Up to ``limit`` candidates closest to difficulty ``ideal``."""
+    difficulties = [c.difficulty for c in candidates]
+    right = bisect.bisect_left(difficulties, ideal)
+    left = right - 1
+    found = []
+    while len(found) < limit and (left >= 0 or right < len(candidates)):
+        take_left = right >= len(candidates) or (
+            left >= 0 and ideal - difficulties[left] <= difficulties[right] - ideal
+        )
+        candidate = candidates[left] if take_left else candidates[right]
+        if take_left:
+            left -= 1
+        else:
+            right += 1
+        if candidate.challenge_id not in exclude:
+            found.append(candidate)
+    return found
+
+
+def rank(index, ratings, exclude=(), k=TOP_K):
+    """Score the index against ``ratings`` and return the top ``k``."""
+    offset = math.log(TARGET / (1 - TARGET))
+    scored = {}
+    for skill, candidates in index.items():
+        rating = ratings.get(skill)
+        ideal = (rating or 0.0) - offset
+        for candidate in _nearest(candidates, ideal, exclude, k):
+            # Closest to the target difficulty first, then the weakest skill
+            score = (abs(candidate.difficulty - ideal), rating or 0.0)
+            best = scored.get(candidate.challenge_id)
+            if best is None or score < best[0]:
+                scored[candidate.challenge_id] = (score, skill, candidate, rating)
+    top = sorted(scored.values(), key=lambda entry: entry[0])[:k]
+    return [
+        Recommendation(
+            challenge_id=candidate.challenge_id,
+            module_id=candidate.module_id,
+            title=candidate.title,
+            skill=skill,
+            level=candidate.level,
+            mastery_percent=round(mastery.probability(rating or 0.0) * 100),
+            new_skill=rating is None,
+        )
+        for score, skill, candidate, rating in top
+    ]
+
+
+def _cache_key(enrollment, generation, k):
+    state = json.dumps(
+        [enrollment.mastery, enrollment.next_challenge_id], sort_keys=True
+    ).encode()
+    digest = hashlib.blake2b(state, digest_size=8).hexdigest()
+    return f"recommendations:{enrollment.pk}:{generation}:{k}:{digest}"
+
+
+def for_enrollment(enrollment, k=TOP_K):
+    """Top ``k`` recommendations for ``enrollment``; cached until mastery moves.
+
+    The challenge the learning-center cursor already points at is left out.
+    """
+    course = structure.get_course(pk=enrollment.course_id)
+    if course is None:
+        return []
+    key = _cache_key(enrollment, structure.catalog().generation, k)
+    recommendations = cache.get(key)
+    if recommendations is None:
+        index = skill_index(course)
+        exclude = set()
+        if index:
+            exclude = set(
+                ChallengeProgress.objects.filter(
+                    enrollment=enrollment, is_solved=True
+                ).values_list("challenge_id", flat=True)
+            )
+            exclude.add(enrollment.next_challenge_id)
+        recommendations = rank(index, enrollment.mastery or {}, exclude, k)
+        cache.set(key, recommendations, CACHE_TIMEOUT)
+    return recommendations
@@ -0,0 +1,234 @@
+# courses/rollups.py
+"""Daily rollups of the attempt log.
+
+``roll_up`` folds attempts above the ``RollupCheckpoint`` high-water mark into
+``DailyEnrollmentRollup`` and ``DailyChallengeRollup`` and advances the mark.
+Totals are read as "rollup rows + attempts above the mark" in a single
+statement, so they stay exact between runs and cost the same however long the
+history is. Attempts at or below the mark may be archived (see
+``archive_attempts``) without changing any total; ``delete_attempts`` removes
+attempts together with their share of the rollups.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import (
+    DailyChallengeRollup,
+    DailyEnrollmentRollup,
+    Enrollment,
+    RollupCheckpoint,
+    UserChallengeAttempt,
+)
+
+CHECKPOINT = "attempt_rollups"
+# Attempts younger than this are left for the next run so that transactions
+# still in flight (which may hold lower ids) are not skipped by the mark.
+SETTLE_SECONDS = 60
+BATCH_SIZE = 10000
+
+TOTALS = {
+    "attempts": Count("id"),
+    "correct": Count("id", filter=Q(is_correct=True)),
+    "time_seconds": Sum("time_seconds"),
+}
+
+
+def high_water_mark():
+    return (
+        RollupCheckpoint.objects.filter(name=CHECKPOINT)
+        .values_list("last_attempt_id", flat=True)
+        .first()
+        or 0
+    )
+
+
+def _merge(model, keys, rows):
+    """Add aggregated ``rows`` (dicts keyed by ``keys`` + totals) into ``model``."""
+    if not rows:
+        return
+    lookup = Q()
+    for row in rows:
+        lookup |= Q(**{key: row[key] for key in keys})
+    existing = {
+        tuple(getattr(obj, key) for key in keys): obj
+        for obj in model.objects.filter(lookup)
+    }
+    created, updated = [], []
+    for row in rows:
+        obj = existing.get(tuple(row[key] for key in keys))
+        if obj is None:
+            created.append(model(**row))
+            continue
+        for field in TOTALS:
+            setattr(obj, field, getattr(obj, field) + row[field])
+        updated.append(obj)
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, list(TOTALS))
+
+
+def _roll_up_batch(batch_size, settled_before):
+    with transaction.atomic():
+        # The row lock serializes concurrent roll_up runs.
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(
+            name=CHECKPOINT
+        )
+        ids = list(
+            UserChallengeAttempt.objects.filter(
+                id__gt=checkpoint.last_attempt_id, submitted_at__lt=settled_before
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        batch = UserChallengeAttempt.objects.filter(
+            id__gt=checkpoint.last_attempt_id, id__lte=ids[-1]
+        ).order_by()
+        day = TruncDate("submitted_at")
+        _merge(
+            DailyEnrollmentRollup,
+            ("user_id", "course_id", "day"),
+            list(
+                batch.values(
+                    "user_id", course_id=F("challenge__module__course_id"), day=day
+                ).annotate(**TOTALS)
+            ),
+        )
+        _merge(
+            DailyChallengeRollup,
+            ("challenge_id", "day"),
+            list(batch.values("challenge_id", day=day).annotate(**TOTALS)),
+        )
+        checkpoint.last_attempt_id = ids[-1]
+        checkpoint.save(update_fields=["last_attempt_id", "updated_at"])
+    return len(ids)
+
+
+def roll_up(batch_size=BATCH_SIZE, settle_seconds=SETTLE_SECONDS):
+    """Fold settled attempts above the high-water mark into the rollups.
+
+    Each batch commits on its own; returns the number of attempts rolled up.
+    """
+    settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+    total = 0
+    while True:
+        count = _roll_up_batch(batch_size, settled_before)
+        total += count
+        if count < batch_size:
+            return total
+
+
+def delete_attempts(attempts):
+    """Delete ``attempts`` and take the rolled-up ones back out of the
+    challenge rollups; returns the number deleted.
+
+    Enrollment rollups are left alone: they go with the user or enrollment.
+    """
+    with transaction.atomic():
+        # Hold off roll_up so no attempt is folded in while it is deleted
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(
+            name=CHECKPOINT
+        )
+        rolled = attempts.filter(id__lte=checkpoint.last_attempt_id).order_by()
+        for row in rolled.values(
+            "challenge_id", day=TruncDate("submitted_at")
+        ).annotate(**TOTALS):
+            DailyChallengeRollup.objects.filter(
+                challenge_id=row["challenge_id"], day=row["day"]
+            ).update(**{field: F(field) - (row[field] or 0) for field in TOTALS})
+        deleted, _ = attempts.order_by().delete()
+    return deleted
+
+
+def _scalar(queryset, group, aggregate):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group).annotate(total=aggregate).values("total")
+        ),
+        0,
+    )
+
+
+def _annotations(rollups, tail, group):
+    """Totals as subquery expressions, so rollups and tail share one snapshot."""
+    mark = Subquery(
+        RollupCheckpoint.objects.filter(name=CHECKPOINT).values("last_attempt_id")
+    )
+    tail = tail.filter(id__gt=Coalesce(mark, 0))
+    return {
+        name: _scalar(rollups, group, Sum(name)) + _scalar(tail, group, aggregate)
+        for name, aggregate in TOTALS.items()
+    }
+
+
+def _enrollment_annotations():
+    return _annotations(
+        DailyEnrollmentRollup.objects.filter(
+            user_id=OuterRef("user_id"), course_id=OuterRef("course_id")
+        ),
+        UserChallengeAttempt.objects.filter(
+            user_id=OuterRef("user_id"),
+            challenge__module__course_id=OuterRef("course_id"),
+        ),
+        "user_id",
+    )
+
+
+def _challenge_annotations():
+    return _annotations(
+        DailyChallengeRollup.objects.filter(challenge_id=OuterRef("pk")),
+        UserChallengeAttempt.objects.filter(challenge_id=OuterRef("pk")),
+        "challenge_id",
+    )
+
+
+def _load_totals(objects):
+    model = type(objects[0])
+    annotations = (
+        _enrollment_annotations() if model is Enrollment else _challenge_annotations()
+    )
+    rows = (
+        model.objects.filter(pk__in=[obj.pk for obj in objects])
+        .annotate(**annotations)
+        .values("pk", *TOTALS)
+    )
+    return {row.pop("pk"): row for row in rows}
+
+
+def prefetch_totals(objects):
+    """Load totals for many enrollments or challenges in one query.
+
+    The results are stored on each object, where ``enrollment_totals`` and
+    ``challenge_totals`` (and so the model properties) pick them up.
+    """
+    objects = list(objects)
+    if objects:
+        totals = _load_totals(objects)
+        for obj in objects:
+            obj._attempt_totals = totals[obj.pk]
+    return objects
+
+
+def enrollment_totals(enrollment):
+    """``{"attempts", "correct", "time_seconds"}`` of an enrollment."""
+    if hasattr(enrollment, "_attempt_totals"):
+        return enrollment._attempt_totals
+    return _load_totals([enrollment])[enrollment.pk]
+
+
+def challenge_totals(challenge):
+    """``{"attempts", "correct", "time_seconds"}`` of a challenge."""
+    if hasattr(challenge, "_attempt_totals"):
+        return challenge._attempt_totals
+    return _load_totals([challenge])[challenge.pk]
+
+
+def annotate_totals(enrollments):
+    """Annotate an enrollment queryset with ``attempts``, ``correct`` and
+    ``time_seconds`` computed in the same statement."""
+    return enrollments.annotate(**_enrollment_annotations())
@@ -0,0 +1,293 @@
+# courses/sandbox.py
+"""Sandboxed execution of learner shell snippets.
+
+Snippets run in a pool of pre-started worker processes (forked from a clean
+forkserver, so no request state or database sockets leak in), each run in a
+throwaway temporary directory with rlimits on CPU, memory, file size, open
+files and processes, a minimal environment and a wall-clock timeout that
+kills the whole process group.
+
+rlimits do not isolate the network or the filesystem outside the temporary
+directory: run the grading processes as a dedicated unprivileged user (or in
+a container) in production.
+"""
+
+import multiprocessing
+import os
+import resource
+import selectors
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+from django.conf import settings
+
+SANDBOX_PATH = "/usr/local/bin:/usr/bin:/bin"
+READ_CHUNK = 16 * 1024
+
+
+class SandboxBusy(Exception):
+    """All workers are busy and the queue is full."""
+
+
+@dataclass(frozen=True)
+class Limits:
+    timeout: float = 5.0
+    cpu_seconds: int = 2
+    memory_mb: int = 256
+    max_processes: int = 64
+    max_file_mb: int = 10
+    max_output_bytes: int = 64 * 1024
+
+
+@dataclass(frozen=True)
+class SandboxResult:
+    stdout: str
+    exit_code: int
+    timed_out: bool
+    duration: float
+
+
+def _apply_limits(limits):
+    def preexec():
+        memory = limits.memory_mb * 1024 * 1024
+        resource.setrlimit(
+            resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 1)
+        )
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        file_size = limits.max_file_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_FSIZE, (file_size, file_size))
+        resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+        resource.setrlimit(
+            resource.RLIMIT_NPROC, (limits.max_processes, limits.max_processes)
+        )
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+    return preexec
+
+
+def _read_output(process, limit, deadline):
+    """Read at most ``limit + 1`` bytes of output, giving up at ``deadline``.
+
+    Returns ``(output, timed_out)``. Output is read in chunks so a snippet
+    that writes without end costs the worker ``limit`` bytes, not all of it.
+    """
+    chunks, size = [], 0
+    fd = process.stdout.fileno()
+    with selectors.DefaultSelector() as selector:
+        selector.register(fd, selectors.EVENT_READ)
+        while size <= limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return b"".join(chunks), True
+            if not selector.select(remaining):
+                continue
+            chunk = os.read(fd, min(READ_CHUNK, limit + 1 - size))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+    return b"".join(chunks), False
+
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _run_shell(script, workdir, limits, timeout):
+    deadline = time.monotonic() + timeout
+    process = subprocess.Popen(
+        ["/bin/sh", "-c", script],
+        cwd=workdir,
+        env={"PATH": SANDBOX_PATH, "HOME": workdir, "LANG": "C.UTF-8"},
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+        preexec_fn=_apply_limits(limits),
+    )
+    with process.stdout:
+        output, timed_out = _read_output(process, limits.max_output_bytes, deadline)
+    if len(output) > limits.max_output_bytes:
+        # Too much output: stop the snippet instead of reading the rest
+        _kill_group(process)
+    try:
+        process.wait(timeout=max(deadline - time.monotonic(), 0))
+    except subprocess.TimeoutExpired:
+        timed_out = True
+    if timed_out:
+        _kill_group(process)
+        process.wait()
+    return output[: limits.max_output_bytes], process.returncode, timed_out
+
+
+def execute(snippet, setup_script="", limits=Limits()):
+    """Run ``snippet`` in a fresh sandbox directory; called inside pool workers."""
+    started = time.monotonic()
+    with tempfile.TemporaryDirectory(prefix="codequest-sandbox-") as workdir:
+        if setup_script:
+            _, exit_code, timed_out = _run_shell(
+                setup_script, workdir, limits, limits.timeout
+            )
+            if timed_out or exit_code != 0:
+                return SandboxResult("", exit_code, timed_out, 0.0)
+        remaining = max(limits.timeout - (time.monotonic() - started), 0.1)
+        output, exit_code, timed_out = _run_shell(snippet, workdir, limits, remaining)
+    return SandboxResult(
+        stdout=output.decode("utf-8", errors="replace"),
+        exit_code=exit_code,
+        timed_out=timed_out,
+        duration=time.monotonic() - started,
+    )
+
+
+def _warm_up():
+    return os.getpid()
+
+
+class SandboxPool:
+    """A bounded pool of pre-started sandbox workers.
+
+    At most ``workers`` snippets run at once and at most ``max_queue`` more
+    wait; beyond that ``submit`` raises ``SandboxBusy`` instead of letting
+    requests pile up.
+    """
+
+    def __init__(self, workers, max_queue, limits=Limits()):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.limits = limits
+        self.pid = os.getpid()
+        self._executor = self._start()
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def _start(self):
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+        # Start every worker now so no submission pays for process startup.
+        for future in [executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def _restart(self, broken):
+        """Replace ``broken`` (a worker died) unless another thread already did."""
+        with self._restart_lock:
+            if self._executor is broken:
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._start()
+                with self._lock:
+                    self.restarts += 1
+
+    def _submit(self, snippet, setup_script):
+        executor = self._executor
+        try:
+            return executor.submit(execute, snippet, setup_script, self.limits)
+        except BrokenProcessPool:
+            self._restart(executor)
+            return self._executor.submit(execute, snippet, setup_script, self.limits)
+
+    def submit(self, snippet, setup_script=""):
+        """Queue a run and return a ``concurrent.futures.Future``.
+
+        A pool whose worker died is replaced here, before the run is queued.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise SandboxBusy("Sandbox queue is full.")
+        try:
+            future = self._submit(snippet, setup_script)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending += 1
+            self.submitted += 1
+        future.add_done_callback(self._finished)
+        return future
+
+    def run(self, snippet, setup_script=""):
+        """Run a snippet and wait for its ``SandboxResult``.
+
+        If a worker dies during the run (this snippet or another one in the
+        pool took it down), the run is retried once on a fresh pool; a second
+        crash is reported as a killed run.
+        """
+        for _try in range(2):
+            try:
+                return self.submit(snippet, setup_script).result()
+            except BrokenProcessPool:
+                continue  # submit replaces the broken pool
+        return SandboxResult("", -signal.SIGKILL, False, 0.0)
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+            if not future.cancelled() and future.exception() is None:
+                self.timeouts += future.result().timed_out
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": min(self._pending, self.workers),
+                "queue_depth": max(self._pending - self.workers, 0),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "restarts": self.restarts,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def limits_from_settings():
+    return Limits(
+        timeout=settings.SANDBOX_TIMEOUT,
+        memory_mb=settings.SANDBOX_MEMORY_MB,
+        cpu_seconds=max(int(settings.SANDBOX_TIMEOUT), 1),
+    )
+
+
+def get_pool():
+    """Return this process's pool, creating it on first use (and after a fork)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = SandboxPool(
+                workers=settings.SANDBOX_WORKERS,
+                max_queue=settings.SANDBOX_MAX_QUEUE,
+                limits=limits_from_settings(),
+            )
+        return _pool
+
+
+def run(snippet, setup_script=""):
+    """Run ``snippet`` in the shared pool and return its ``SandboxResult``."""
+    return get_pool().run(snippet, setup_script)
@@ -0,0 +1,41 @@
+# courses/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from codequest import metrics
+
+from . import leaderboard, profile_stats, structure
+from .models import Challenge, Course, Enrollment, Module
+
+
+@receiver(post_delete, sender=Enrollment)
+def remove_enrollment_from_leaderboard(sender, instance, **kwargs):
+    leaderboard.forget_enrollment(instance)
+
+
+@receiver(post_save, sender=Enrollment)
+def record_enrollment_on_profile(sender, instance, created, **kwargs):
+    if created:
+        profile_stats.record_enrollment(instance)
+        transaction.on_commit(metrics.ENROLLMENTS_CREATED.inc)
+
+
+@receiver(pre_delete, sender=Enrollment)
+def remove_enrollment_from_profile(sender, instance, **kwargs):
+    # Before the delete, while its progress rows still exist
+    profile_stats.forget_enrollment(instance)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def invalidate_course_structure(sender, **kwargs):
+    # Bump now so this transaction sees its own change, and again after commit
+    # so a snapshot loaded from uncommitted (or rolled back) rows never shares
+    # a generation with the committed tree.
+    structure.bump_generation()
+    transaction.on_commit(structure.bump_generation)
@@ -0,0 +1,183 @@
+# courses/structure.py
+"""Versioned in-process snapshot of the course catalog.
+
+Course -> Module -> Challenge structure changes rarely, so each worker process
+loads the whole tree once into immutable snapshots and serves the hot views
+from memory. A generation counter in a one-row table
+(``StructureGeneration``), which every worker shares through the database, is
+bumped by save/delete signals on ``Course``, ``Module`` and ``Challenge``.
+Each worker compares it with the generation its snapshot was built from and
+reloads on mismatch. A request reads the counter once (one primary-key
+lookup) and reuses it until the request ends or this process bumps it;
+commands and workers outside a request reread it every ``RECHECK_SECONDS``.
+
+Bulk writes that bypass signals (``bulk_create``, ``QuerySet.update``) must
+call ``bump_generation`` themselves.
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from django.core.signals import request_finished, request_started
+from django.db.models import F
+
+from .models import Challenge, Course, Module, StructureGeneration
+
+RECHECK_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class ModuleSnapshot:
+    id: int
+    course_id: int
+    order: int
+    title: str
+    content: str
+    points: int
+    skill_tags: MappingProxyType
+    challenge_ids: tuple
+
+
+@dataclass(frozen=True)
+class CourseSnapshot:
+    id: int
+    slug: str
+    title: str
+    description: str
+    is_active: bool
+    modules: tuple
+    # challenge id -> its ModuleSnapshot
+    module_by_challenge: MappingProxyType = field(repr=False)
+
+    @property
+    def module_count(self):
+        return len(self.modules)
+
+    @property
+    def challenge_ids(self):
+        return tuple(cid for m in self.modules for cid in m.challenge_ids)
+
+    def module(self, module_id):
+        return next((m for m in self.modules if m.id == module_id), None)
+
+
+@dataclass(frozen=True)
+class Catalog:
+    generation: int
+    loaded_at: float
+    by_slug: MappingProxyType
+    by_id: MappingProxyType
+
+    @property
+    def courses(self):
+        return tuple(self.by_id.values())
+
+
+_lock = threading.Lock()
+_catalog = None
+# Generation last read on this thread, and until when it may be reused
+_seen = threading.local()
+
+
+def _start_request(**kwargs):
+    # Read once per request, then reuse it until the request ends
+    _seen.generation, _seen.until = None, math.inf
+
+
+def _end_request(**kwargs):
+    _seen.generation, _seen.until = None, 0.0
+
+
+request_started.connect(_start_request)
+request_finished.connect(_end_request)
+
+
+def current_generation():
+    """Return the shared generation counter (0 before the first change)."""
+    generation = getattr(_seen, "generation", None)
+    if generation is not None and time.monotonic() < _seen.until:
+        return generation
+    generation = (
+        StructureGeneration.objects.filter(pk=1).values_list("value", flat=True).first()
+    ) or 0
+    _seen.generation = generation
+    if getattr(_seen, "until", 0.0) != math.inf:
+        # Outside requests (commands, workers) recheck every RECHECK_SECONDS
+        _seen.until = time.monotonic() + RECHECK_SECONDS
+    return generation
+
+
+def bump_generation():
+    """Invalidate every worker's snapshot once the caller's transaction commits."""
+    _seen.generation = None
+    if not StructureGeneration.objects.filter(pk=1).update(value=F("value") + 1):
+        StructureGeneration.objects.get_or_create(pk=1, defaults={"value": 1})
+
+
+def _load(generation):
+    modules_by_course = {}
+    challenge_ids = {}
+    for module_id, challenge_id in (
+        Challenge.objects.order_by("id").values_list("module_id", "id").iterator()
+    ):
+        challenge_ids.setdefault(module_id, []).append(challenge_id)
+    for module in Module.objects.order_by("course_id", "order", "id").iterator():
+        modules_by_course.setdefault(module.course_id, []).append(
+            ModuleSnapshot(
+                id=module.id,
+                course_id=module.course_id,
+                order=module.order,
+                title=module.title,
+                content=module.content,
+                points=module.points,
+                skill_tags=MappingProxyType(dict(module.skill_tags or {})),
+                challenge_ids=tuple(challenge_ids.get(module.id, ())),
+            )
+        )
+
+    by_id = {}
+    for course in Course.objects.order_by("title").iterator():
+        modules = tuple(modules_by_course.get(course.id, ()))
+        by_id[course.id] = CourseSnapshot(
+            id=course.id,
+            slug=course.slug,
+            title=course.title,
+            description=course.description,
+            is_active=course.is_active,
+            modules=modules,
+            module_by_challenge=MappingProxyType(
+                {cid: m for m in modules for cid in m.challenge_ids}
+            ),
+        )
+    return Catalog(
+        generation=generation,
+        loaded_at=time.monotonic(),
+        by_slug=MappingProxyType({c.slug: c for c in by_id.values()}),
+        by_id=MappingProxyType(by_id),
+    )
+
+
+def _is_stale(snapshot, generation):
+    return snapshot is None or snapshot.generation != generation
+
+
+def catalog():
+    """Return this process's snapshot, reloading it if the generation moved."""
+    global _catalog
+    generation = current_generation()
+    if _is_stale(_catalog, generation):
+        with _lock:
+            if _is_stale(_catalog, generation):
+                _catalog = _load(generation)
+    return _catalog
+
+
+def get_course(slug=None, pk=None):
+    """Return the ``CourseSnapshot`` for a slug or primary key, or None."""
+    courses = catalog()
+    if slug is not None:
+        return courses.by_slug.get(slug)
+    return courses.by_id.get(pk)
@@ -0,0 +1,101 @@
+# courses/submission.py
+"""Attempt submission pipeline.
+
+Everything an attempt changes is written in one transaction with atomic
+``F()`` updates, so concurrent submissions for the same learner (double
+clicks, classroom bursts) can neither lose XP nor reuse an ``attempt_no``.
+"""
+
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from codequest import metrics
+
+from . import challenge_stats, leaderboard, mastery, profile_stats, progress
+from .models import Enrollment, UserChallengeAttempt
+
+
+@dataclass(frozen=True)
+class AttemptResult:
+    attempt: UserChallengeAttempt
+    earned_xp: int
+    first_solve: bool
+
+    @property
+    def is_correct(self):
+        return self.attempt.is_correct
+
+
+@transaction.atomic
+def submit_attempt(enrollment, challenge, is_correct, time_seconds=0):
+    """Record a graded attempt and apply its XP, streak, progress and mastery.
+
+    The learner's ``Profile`` totals are updated in the same transaction.
+
+    ``enrollment`` is refreshed in place with the committed ``xp``, ``streak``
+    and ``mastery`` values.
+    """
+    challenge_progress_id, attempt_no = progress.allocate_attempt(enrollment, challenge)
+    attempt = UserChallengeAttempt.objects.create(
+        user_id=enrollment.user_id,
+        challenge=challenge,
+        is_correct=is_correct,
+        attempt_no=attempt_no,
+        time_seconds=max(time_seconds, 0),
+    )
+
+    enrollment_row = Enrollment.objects.filter(pk=enrollment.pk)
+    earned_xp = 0
+    first_solve = False
+    if is_correct:
+        earned_xp = challenge.module.points
+        first_solve = progress.record_solve(
+            enrollment, challenge, challenge_progress_id
+        )
+        solved = {"last_progress_at": timezone.now()} if first_solve else {}
+        enrollment_row.update(
+            xp=F("xp") + earned_xp,
+            streak=F("streak") + 1,
+            consecutive_failures=0,
+            failing_challenge=None,
+            **solved,
+        )
+        enrollment.xp, enrollment.streak = enrollment_row.values_list(
+            "xp", "streak"
+        ).get()
+        leaderboard.record_xp_change(
+            enrollment, enrollment.xp - earned_xp, enrollment.xp
+        )
+        if first_solve:
+            # After the enrollment UPDATE so concurrent solves are serialized on
+            # its row lock and the last writer sees every solved challenge.
+            progress.move_cursor(enrollment)
+    else:
+        # Right-hand sides see the row before the UPDATE, as in SQL
+        enrollment_row.update(
+            streak=0,
+            streak_reset_at=Case(
+                When(streak__gt=0, then=Value(timezone.now())),
+                default=F("streak_reset_at"),
+            ),
+            consecutive_failures=Case(
+                When(
+                    failing_challenge_id=challenge.pk,
+                    then=F("consecutive_failures") + 1,
+                ),
+                default=Value(1),
+            ),
+            failing_challenge_id=challenge.pk,
+        )
+        enrollment.streak = 0
+    mastery.record_attempt(enrollment, challenge, is_correct)
+    profile_stats.record_attempt(enrollment, earned_xp, first_solve)
+    # Last: its row is shared by everyone attempting this challenge
+    challenge_stats.record_attempt(attempt, first_solve)
+    graded = metrics.ATTEMPTS_GRADED.labels("correct" if is_correct else "incorrect")
+    transaction.on_commit(graded.inc)
+
+    return AttemptResult(attempt=attempt, earned_xp=earned_xp, first_solve=first_solve)
@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+
+from accounts.models import Profile
+from courses import activity, profile_stats
+from courses.activity import Activity
+from courses.models import UserChallengeAttempt
+from courses.submission import submit_attempt
+
+TODAY = date(2026, 3, 18)  # a Wednesday
+
+
+def days_ago(*offsets):
+    return activity.from_days(TODAY - timedelta(days=n) for n in offsets)
+
+
+def test_streaks_from_the_bitmap():
+    bitmap = days_ago(0, 1, 2, 5, 6, 7, 8, 20)
+    days = Activity.of(bitmap, TODAY)
+    assert days.current_streak == 3
+    assert days.longest_streak == 4
+    assert days.active_days == 8
+    # Today is still open: a streak through yesterday is kept
+    assert Activity.of(days_ago(1, 2), TODAY).current_streak == 2
+    assert Activity.of(days_ago(2, 3), TODAY).current_streak == 0
+    assert Activity.of(b"", TODAY).longest_streak == 0
+
+
+def test_heatmap_weeks_end_today():
+    weeks = Activity.of(days_ago(0, 3, 400), TODAY).heatmap()
+    cells = [cell for week in weeks for cell in week if cell]
+    assert len(cells) == 365
+    assert all(len(week) == 7 for week in weeks[:-1])
+    assert weeks[0][0] is None or weeks[0][0][0].weekday() == 0
+    assert cells[-1] == (TODAY, True)
+    assert [day for day, active in cells if active] == [
+        TODAY - timedelta(days=3),
+        TODAY,
+    ]
+
+
+def test_bitmap_stays_compact():
+    bitmap = activity.from_days([activity.EPOCH + timedelta(days=364)])
+    assert len(bitmap) == 46
+    assert activity.set_bit(b"", 9) == b"\x00\x02"
+    assert activity.set_bit(b"\x01", 1) == b"\x03"
+
+
+@pytest.mark.django_db
+class TestActivityBitmap:
+
+    def test_each_attempt_sets_todays_bit(self, learner, enrollment, challenges):
+        submit_attempt(enrollment, challenges[0], False)
+        submit_attempt(enrollment, challenges[0], True)
+        profile = Profile.objects.get(user=learner)
+        assert bytes(profile.activity) == activity.from_days([timezone.localdate()])
+        days = Activity.of(profile.activity)
+        assert (days.current_streak, days.active_days) == (1, 1)
+
+    def test_attempts_keep_the_day_streak_on_the_profile(
+        self, learner, enrollment, challenges
+    ):
+        today = timezone.localdate()
+        yesterday = activity.from_days([today - timedelta(days=1)])
+        Profile.objects.filter(user=learner).update(
+            activity=yesterday, current_streak=4
+        )
+        submit_attempt(enrollment, challenges[0], False)
+        submit_attempt(enrollment, challenges[0], True)
+        assert Profile.objects.get(user=learner).current_streak == 5
+
+        lapsed = activity.from_days([today - timedelta(days=3)])
+        Profile.objects.filter(user=learner).update(activity=lapsed, current_streak=4)
+        submit_attempt(enrollment, challenges[1], True)
+        assert Profile.objects.get(user=learner).current_streak == 1
+
+    def test_reconcile_fills_days_from_the_log(self, learner, enrollment, challenges):
+        attempt = submit_attempt(enrollment, challenges[0], True).attempt
+        UserChallengeAttempt.objects.filter(pk=attempt.pk).update(
+            submitted_at=attempt.submitted_at - timedelta(days=1)
+        )
+        submit_attempt(enrollment, challenges[1], True)
+        Profile.objects.filter(user=learner).update(activity=b"")
+
+        assert profile_stats.rebuild() == 1
+        profile = Profile.objects.get(user=learner)
+        assert Activity.of(profile.activity).current_streak == 2
+        assert profile.current_streak == 2
+        assert profile_stats.rebuild() == 0
+
+    def test_profile_shows_day_streak_and_heatmap(
+        self, learner_client, enrollment, challenges
+    ):
+        submit_attempt(enrollment, challenges[0], True)
+        response = learner_client.get(reverse("profile"))
+        assert response.context["day_streak"] == 1
+        assert len(response.context["heatmap"]) in (53, 54)
+        assert b"1 active day" in response.content
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+
+import pytest
+
+from courses.models import Enrollment, UserChallengeAttempt
+from courses.paginators import EstimatedCountPaginator
+from courses.submission import submit_attempt
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestLargeTableAdmin:
+
+    def test_attempts_filter_by_module_and_search_by_username(
+        self, admin_client, learner, enrollment, challenges
+    ):
+        submit_attempt(enrollment, challenges[0], True)
+        submit_attempt(enrollment, challenges[2], False)
+        url = reverse("admin:courses_userchallengeattempt_changelist")
+
+        response = admin_client.get(url, {"module": challenges[2].module_id})
+        assert [a.challenge_id for a in response.context["cl"].result_list] == [
+            challenges[2].pk
+        ]
+        response = admin_client.get(url, {"q": learner.username})
+        assert response.context["cl"].result_count == 2
+        response = admin_client.get(url, {"q": learner.username[:3]})
+        assert response.context["cl"].result_count == 0
+
+    def test_foreign_keys_do_not_render_every_row(
+        self, admin_client, enrollment, challenges
+    ):
+        response = admin_client.get(
+            reverse("admin:courses_enrollment_change", args=[enrollment.pk])
+        )
+        assert b"admin-autocomplete" in response.content
+        assert b"vForeignKeyRawIdAdminField" in response.content
+        attempt = submit_attempt(enrollment, challenges[0], True).attempt
+        response = admin_client.get(
+            reverse("admin:courses_userchallengeattempt_change", args=[attempt.pk])
+        )
+        assert b"<option" not in response.content
+
+    def test_paginator_counts_small_tables_exactly(self, enrollment, challenges):
+        for challenge in challenges:
+            submit_attempt(enrollment, challenge, True)
+        paginator = EstimatedCountPaginator(UserChallengeAttempt.objects.all(), 2)
+        assert paginator.count == 3
+        assert paginator.num_pages == 2
+
+    def test_pages_past_an_overestimate_fall_back_to_the_exact_count(
+        self, admin_client, enrollment, challenges, monkeypatch
+    ):
+        for challenge in challenges:
+            submit_attempt(enrollment, challenge, True)
+        monkeypatch.setattr(
+            EstimatedCountPaginator, "_estimated_count", lambda self: 50_000
+        )
+        paginator = EstimatedCountPaginator(UserChallengeAttempt.objects.all(), 2)
+        assert paginator.count == 50_000
+        assert paginator.page(1).object_list
+
+        page = paginator.page(40)
+        assert (page.number, len(page)) == (2, 1)
+        assert (paginator.count, paginator.num_pages) == (3, 2)
+
+        url = reverse("admin:courses_userchallengeattempt_changelist")
+        response = admin_client.get(url, {"p": 300})
+        assert response.status_code == 200
+        cl = response.context["cl"]
+        assert (cl.result_count, cl.page_num, len(cl.result_list)) == (3, 1, 3)
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="needs PostgreSQL statistics"
+    )
+    def test_paginator_estimates_large_tables(self, course):
+        users = User.objects.bulk_create(
+            User(username=f"bulk-{i}", email=f"bulk-{i}@x.io") for i in range(12_000)
+        )
+        Enrollment.objects.bulk_create(Enrollment(user=u, course=course) for u in users)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE courses_enrollment")
+        paginator = EstimatedCountPaginator(Enrollment.objects.all(), 100)
+        assert paginator.count == pytest.approx(12_000, rel=0.1)
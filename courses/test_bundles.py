@@ -0,0 +1,128 @@
+import copy
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from courses import bundles
+from courses.models import Challenge, Module, UserChallengeAttempt
+from courses.submission import submit_attempt
+
+
+def big_bundle(modules=20, challenges=25):
+    return {
+        "slug": "big-course",
+        "title": "Big course",
+        "modules": [
+            {
+                "order": m,
+                "title": f"Module {m}",
+                "points": 10,
+                "challenges": [
+                    {
+                        "title": f"Challenge {m}.{c}",
+                        "prompt": "Say it",
+                        "expected_output": f"answer {m}.{c}",
+                    }
+                    for c in range(challenges)
+                ],
+            }
+            for m in range(1, modules + 1)
+        ],
+    }
+
+
+@pytest.mark.django_db
+class TestCourseBundles:
+
+    def test_unchanged_reimport_writes_nothing(self):
+        bundle = big_bundle()
+        result = bundles.import_bundle(bundle)
+        assert result.created == {"courses": 1, "modules": 20, "challenges": 500}
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = bundles.import_bundle(bundle)
+        assert not result.changed
+        statements = [q["sql"].split()[0] for q in ctx.captured_queries]
+        assert statements.count("SELECT") == 3
+        assert not {"INSERT", "UPDATE", "DELETE"} & set(statements)
+
+    def test_applies_only_the_diff(self, course, challenges):
+        bundle = bundles.export_bundle(course)
+        edited = copy.deepcopy(bundle)
+        basics = edited["modules"][0]
+        basics["challenges"][0]["expected_output"] = "git init ."
+        basics["challenges"].pop(1)
+        basics["challenges"].append(
+            {"title": "log", "prompt": "log", "expected_output": "git log"}
+        )
+        edited["modules"].pop(1)
+
+        result = bundles.import_bundle(edited)
+
+        assert result.summary() == (
+            "1 challenges created, 1 challenges updated, 1 modules deleted, "
+            "2 challenges deleted"
+        )
+        challenges[0].refresh_from_db()
+        assert challenges[0].expected_output == "git init ."
+        assert challenges[0].rules_hash == bundles.grading.rule_hash(challenges[0])
+        assert list(
+            Challenge.objects.filter(module__course=course)
+            .order_by("id")
+            .values_list("title", flat=True)
+        ) == [challenges[0].title, "log"]
+
+    def test_dry_run_and_invalid_rules_change_nothing(self, course):
+        bundle = bundles.export_bundle(course)
+        bundle["modules"][0]["title"] = "Renamed"
+        assert bundles.import_bundle(bundle, dry_run=True).updated["modules"] == 1
+        assert not Module.objects.filter(title="Renamed").exists()
+
+        bundle["modules"][0]["challenges"][0].update(
+            match_mode="regex", expected_output="git (init"
+        )
+        with pytest.raises(bundles.BundleError, match="regular expression"):
+            bundles.import_bundle(bundle)
+        assert not Module.objects.filter(title="Renamed").exists()
+
+    def test_renames_and_reorders_keep_learner_history(self, course, enrollment):
+        branch = Challenge.objects.get(prompt="branch")
+        submit_attempt(enrollment, branch, is_correct=True)
+        bundle = bundles.export_bundle(course)
+        first, second = bundle["modules"]
+        first["order"], second["order"] = 2, 1
+        second["challenges"][0]["title"] = "Create a branch"
+        # Move a challenge to the other module
+        second["challenges"].append(first["challenges"].pop())
+
+        result = bundles.import_bundle(bundle)
+
+        assert result.summary() == "2 modules updated, 2 challenges updated"
+        branch.refresh_from_db()
+        assert branch.title == "Create a branch"
+        assert branch.module.order == 1
+        assert Challenge.objects.get(prompt="status").module == branch.module
+        assert UserChallengeAttempt.objects.filter(challenge=branch).exists()
+
+    def test_refuses_to_delete_learner_history(self, course, enrollment):
+        branch = Challenge.objects.get(prompt="branch")
+        submit_attempt(enrollment, branch, is_correct=False)
+        bundle = bundles.export_bundle(course)
+        bundle["modules"].pop()
+
+        dry_run = bundles.import_bundle(bundle, dry_run=True)
+        assert dry_run.history == {
+            "attempts": 1,
+            "challenge progress rows": 1,
+            "module progress rows": 0,
+        }
+        assert "(deleting 1 attempts, 1 challenge progress rows)" in (dry_run.summary())
+        with pytest.raises(bundles.HistoryError, match="--allow-delete"):
+            bundles.import_bundle(bundle)
+        assert Challenge.objects.filter(pk=branch.pk).exists()
+
+        result = bundles.import_bundle(bundle, allow_delete=True)
+        assert result.deleted == {"modules": 1, "challenges": 1}
+        assert not UserChallengeAttempt.objects.exists()
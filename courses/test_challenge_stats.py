@@ -0,0 +1,89 @@
+import random
+import statistics
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+import pytest
+
+from courses import challenge_stats
+from courses.challenge_stats import P2Quantile
+from courses.models import ChallengeStats, Enrollment
+from courses.submission import submit_attempt
+
+User = get_user_model()
+
+
+def test_p2_median_tracks_the_exact_median():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(4, 0.7) for _ in range(20_000)]
+    sketch = P2Quantile()
+    for value in values[:3]:
+        sketch.add(value)
+    assert sketch.value() == statistics.median(values[:3])
+    for value in values[3:]:
+        # Survives a JSON roundtrip between observations, as in the database
+        sketch = P2Quantile(sketch.state)
+        sketch.add(value)
+    assert sketch.value() == pytest.approx(statistics.median(values), rel=0.03)
+
+
+@pytest.mark.django_db
+class TestChallengeStats:
+
+    def solve(self, course, challenge, username, tries, seconds=30):
+        user = User.objects.create_user(username=username)
+        enrollment = Enrollment.objects.create(user=user, course=course)
+        for n in range(tries):
+            submit_attempt(enrollment, challenge, n == tries - 1, seconds)
+
+    def test_attempts_update_the_stats_row(self, course, challenges):
+        challenge = challenges[0]
+        self.solve(course, challenge, "a", tries=1, seconds=20)
+        self.solve(course, challenge, "b", tries=3, seconds=20)
+        self.solve(course, challenge, "c", tries=2, seconds=20)
+
+        stats = ChallengeStats.objects.get(challenge=challenge)
+        assert (stats.attempts, stats.correct, stats.solvers) == (6, 3, 3)
+        assert (stats.first_tries, stats.first_try_correct) == (3, 1)
+        assert stats.median_solve_seconds == 40
+        assert challenge.total_attempts == 6
+        assert challenge.correct_attempts == 3
+
+        ChallengeStats.objects.all().delete()
+        assert challenge_stats.rebuild() == 3
+        rebuilt = ChallengeStats.objects.get(challenge=challenge)
+        assert (rebuilt.attempts, rebuilt.first_try_rate) == (6, pytest.approx(1 / 3))
+        assert rebuilt.median_solve_seconds == 40
+
+    def test_rebuild_overwrites_a_row_created_meanwhile(
+        self, course, challenges, monkeypatch
+    ):
+        challenge = challenges[0]
+        self.solve(course, challenge, "a", tries=2)
+        replay = challenge_stats._replay
+
+        def racing_replay(c, totals, solvers):
+            # A first attempt elsewhere inserts the row mid-rebuild
+            challenge_stats._ensure_row(c.pk)
+            return replay(c, totals, solvers)
+
+        monkeypatch.setattr(challenge_stats, "_replay", racing_replay)
+        assert challenge_stats.rebuild() == 3
+        rebuilt = ChallengeStats.objects.get(challenge=challenge)
+        assert (rebuilt.attempts, rebuilt.correct, rebuilt.solvers) == (2, 1, 1)
+
+    def test_admin_sorts_and_filters_by_first_try_success(
+        self, admin_client, course, challenges
+    ):
+        self.solve(course, challenges[0], "a", tries=1)
+        self.solve(course, challenges[1], "b", tries=4)
+        url = reverse("admin:courses_challenge_changelist")
+
+        response = admin_client.get(url, {"first_try": "low"})
+        assert list(response.context["cl"].result_list) == [challenges[1]]
+        response = admin_client.get(url, {"first_try": "none"})
+        assert list(response.context["cl"].result_list) == [challenges[2]]
+        response = admin_client.get(url, {"o": "-8"})
+        assert response.status_code == 200
+        assert list(response.context["cl"].result_list)[0] == challenges[0]
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+
+from courses import coaching
+from courses.models import Enrollment
+from courses.submission import submit_attempt
+
+User = get_user_model()
+
+
+@pytest.fixture
+def coach(course):
+    user = User.objects.create_user(username="coach", role="instructor")
+    course.instructors.add(user)
+    return user
+
+
+@pytest.mark.django_db
+class TestStuckSignals:
+
+    def test_failures_in_a_row_on_one_challenge(self, enrollment, challenges):
+        first, second = challenges[:2]
+        for _ in range(3):
+            submit_attempt(enrollment, first, False, 10)
+        enrollment.refresh_from_db()
+        assert enrollment.consecutive_failures == 3
+        assert enrollment.failing_challenge == first
+
+        submit_attempt(enrollment, second, False, 10)
+        enrollment.refresh_from_db()
+        assert enrollment.consecutive_failures == 1
+        assert enrollment.failing_challenge == second
+
+        submit_attempt(enrollment, second, True, 10)
+        enrollment.refresh_from_db()
+        assert enrollment.consecutive_failures == 0
+        assert enrollment.failing_challenge is None
+        assert enrollment.last_progress_at is not None
+
+    def test_breaking_a_streak_is_recorded(self, enrollment, challenges):
+        submit_attempt(enrollment, challenges[0], False, 10)
+        enrollment.refresh_from_db()
+        assert enrollment.streak_reset_at is None
+
+        submit_attempt(enrollment, challenges[0], True, 10)
+        submit_attempt(enrollment, challenges[1], False, 10)
+        enrollment.refresh_from_db()
+        assert enrollment.streak_reset_at is not None
+
+    def test_reasons_and_thresholds(self, course, enrollment, challenges):
+        for _ in range(2):
+            submit_attempt(enrollment, challenges[0], False, 10)
+        stuck, total = coaching.stuck_learners([course])
+        assert (stuck, total) == ([], 0)
+
+        stuck, total = coaching.stuck_learners(
+            [course], coaching.Thresholds(failures=2)
+        )
+        assert total == 1
+        assert stuck[0].reasons == ["failing"]
+
+        Enrollment.objects.filter(pk=enrollment.pk).update(
+            enrolled_at=timezone.now() - timedelta(days=30)
+        )
+        stuck, _ = coaching.stuck_learners([course])
+        assert stuck[0].reasons == ["inactive"]
+
+
+@pytest.mark.django_db
+class TestCoachDashboard:
+
+    def test_learners_are_refused(self, learner_client):
+        response = learner_client.get(reverse("courses:coach_dashboard"))
+        assert response.status_code == 403
+
+    def test_coach_sees_stuck_learners_and_failed_challenges(
+        self, client, coach, enrollment, challenges
+    ):
+        for _ in range(3):
+            submit_attempt(enrollment, challenges[1], False, 10)
+        client.force_login(coach)
+        response = client.get(reverse("courses:coach_dashboard"))
+        assert response.status_code == 200
+        [(_, most_failed)] = response.context["courses"]
+        assert [e.user.username for e in response.context["stuck"]] == ["learner"]
+        assert [s.challenge for s in most_failed] == [challenges[1]]
+        assert most_failed[0].failures == 3
+        assert b"3 failures in a row" in response.content
+
+    def test_queries_do_not_grow_with_learners(self, client, coach, course, challenges):
+        def count():
+            with CaptureQueriesContext(connection) as queries:
+                assert client.get(reverse("courses:coach_dashboard")).status_code == 200
+            return len(queries)
+
+        client.force_login(coach)
+        users = User.objects.bulk_create(User(username=f"peer-{i}") for i in range(20))
+        Enrollment.objects.bulk_create(
+            Enrollment(
+                user=user,
+                course=course,
+                consecutive_failures=5,
+                failing_challenge=challenges[i % 3],
+            )
+            for i, user in enumerate(users)
+        )
+        few = count()
+        more = User.objects.bulk_create(User(username=f"more-{i}") for i in range(40))
+        Enrollment.objects.bulk_create(
+            Enrollment(user=user, course=course, consecutive_failures=4)
+            for user in more
+        )
+        assert count() == few
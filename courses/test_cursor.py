@@ -0,0 +1,82 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import pytest
+
+from courses import structure
+from courses.models import Challenge, Module
+from courses.submission import submit_attempt
+
+
+@pytest.mark.django_db
+class TestLearningCenterCursor:
+
+    def test_cursor_advances_on_correct_attempt(self, enrollment, challenges):
+        """A first solve moves the cursor to the next unsolved challenge."""
+        submit_attempt(enrollment, challenges[0], True)
+        enrollment.refresh_from_db()
+        assert enrollment.next_challenge_id == challenges[1].id
+
+        submit_attempt(enrollment, challenges[1], False)
+        enrollment.refresh_from_db()
+        assert enrollment.next_challenge_id == challenges[1].id
+
+        submit_attempt(enrollment, challenges[1], True)
+        enrollment.refresh_from_db()
+        assert enrollment.next_challenge_id == challenges[2].id
+        assert enrollment.current_module.order == 2
+
+    def test_learning_center_queries_do_not_grow_with_history(
+        self, learner_client, enrollment, challenges, django_assert_max_num_queries
+    ):
+        """Opening the learning center costs the same after many attempts."""
+        url = reverse("courses:learning_center", args=["practical-git"])
+        learner_client.get(url)
+        with django_assert_max_num_queries(4) as fresh:
+            learner_client.get(url)
+
+        for _ in range(20):
+            submit_attempt(enrollment, challenges[0], False)
+        submit_attempt(enrollment, challenges[0], True)
+        with django_assert_max_num_queries(len(fresh)):
+            response = learner_client.get(url)
+        assert response.context["challenge"] == challenges[1]
+
+    def test_cursor_is_repaired_after_content_reorder(
+        self, learner_client, course, enrollment, challenges
+    ):
+        """Reordering modules invalidates the stored cursor lazily."""
+        url = reverse("courses:learning_center", args=["practical-git"])
+        learner_client.get(url)
+        enrollment.refresh_from_db()
+        assert enrollment.next_challenge_id == challenges[0].id
+
+        Module.objects.filter(course=course, order=1).update(order=3)
+        Module.objects.get(course=course, order=2).save()  # signals a content change
+
+        response = learner_client.get(url)
+        assert response.context["challenge"] == challenges[2]
+
+    def test_cursor_is_kept_by_other_workers(
+        self, monkeypatch, learner_client, enrollment, challenges
+    ):
+        """A worker with its own snapshot trusts a cursor stored by another."""
+        url = reverse("courses:learning_center", args=["practical-git"])
+        learner_client.get(url)
+        monkeypatch.setattr(structure, "_catalog", None)  # a fresh worker
+        with CaptureQueriesContext(connection) as queries:
+            response = learner_client.get(url)
+        assert response.context["challenge"] == challenges[0]
+        assert not [q for q in queries if q["sql"].startswith("UPDATE")]
+
+    def test_completed_course_redirects_to_dashboard(
+        self, learner_client, enrollment, challenges
+    ):
+        for challenge in Challenge.objects.all():
+            submit_attempt(enrollment, challenge, True)
+
+        url = reverse("courses:learning_center", args=["practical-git"])
+        response = learner_client.get(url)
+        assert response.status_code == 302
+        assert response.url == reverse("courses:dashboard")
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import pytest
+
+from accounts.models import OutboxEmail, Profile
+from courses import digest, structure
+from courses.models import Enrollment, UserChallengeAttempt
+from courses.submission import submit_attempt
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestWeeklyDigest:
+
+    def test_week_summary_and_next_step(self, learner, enrollment, challenges):
+        User.objects.filter(pk=learner.pk).update(email="learner@example.com")
+        submit_attempt(enrollment, challenges[0], False, 10)
+        submit_attempt(enrollment, challenges[0], True, 10)
+        submit_attempt(enrollment, challenges[1], True, 10)
+        old = submit_attempt(enrollment, challenges[2], False, 10).attempt
+        UserChallengeAttempt.objects.filter(pk=old.pk).update(
+            submitted_at=timezone.now() - timedelta(days=8)
+        )
+
+        [[week]] = list(digest.build())
+        assert (week.attempts, week.correct, week.xp) == (3, 2, 20)
+        assert week.modules_finished == 1
+        assert [(s.course, s.module) for s in week.next_steps] == [
+            ("Practical Git", "Branching")
+        ]
+        assert week.next_steps[0].url.endswith(
+            "/courses/practical-git/learning-center/"
+        )
+
+        subject, body = digest.render(week)
+        assert subject == "Your CodeQuest week"
+        assert "3 attempts, 2 correct, and earned 20 XP" in body
+        assert "You finished 1 module." in body
+        assert "Current streak: 1." in body
+        assert "- Branching (Practical Git): http" in body
+
+        # A streak that lapsed before the digest's week ends counts as none
+        [[later]] = list(digest.build(timezone.now() + timedelta(days=3)))
+        assert later.streak == 0
+
+    def test_rendered_in_the_learners_language(self, learner, enrollment):
+        User.objects.filter(pk=learner.pk).update(email="learner@example.com")
+        Profile.objects.filter(user=learner).update(preferred_language="ne")
+        [[week]] = list(digest.build())
+        subject, body = digest.render(week)
+        assert subject == "कोडक्वेस्टमा तपाईंको हप्ता"
+        assert "अर्को चरणहरू:\n- Basics (Practical Git)" in body
+        assert "/ne/courses/practical-git/" in body
+
+    def test_queues_once_per_week(self, course, learner, enrollment):
+        User.objects.filter(pk=learner.pk).update(email="learner@example.com")
+        # No email address, no digest
+        Enrollment.objects.create(user=User.objects.create_user("quiet"), course=course)
+        out = StringIO()
+        call_command("send_weekly_digest", stdout=out)
+        call_command("send_weekly_digest", stdout=StringIO())
+        assert "Queued 1 digest(s)." in out.getvalue()
+        email = OutboxEmail.objects.get()
+        assert email.to == ["learner@example.com"]
+        assert email.key == digest.week_key(learner.pk, timezone.now())
+
+    def test_queries_per_chunk_do_not_grow_with_learners(self, course, challenges):
+        def run():
+            with CaptureQueriesContext(connection) as queries:
+                count = digest.queue(chunk_size=50, dry_run=True)
+            return count, len(queries)
+
+        def add(prefix, n):
+            users = User.objects.bulk_create(
+                User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com")
+                for i in range(n)
+            )
+            Profile.objects.bulk_create(Profile(user=user) for user in users)
+            Enrollment.objects.bulk_create(
+                Enrollment(user=user, course=course) for user in users
+            )
+            UserChallengeAttempt.objects.bulk_create(
+                UserChallengeAttempt(user=user, challenge=challenges[0])
+                for user in users
+            )
+
+        add("a", 10)
+        structure.catalog()
+        few = run()
+        add("b", 30)
+        assert run() == (40, few[1])
@@ -0,0 +1,96 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+
+import pytest
+
+from accounts.models import Profile
+from courses.models import (
+    Challenge,
+    ChallengeProgress,
+    ChallengeStats,
+    Course,
+    Enrollment,
+    Module,
+    UserChallengeAttempt,
+)
+
+User = get_user_model()
+
+TINY = dict(
+    courses=2,
+    modules=2,
+    challenges=3,
+    users=6,
+    attempts=120,
+    user_batch=4,
+    end_date=date(2026, 1, 31),
+)
+
+
+def generate(**options):
+    call_command("generate_load_data", stdout=StringIO(), **{**TINY, **options})
+
+
+def snapshot():
+    """Generated rows by natural keys, so regenerated ids do not matter."""
+    return {
+        "users": sorted(User.objects.values_list("username", "id")),
+        "enrollments": sorted(
+            Enrollment.objects.values_list("user__username", "course__slug", "xp")
+        ),
+        "attempts": sorted(
+            UserChallengeAttempt.objects.values_list(
+                "user__username",
+                "challenge__module__course__slug",
+                "challenge__title",
+                "is_correct",
+                "submitted_at",
+                "attempt_no",
+                "time_seconds",
+            )
+        ),
+    }
+
+
+@pytest.mark.django_db
+class TestGenerateLoadData:
+
+    def test_tiny_dataset_has_the_requested_shape(self):
+        generate()
+
+        assert Course.objects.count() == 2
+        assert Module.objects.count() == 4
+        assert Challenge.objects.count() == 12
+        assert User.objects.count() == Profile.objects.count() == 6
+        attempts = UserChallengeAttempt.objects.count()
+        # Budgets are rounded down per user and per course
+        assert 100 <= attempts <= 120
+        assert (
+            ChallengeProgress.objects.aggregate(total=Sum("attempts"))["total"]
+            == attempts
+        )
+        assert (
+            ChallengeStats.objects.aggregate(total=Sum("attempts"))["total"] == attempts
+        )
+        assert (
+            Profile.objects.aggregate(total=Sum("xp"))["total"]
+            == Enrollment.objects.aggregate(total=Sum("xp"))["total"]
+        )
+
+    def test_same_seed_regenerates_the_same_rows(self):
+        generate()
+        first = snapshot()
+
+        with pytest.raises(CommandError, match="already generated"):
+            generate()
+        generate(purge=True)
+        assert snapshot() == first
+        assert Course.objects.count() == 2
+
+        generate(seed=2)
+        assert User.objects.count() == 12
@@ -0,0 +1,114 @@
+from django.core.exceptions import ValidationError
+
+import pytest
+
+from courses import grading
+from courses.models import Challenge
+
+
+def make(mode, expected, **extra):
+    challenge = Challenge(pk=1, match_mode=mode, expected_output=expected, **extra)
+    challenge.rules_hash = grading.rule_hash(challenge)
+    return challenge
+
+
+class TestEvaluators:
+
+    @pytest.mark.parametrize(
+        "mode, expected, answer, accepted",
+        [
+            ("exact", "git init", "  git init ", True),
+            ("exact", "git init", "git  init", False),
+            ("whitespace", "git   commit -m msg", "git commit\t-m msg", True),
+            ("regex", r"chmod (u\+x|744) script\.sh", "chmod 744 script.sh", True),
+            ("regex", r"chmod (u\+x|744) script\.sh", "chmod 777 script.sh", False),
+            ("tokens", "ls -la /tmp", "ls '/tmp' -a -l", True),
+            ("tokens", "ls -la /tmp", "ls -l /tmp", False),
+        ],
+    )
+    def test_match_modes(self, mode, expected, answer, accepted):
+        assert grading.evaluate(make(mode, expected), answer) is accepted
+
+    def test_any_of_accepts_every_listed_answer(self):
+        challenge = make(
+            "any_of",
+            "git switch -c feature",
+            accepted_answers=["git checkout -b feature"],
+        )
+        assert grading.evaluate(challenge, "git checkout  -b feature")
+        assert not grading.evaluate(challenge, "git branch feature")
+
+    def test_ignore_case(self):
+        assert grading.evaluate(
+            make("exact", "Fast-forward", ignore_case=True), "fast-FORWARD"
+        )
+
+    def test_matcher_is_compiled_once_per_rule_version(self, monkeypatch):
+        """Edits produce a new rules hash; unchanged rules reuse the cached matcher."""
+        calls = []
+        original = grading.EVALUATORS["exact"]
+        monkeypatch.setitem(
+            grading.EVALUATORS, "exact", lambda c: calls.append(c) or original(c)
+        )
+        challenge = make("exact", "v1")
+        challenge.pk = 987654
+        for _ in range(3):
+            assert grading.evaluate(challenge, "v1")
+        assert len(calls) == 1
+
+        challenge.expected_output = "v2"
+        challenge.rules_hash = grading.rule_hash(challenge)
+        assert grading.evaluate(challenge, "v2")
+        assert len(calls) == 2
+
+    def test_invalid_regex_rejects_answers_and_fails_validation(self):
+        challenge = make("regex", "([unclosed")
+        assert grading.evaluate(challenge, "([unclosed") is False
+        with pytest.raises(ValidationError):
+            challenge.clean()
+
+
+@pytest.mark.django_db
+def test_rules_hash_is_stored_on_save(challenges):
+    challenge = challenges[0]
+    before = challenge.rules_hash
+    challenge.match_mode = "whitespace"
+    challenge.save(update_fields=["match_mode"])
+    challenge.refresh_from_db()
+    assert challenge.rules_hash and challenge.rules_hash != before
+
+
+@pytest.mark.django_db
+def test_bulk_rule_updates_are_not_served_a_stale_matcher(challenges):
+    challenge = Challenge.objects.get(pk=challenges[0].pk)
+    assert grading.evaluate(challenge, "git init")
+    # QuerySet.update() skips save(); the queryset rehashes the rows itself
+    Challenge.objects.filter(expected_output="git init").update(
+        expected_output="git init -b main"
+    )
+    challenge = Challenge.objects.get(pk=challenge.pk)
+    assert challenge.rules_hash == grading.rule_hash(challenge)
+    assert grading.evaluate(challenge, "git init -b main")
+    assert not grading.evaluate(challenge, "git init")
+
+
+@pytest.mark.django_db
+def test_bulk_writes_store_the_rules_hash(challenges):
+    module = challenges[0].module
+    [created] = Challenge.objects.bulk_create(
+        [Challenge(module=module, prompt="log", expected_output="git log")]
+    )
+    created.refresh_from_db()
+    assert created.rules_hash == grading.rule_hash(created)
+
+    created.ignore_case = True
+    Challenge.objects.bulk_update([created], ["ignore_case"])
+    created.refresh_from_db()
+    assert created.rules_hash == grading.rule_hash(created)
+
+
+def test_cache_hits_do_not_rehash_the_rules(monkeypatch):
+    challenge = make("any_of", "a", accepted_answers=[f"w{i}" for i in range(100)])
+    assert grading.evaluate(challenge, "w5")
+    monkeypatch.setattr(grading, "rule_hash", lambda c: pytest.fail("rehashed"))
+    assert grading.evaluate(challenge, "w7")
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+
+from courses import grading, jobs, sandbox
+from courses.models import GradingJob, UserChallengeAttempt
+
+
+@pytest.fixture
+def sandbox_challenge(challenges):
+    challenge = challenges[0]
+    challenge.grader = grading.GRADER_SANDBOX
+    challenge.expected_output = "hello"
+    challenge.save()
+    return challenge
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    class Done:
+        def __init__(self, result):
+            self._result = result
+
+        def result(self):
+            return self._result
+
+    class FakePool:
+        def submit(self, snippet, setup_script=""):
+            output = snippet.removeprefix("echo ") + "\n"
+            return Done(sandbox.SandboxResult(output, 0, False, 0.0))
+
+    monkeypatch.setattr(sandbox, "get_pool", lambda: FakePool())
+
+
+@pytest.mark.django_db
+class TestGradingQueue:
+
+    def test_submission_is_queued_not_graded(
+        self, learner_client, enrollment, sandbox_challenge
+    ):
+        url = reverse("courses:attempt_challenge", args=[sandbox_challenge.pk])
+        response = learner_client.post(url, {"answer": "echo hello"})
+        job = GradingJob.objects.get()
+        assert response.url.endswith(f"?job={job.pk}")
+        assert job.status == GradingJob.PENDING
+        assert not UserChallengeAttempt.objects.exists()
+
+    def test_worker_records_verdict(
+        self, fake_pool, learner_client, enrollment, sandbox_challenge, challenges
+    ):
+        right = jobs.enqueue(enrollment, sandbox_challenge, "echo hello")
+        wrong = jobs.enqueue(enrollment, sandbox_challenge, "echo nope")
+        typed = jobs.enqueue(enrollment, challenges[1], "git status")
+
+        assert jobs.run_once(batch_size=10) == 3
+
+        for job in (right, wrong, typed):
+            job.refresh_from_db()
+            assert job.status == GradingJob.DONE
+        assert [right.attempt.attempt_no, wrong.attempt.attempt_no] == [1, 2]
+        enrollment.refresh_from_db()
+        assert enrollment.xp == 20
+
+        status = learner_client.get(
+            reverse("courses:grading_job_status", args=[right.pk])
+        ).json()
+        assert status["finished"] and status["is_correct"]
+        assert status["earned_xp"] == 10
+
+    def test_status_is_private(self, client, django_user_model, enrollment, challenges):
+        job = jobs.enqueue(enrollment, challenges[0], "git init")
+        client.force_login(django_user_model.objects.create_user("other"))
+        url = reverse("courses:grading_job_status", args=[job.pk])
+        assert client.get(url).status_code == 404
+
+    def test_expired_claims_are_requeued_once(self, fake_pool, enrollment, challenges):
+        job = jobs.enqueue(enrollment, challenges[0], "git init")
+        (stale,) = jobs.claim_batch(10)
+        GradingJob.objects.filter(pk=job.pk).update(
+            claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        assert jobs.requeue_expired(lease=60) == 1
+        assert jobs.run_once() == 1
+        # The original worker finishing late must not record a second attempt
+        assert jobs.process_batch([stale]) == 0
+        assert UserChallengeAttempt.objects.count() == 1
@@ -0,0 +1,122 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import pytest
+
+from courses import leaderboard
+from courses.models import Course, Enrollment, LeaderboardBucket
+
+User = get_user_model()
+
+
+def enroll(course, username, xp):
+    user = User.objects.create_user(username=username, password="password123")
+    enrollment = Enrollment.objects.create(user=user, course=course)
+    leaderboard.record_xp_change(enrollment, 0, xp)
+    Enrollment.objects.filter(pk=enrollment.pk).update(xp=xp)
+    enrollment.xp = xp
+    return enrollment
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+
+    def test_rank_counts_learners_with_more_xp(self, course):
+        """Ties share a rank and learners without XP come last."""
+        enroll(course, "alice", 50)
+        bob = enroll(course, "bob", 30)
+        carol = enroll(course, "carol", 30)
+        dave = enroll(course, "dave", 0)
+
+        ranks = leaderboard.ranks([bob, carol, dave])
+        assert ranks == {bob.pk: 2, carol.pk: 2, dave.pk: 4}
+
+    def test_correct_attempt_updates_rank_and_top(
+        self,
+        learner_client,
+        enrollment,
+        challenges,
+        course,
+        django_capture_on_commit_callbacks,
+    ):
+        """A correct answer moves the learner up and refreshes the cached top list."""
+        enroll(course, "alice", 5)
+        assert leaderboard.standings([enrollment])[course.pk]["rank"] == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            learner_client.post(
+                reverse("courses:attempt_challenge", args=[challenges[0].id]),
+                {"answer": "git init"},
+            )
+        enrollment.refresh_from_db()
+
+        standing = leaderboard.standings([enrollment])[course.pk]
+        assert standing["rank"] == 1
+        assert standing["top"][0]["enrollment_id"] == enrollment.pk
+
+    def test_standings_show_the_neighbouring_scores(self, client, course):
+        """The scores just above and below come from the buckets."""
+        enroll(course, "alice", 80)
+        enroll(course, "bob", 50)
+        carol = enroll(course, "carol", 30)
+        dave = enroll(course, "dave", 10)
+        # Moved away: an empty bucket is nobody's score
+        leaderboard.record_xp_change(enroll(course, "erin", 40), 40, 90)
+
+        standing = leaderboard.standings([carol])[course.pk]
+        assert (standing["rank"], standing["next_xp"], standing["xp_to_next"]) == (
+            4,
+            50,
+            20,
+        )
+        assert standing["previous_xp"] == 10
+        assert leaderboard.standings([dave])[course.pk]["previous_xp"] is None
+
+        client.force_login(carol.user)
+        response = client.get(reverse("courses:dashboard"))
+        assert "20 XP to reach 50 XP" in response.content.decode()
+
+    def test_standings_queries_do_not_grow_with_courses(self, learner, course):
+        """Standings cost the same number of queries for one or many courses."""
+        enrollments = [Enrollment.objects.create(user=learner, course=course)]
+        leaderboard.standings(enrollments)
+        with CaptureQueriesContext(connection) as single:
+            leaderboard.standings(enrollments)
+
+        for i in range(3):
+            other = Course.objects.create(title=f"Course {i}", slug=f"course-{i}")
+            enrollments.append(Enrollment.objects.create(user=learner, course=other))
+        leaderboard.standings(enrollments)
+        with CaptureQueriesContext(connection) as many:
+            leaderboard.standings(enrollments)
+
+        assert len(many) == len(single) == 1
+
+    def test_rebuild_leaderboards_command(self, course):
+        """The rebuild command restores buckets from enrollment XP."""
+        enroll(course, "alice", 50)
+        enroll(course, "bob", 50)
+        LeaderboardBucket.objects.all().delete()
+
+        call_command("rebuild_leaderboards", stdout=StringIO())
+
+        bucket = LeaderboardBucket.objects.get(course=course)
+        assert (bucket.xp, bucket.learners) == (50, 2)
+
+    def test_rebuild_corrects_buckets_in_place(self, course):
+        alice = enroll(course, "alice", 50)
+        enroll(course, "bob", 30)
+        kept = LeaderboardBucket.objects.get(course=course, xp=30)
+        LeaderboardBucket.objects.filter(pk=kept.pk).update(learners=7)
+        LeaderboardBucket.objects.create(course=course, xp=99, learners=1)
+        Enrollment.objects.filter(pk=alice.pk).update(xp=30)
+
+        assert leaderboard.rebuild([course.id]) == 1
+        assert list(LeaderboardBucket.objects.values_list("pk", "xp", "learners")) == [
+            (kept.pk, 30, 2)
+        ]
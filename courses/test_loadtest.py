@@ -0,0 +1,96 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+import pytest
+
+from courses import rollups
+from courses.management.commands.loadtest import percentile
+from courses.models import ChallengeStats, DailyChallengeRollup
+from courses.submission import submit_attempt
+
+User = get_user_model()
+
+
+def run(**options):
+    out = StringIO()
+    call_command("loadtest", users=2, journeys=1, concurrency=1, stdout=out, **options)
+    return out.getvalue()
+
+
+def rescale(baseline_path, p95_ms):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    for row in baseline["endpoints"].values():
+        row["p95_ms"] = p95_ms
+    with open(baseline_path, "w") as baseline_file:
+        json.dump(baseline, baseline_file)
+
+
+@pytest.mark.parametrize(
+    "values, q, expected",
+    [
+        (list(range(1, 11)), 50, 5),
+        (list(range(1, 7)), 50, 3),
+        (list(range(1, 11)), 95, 10),
+        (list(range(1, 101)), 99, 99),
+        ([7], 1, 7),
+        ([], 50, None),
+    ],
+)
+def test_percentile_is_nearest_rank(values, q, expected):
+    assert percentile(values, q) == expected
+
+
+# The journeys run in worker threads with their own connections
+@pytest.mark.django_db(transaction=True)
+class TestLoadtest:
+
+    def test_journeys_are_reported_and_saved(self, course, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        output = run(output=str(baseline))
+
+        assert "requests/s" in output
+        results = json.loads(baseline.read_text())
+        for name, row in results["endpoints"].items():
+            assert (row["requests"], row["errors"]) == (2, 0), name
+            assert row["queries_per_request"] > 0
+        assert not User.objects.filter(username__startswith="loadtest-").exists()
+        assert not ChallengeStats.objects.exclude(attempts=0).exists()
+
+    def test_synthetic_attempts_leave_no_trace_in_the_stats(
+        self, course, enrollment, challenges
+    ):
+        submit_attempt(enrollment, challenges[0], True, 30)
+        rollups.roll_up(settle_seconds=0)
+        run()
+        rollups.roll_up(settle_seconds=0)
+
+        stats = ChallengeStats.objects.get(challenge=challenges[0])
+        assert (stats.attempts, stats.correct, stats.solvers) == (1, 1, 1)
+        assert list(
+            DailyChallengeRollup.objects.exclude(attempts=0).values_list(
+                "challenge_id", "attempts"
+            )
+        ) == [(challenges[0].pk, 1)]
+
+    def test_compare_passes_within_the_allowed_regression(self, course, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        run(output=str(baseline))
+        rescale(baseline, 10**6)
+
+        output = run(compare=str(baseline), max_regression=10)
+        assert "Compared with" in output
+        assert "p95 1000000.0 ->" in output
+
+    def test_regressions_fail_the_command(self, course, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        run(output=str(baseline))
+        rescale(baseline, 0.001)
+
+        run(compare=str(baseline))  # only reported without --max-regression
+        with pytest.raises(CommandError, match="p95 regressed by more than 10%"):
+            run(compare=str(baseline), max_regression=10)
@@ -0,0 +1,59 @@
+import random
+
+from django.contrib.auth import get_user_model
+
+import pytest
+
+from courses import mastery
+from courses.models import Enrollment
+from courses.submission import submit_attempt
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestMastery:
+
+    def test_attempts_move_ratings_towards_the_outcome(
+        self, tagged, enrollment, challenges
+    ):
+        submit_attempt(enrollment, challenges[0], True)
+        assert set(enrollment.mastery) == {"init", "status"}
+        assert enrollment.mastery["init"] > 0
+
+        submit_attempt(enrollment, challenges[2], False)
+        enrollment.refresh_from_db()
+        assert enrollment.mastery["branch"] < 0
+        # Failing a hard challenge costs less than failing an easy one
+        easy_miss = mastery.update({}, ["x"], mastery.DIFFICULTY["easy"], False)
+        assert easy_miss["x"] < enrollment.mastery["branch"]
+
+    def test_untagged_modules_leave_mastery_alone(self, enrollment, challenges):
+        submit_attempt(enrollment, challenges[0], True)
+        enrollment.refresh_from_db()
+        assert enrollment.mastery == {}
+
+    def test_recompute_matches_the_incremental_path(self, tagged, challenges):
+        rng = random.Random(7)
+        enrollments = [
+            Enrollment.objects.create(
+                user=User.objects.create_user(username=f"learner-{i}"), course=tagged
+            )
+            for i in range(4)
+        ]
+        for _ in range(60):
+            submit_attempt(
+                rng.choice(enrollments), rng.choice(challenges), rng.random() < 0.6
+            )
+        incremental = {
+            e.pk: e.mastery for e in Enrollment.objects.filter(course=tagged)
+        }
+        Enrollment.objects.update(mastery={})
+
+        assert mastery.recompute(tagged.id, batch_size=3) == 4
+
+        for enrollment in Enrollment.objects.filter(course=tagged):
+            expected = incremental[enrollment.pk]
+            assert enrollment.mastery.keys() == expected.keys()
+            for skill, rating in expected.items():
+                assert enrollment.mastery[skill] == pytest.approx(rating)
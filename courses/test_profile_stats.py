@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+
+from accounts.models import Profile
+from courses import profile_stats
+from courses.models import Enrollment
+from courses.submission import submit_attempt
+
+
+@pytest.mark.django_db
+class TestProfileStats:
+
+    def test_attempts_write_through_to_the_profile(
+        self, learner, enrollment, challenges
+    ):
+        submit_attempt(enrollment, challenges[0], True)
+        submit_attempt(enrollment, challenges[0], True)
+        submit_attempt(enrollment, challenges[2], True)
+
+        profile = Profile.objects.get(user=learner)
+        assert profile.xp == 10 + 10 + 20
+        assert profile.completed_challenges == 2
+        # A day streak: every attempt was made today
+        assert profile.current_streak == 1
+        assert profile.last_active is not None
+
+        submit_attempt(enrollment, challenges[1], False)
+        profile.refresh_from_db()
+        assert profile.current_streak == 1
+        assert profile_stats.rebuild() == 0
+
+    def test_deleting_an_enrollment_takes_its_totals_off(
+        self, learner, enrollment, challenges
+    ):
+        submit_attempt(enrollment, challenges[0], True)
+        Enrollment.objects.filter(pk=enrollment.pk).delete()
+
+        profile = Profile.objects.get(user=learner)
+        assert (profile.xp, profile.completed_challenges) == (0, 0)
+        # The day was still active
+        assert profile.current_streak == 1
+
+    def test_reconcile_repairs_drift(self, learner, enrollment, challenges):
+        submit_attempt(enrollment, challenges[0], True)
+        Profile.objects.filter(user=learner).update(xp=999, completed_challenges=0)
+
+        out = StringIO()
+        call_command("reconcile_profiles", stdout=out)
+
+        assert "1 repaired" in out.getvalue()
+        profile = Profile.objects.get(user=learner)
+        assert (profile.xp, profile.completed_challenges) == (10, 1)
+
+    def test_profile_page_reads_the_profile_row(
+        self, learner, learner_client, enrollment, challenges, django_assert_num_queries
+    ):
+        submit_attempt(enrollment, challenges[0], True)
+        # session, user with profile, and the enrollment list
+        with django_assert_num_queries(3):
+            response = learner_client.get(reverse("profile"))
+        assert response.context["total_xp"] == 10
+        assert response.context["total_challenges"] == 1
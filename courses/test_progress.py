@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+
+import pytest
+
+from courses.models import ChallengeProgress, Enrollment, ModuleProgress
+
+
+def submit(client, challenge, answer):
+    url = reverse("courses:attempt_challenge", args=[challenge.id])
+    return client.post(url, {"answer": answer, "time_seconds": 30})
+
+
+@pytest.mark.django_db
+class TestIncrementalProgress:
+
+    def test_progress_advances_per_completed_module(
+        self, learner_client, enrollment, challenges
+    ):
+        """Progress only moves once every challenge in a module is solved."""
+        submit(learner_client, challenges[0], "git init")
+        enrollment.refresh_from_db()
+        assert enrollment.progress == 0
+
+        submit(learner_client, challenges[1], "git status")
+        enrollment.refresh_from_db()
+        assert enrollment.completed_modules == 1
+        assert enrollment.progress == 50
+
+        submit(learner_client, challenges[2], "git branch")
+        enrollment.refresh_from_db()
+        assert enrollment.progress == 100
+
+    def test_repeat_correct_answers_are_counted_once(
+        self, learner_client, enrollment, challenges
+    ):
+        """Solving the same challenge twice does not inflate the counters."""
+        submit(learner_client, challenges[0], "wrong")
+        submit(learner_client, challenges[0], "git init")
+        submit(learner_client, challenges[0], "git init")
+
+        module_progress = ModuleProgress.objects.get(enrollment=enrollment)
+        assert module_progress.solved_count == 1
+        assert not module_progress.is_complete
+        assert ChallengeProgress.objects.get(
+            enrollment=enrollment, challenge=challenges[0]
+        ).is_solved
+
+    def test_reconcile_progress_rebuilds_from_attempt_log(
+        self, learner_client, enrollment, challenges
+    ):
+        """The reconcile command repairs counters that drifted from the log."""
+        submit(learner_client, challenges[2], "git branch")
+        ModuleProgress.objects.all().delete()
+        Enrollment.objects.filter(pk=enrollment.pk).update(
+            progress=0, completed_modules=0
+        )
+
+        out = StringIO()
+        call_command("reconcile_progress", stdout=out)
+
+        enrollment.refresh_from_db()
+        assert "Reconciled 1 enrollment(s)." in out.getvalue()
+        assert enrollment.completed_modules == 1
+        assert enrollment.progress == 50
+        assert ModuleProgress.objects.get(enrollment=enrollment).is_complete
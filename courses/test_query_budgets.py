@@ -0,0 +1,260 @@
+"""Query budgets for every view in ``courses.urls`` and ``accounts.urls``.
+
+Each view is requested against a small and a scaled synthetic dataset. A test
+fails when the view runs more queries than its budget, or when the number of
+queries differs between the two scales (an N+1 over enrollments, modules or
+attempts). Set ``QUERY_BUDGET_REPORT=<path>`` to append the measured query
+count and SQL time per view as JSON lines.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Callable
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+import pytest
+
+import accounts.urls
+import courses.urls
+from courses import challenge_stats, jobs, rollups, structure
+from courses.models import (
+    Challenge,
+    Course,
+    Enrollment,
+    Module,
+    UserChallengeAttempt,
+)
+
+User = get_user_model()
+
+SMALL, LARGE = 1, 4
+
+
+@dataclass
+class Dataset:
+    learner: object
+    course: Course
+    challenge: Challenge
+    other_course: Course
+    job: object
+
+
+def build_dataset(scale, tag):
+    """Courses, modules, peers and attempts that all grow with ``scale``."""
+    learner = User.objects.create_user(username=f"learner-{tag}", password="pw")
+    peers = [
+        User.objects.create_user(username=f"peer-{tag}-{i}") for i in range(3 * scale)
+    ]
+    courses = Course.objects.bulk_create(
+        Course(title=f"Course {tag} {i}", slug=f"course-{tag}-{i}")
+        for i in range(scale + 1)
+    )
+    modules = Module.objects.bulk_create(
+        Module(course=course, title=f"Module {i}", order=i, points=10)
+        for course in courses
+        for i in range(2 * scale)
+    )
+    challenges = Challenge.objects.bulk_create(
+        Challenge(module=module, prompt=f"say {i}", expected_output=f"answer {i}")
+        for module in modules
+        for i in range(2)
+    )
+    structure.bump_generation()
+
+    enrolled = courses[:-1]
+    Enrollment.objects.bulk_create(
+        Enrollment(
+            user=user,
+            course=course,
+            xp=10 * i,
+            consecutive_failures=3 * (i % 2),
+            failing_challenge=challenges[0] if i % 2 else None,
+        )
+        for course in enrolled
+        for i, user in enumerate([learner, *peers])
+    )
+    UserChallengeAttempt.objects.bulk_create(
+        UserChallengeAttempt(
+            user=learner,
+            challenge=challenge,
+            attempt_no=n + 1,
+            is_correct=n == scale - 1,
+            time_seconds=30,
+        )
+        for challenge in challenges
+        if challenge.module.course in enrolled
+        for n in range(scale)
+    )
+    rollups.roll_up(settle_seconds=0)
+    challenge_stats.rebuild()
+    course = enrolled[0]
+    challenge = next(c for c in challenges if c.module.course == course)
+    enrollment = Enrollment.objects.get(user=learner, course=course)
+    return Dataset(
+        learner=learner,
+        course=course,
+        challenge=challenge,
+        other_course=courses[-1],
+        job=jobs.enqueue(enrollment, challenge, "answer 0"),
+    )
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    budget: int
+    urlconf: object
+    prefix: str
+    kwargs: Callable = lambda data: {}
+    method: str = "get"
+    payload: Callable = lambda data: {}
+    login: str = "learner"  # "learner", "coach", "admin" or "" for anonymous
+    # Idempotent views are requested once to warm caches before measuring.
+    warm: bool = True
+
+    def url(self, data):
+        if self.urlconf is None:
+            return reverse(self.name, kwargs=self.kwargs(data))
+        path = reverse(self.name, urlconf=self.urlconf, kwargs=self.kwargs(data))
+        return reverse("home") + self.prefix + path.lstrip("/")
+
+
+COURSES = dict(urlconf=courses.urls, prefix="courses/")
+ACCOUNTS = dict(urlconf=accounts.urls, prefix="accounts/")
+
+CASES = [
+    Case("home_redirect", 3, **COURSES),
+    Case("dashboard", 5, **COURSES),
+    Case("coach_dashboard", 5, login="coach", **COURSES),
+    Case("course_detail", 3, kwargs=lambda d: {"slug": d.course.slug}, **COURSES),
+    Case(
+        "enroll",
+        8,
+        kwargs=lambda d: {"slug": d.other_course.slug},
+        warm=False,
+        **COURSES,
+    ),
+    Case(
+        "learning_center",
+        4,
+        kwargs=lambda d: {"slug": d.course.slug},
+        **COURSES,
+    ),
+    Case(
+        "export_progress",
+        5,
+        kwargs=lambda d: {"slug": d.course.slug},
+        login="coach",
+        **COURSES,
+    ),
+    Case(
+        "attempt_challenge",
+        35,
+        kwargs=lambda d: {"challenge_id": d.challenge.pk},
+        method="post",
+        payload=lambda d: {"answer": "answer 0", "time_seconds": "5"},
+        warm=False,
+        **COURSES,
+    ),
+    Case(
+        "grading_job_status",
+        3,
+        kwargs=lambda d: {"job_id": d.job.pk},
+        **COURSES,
+    ),
+    Case(
+        "register",
+        16,
+        method="post",
+        payload=lambda d: {
+            "username": f"new-{d.learner.username}",
+            "email": f"new-{d.learner.username}@example.com",
+            "password1": "StrongPassword123!",
+            "password2": "StrongPassword123!",
+        },
+        login="",
+        warm=False,
+        **ACCOUNTS,
+    ),
+    Case("login", 0, login="", **ACCOUNTS),
+    Case("logout", 4, method="post", warm=False, **ACCOUNTS),
+    Case("dashboard", 4, **ACCOUNTS),
+    Case("profile", 3, **ACCOUNTS),
+    # Admin changelists for the courses app, where list_display N+1s hide
+    Case("admin:courses_course_changelist", 5, None, "", login="admin"),
+    Case("admin:courses_challenge_changelist", 7, None, "", login="admin"),
+    Case("admin:courses_module_changelist", 6, None, "", login="admin"),
+    Case("admin:courses_enrollment_changelist", 6, None, "", login="admin"),
+    Case("admin:courses_userchallengeattempt_changelist", 6, None, "", login="admin"),
+    Case("admin:courses_gradingjob_changelist", 5, None, "", login="admin"),
+]
+
+
+def measure(client, case, scale, tag):
+    data = build_dataset(scale, tag)
+    if case.login == "learner":
+        client.force_login(data.learner)
+    elif case.login == "coach":
+        coach = User.objects.create_user(f"coach-{tag}", role="instructor")
+        coach.taught_courses.set(
+            Course.objects.filter(slug__startswith=f"course-{tag}-")
+        )
+        client.force_login(coach)
+    elif case.login == "admin":
+        client.force_login(
+            User.objects.create_superuser(f"admin-{tag}", f"admin-{tag}@x.io", "pw")
+        )
+    url = case.url(data)
+    send = getattr(client, case.method)
+    if case.warm:
+        send(url, case.payload(data))
+    else:
+        structure.catalog()
+    with CaptureQueriesContext(connection) as ctx:
+        response = send(url, case.payload(data))
+        if response.streaming:
+            b"".join(response.streaming_content)
+    assert response.status_code < 400, (case.name, response.status_code)
+    client.logout()
+    return {
+        "view": f"{case.prefix}{case.name}",
+        "scale": scale,
+        "queries": len(ctx.captured_queries),
+        "sql_ms": round(sum(float(q["time"]) for q in ctx.captured_queries) * 1000, 2),
+    }
+
+
+def report(results):
+    path = os.environ.get("QUERY_BUDGET_REPORT")
+    if path:
+        with open(path, "a") as out:
+            for result in results:
+                out.write(json.dumps(result) + "\n")
+
+
+def test_every_url_has_a_budget():
+    declared = {(case.urlconf, case.name) for case in CASES}
+    for urlconf in (courses.urls, accounts.urls):
+        for pattern in urlconf.urlpatterns:
+            if isinstance(pattern, URLPattern):
+                assert (urlconf, pattern.name) in declared, pattern.name
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.prefix + case.name)
+def test_query_budget(client, settings, case):
+    settings.DEBUG = True  # record SQL timings
+    small = measure(client, case, SMALL, "s")
+    large = measure(client, case, LARGE, "l")
+    report([small, large])
+
+    assert large["queries"] <= case.budget, large
+    assert small["queries"] == large["queries"], (
+        f"{case.name}: query count grows with the dataset "
+        f"({small['queries']} -> {large['queries']})"
+    )
@@ -0,0 +1,64 @@
+from django.urls import reverse
+
+import pytest
+
+from courses import progress, recommendations
+from courses.recommendations import Candidate
+from courses.submission import submit_attempt
+
+
+def candidate(pk, level):
+    difficulty = {"easy": -1.0, "medium": 0.0, "hard": 1.0}[level]
+    return Candidate(pk, 1, f"Challenge {pk}", difficulty, level)
+
+
+INDEX = {
+    "merge": (candidate(1, "easy"), candidate(2, "medium"), candidate(3, "hard")),
+    "rebase": (candidate(3, "hard"),),
+}
+
+
+class TestRank:
+
+    def test_new_skills_start_with_easy_challenges(self):
+        top = recommendations.rank(INDEX, {}, k=2)
+        assert [r.challenge_id for r in top] == [1, 2]
+        assert top[0].reason.startswith("Introduces merge")
+
+    def test_strong_learners_are_pointed_at_harder_challenges(self):
+        top = recommendations.rank(INDEX, {"merge": 2.0, "rebase": 2.5}, k=1)
+        assert top[0].challenge_id == 3
+        assert top[0].skill == "merge"
+        assert "mastery 88%" in top[0].reason
+
+    def test_solved_challenges_are_skipped(self):
+        top = recommendations.rank(INDEX, {}, exclude={1, 2})
+        assert [r.challenge_id for r in top] == [3]
+
+
+@pytest.mark.django_db
+class TestForEnrollment:
+
+    def test_cached_until_mastery_moves(
+        self, tagged, enrollment, challenges, django_assert_num_queries
+    ):
+        progress.move_cursor(enrollment)
+        first = recommendations.for_enrollment(enrollment)
+        assert enrollment.next_challenge_id not in {r.challenge_id for r in first}
+        with django_assert_num_queries(0):
+            assert recommendations.for_enrollment(enrollment) == first
+
+        submit_attempt(enrollment, challenges[1], False)
+        updated = recommendations.for_enrollment(enrollment)
+        assert updated != first
+        # The failed challenge comes first, now explained by the learner's mastery
+        assert updated[0].challenge_id == challenges[1].pk
+        assert not updated[0].new_skill
+
+    def test_learning_center_shows_reasons(self, tagged, enrollment, learner_client):
+        response = learner_client.get(
+            reverse("courses:learning_center", args=[tagged.slug])
+        )
+        assert response.status_code == 200
+        assert response.context["recommendations"]
+        assert b"Recommended Next" in response.content
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import pytest
+
+from courses import reports, rollups
+from courses.models import Enrollment
+from courses.submission import submit_attempt
+
+User = get_user_model()
+
+
+@pytest.fixture
+def coach(course):
+    user = User.objects.create_user(username="coach", role="instructor")
+    course.instructors.add(user)
+    return user
+
+
+def test_headings_follow_languages(settings):
+    assert reports.headings()[0] == "Learner / सिकारु"
+    settings.LANGUAGES = [("en", "English")]
+    assert reports.headings()[0] == "Learner"
+
+
+@pytest.mark.django_db
+class TestProgressExport:
+
+    def test_rows_include_rolled_up_and_recent_attempts(
+        self, course, enrollment, challenges
+    ):
+        submit_attempt(enrollment, challenges[0], False, 30)
+        submit_attempt(enrollment, challenges[0], True, 60)
+        rollups.roll_up(settle_seconds=0)
+        submit_attempt(enrollment, challenges[1], True, 90)
+
+        [row] = reports.progress_rows([course.id])
+        assert row["learner"] == "learner"
+        assert row["course"] == course.slug
+        assert (row["attempts"], row["correct"], row["minutes"]) == (3, 2, 3.0)
+        assert row["xp"] == Enrollment.objects.get().xp
+
+    def test_coach_streams_csv(self, client, coach, course, enrollment):
+        client.force_login(coach)
+        url = reverse("courses:export_progress", args=[course.slug])
+        response = client.get(url)
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv"
+        text = b"".join(response.streaming_content).decode("utf-8-sig")
+        header, row = list(csv.reader(io.StringIO(text)))
+        assert header == reports.headings()
+        assert row[:2] == ["learner", course.slug]
+
+        response = client.get(url, {"format": "jsonl"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line)["learner"] for line in lines] == ["learner"]
+
+    def test_learners_and_other_instructors_are_refused(self, client, learner, course):
+        url = reverse("courses:export_progress", args=[course.slug])
+        client.force_login(learner)
+        assert client.get(url).status_code == 403
+        other = User.objects.create_user(username="other", role="instructor")
+        client.force_login(other)
+        assert client.get(url).status_code == 403
+
+    def test_queries_do_not_grow_with_the_cohort(self, course):
+        def export():
+            with CaptureQueriesContext(connection) as queries:
+                rows = list(reports.progress_rows([course.id], chunk_size=10))
+            return len(rows), len(queries)
+
+        users = User.objects.bulk_create(User(username=f"u{i}") for i in range(25))
+        Enrollment.objects.bulk_create(
+            Enrollment(user=user, course=course) for user in users
+        )
+        assert export() == (25, 1)
+
+    def test_command_writes_a_file(self, tmp_path, course, enrollment):
+        path = tmp_path / "progress.jsonl"
+        out = io.StringIO()
+        call_command("export_progress", course.slug, "-o", str(path), stdout=out)
+        assert "Exported 1 row(s)" in out.getvalue()
+        assert json.loads(path.read_text())["course"] == course.slug
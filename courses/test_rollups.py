@@ -0,0 +1,116 @@
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+
+from courses import rollups
+from courses.models import (
+    ChallengeProgress,
+    DailyEnrollmentRollup,
+    UserChallengeAttempt,
+)
+
+
+def submit(client, challenge, answer, seconds=90):
+    url = reverse("courses:attempt_challenge", args=[challenge.id])
+    client.post(url, {"answer": answer, "time_seconds": seconds})
+
+
+def totals(enrollment, challenge):
+    return (
+        enrollment.total_attempts,
+        enrollment.total_minutes_spent,
+        challenge.total_attempts,
+        challenge.correct_attempts,
+    )
+
+
+@pytest.mark.django_db
+class TestAttemptRollups:
+
+    def test_totals_survive_rollup_and_archival(
+        self, tmp_path, learner_client, enrollment, challenges
+    ):
+        submit(learner_client, challenges[0], "wrong")
+        submit(learner_client, challenges[0], "git init")
+        UserChallengeAttempt.objects.update(
+            submitted_at=timezone.now() - timedelta(days=400)
+        )
+        submit(learner_client, challenges[0], "git init")
+        before = totals(enrollment, challenges[0])
+        assert before == (3, 4, 3, 2)
+
+        assert rollups.roll_up(settle_seconds=0) == 3
+        assert DailyEnrollmentRollup.objects.count() == 2
+        assert totals(enrollment, challenges[0]) == before
+
+        call_command(
+            "archive_attempts", days=365, output_dir=str(tmp_path), stdout=StringIO()
+        )
+        assert UserChallengeAttempt.objects.count() == 1
+        assert totals(enrollment, challenges[0]) == before
+
+        (archive,) = tmp_path.glob("attempts-*.jsonl.gz")
+        with gzip.open(archive, "rt") as lines:
+            rows = [json.loads(line) for line in lines]
+        assert [row["is_correct"] for row in rows] == [False, True]
+
+    def test_unrolled_attempts_are_not_archived(
+        self, tmp_path, learner_client, enrollment, challenges
+    ):
+        submit(learner_client, challenges[0], "git init")
+        UserChallengeAttempt.objects.update(
+            submitted_at=timezone.now() - timedelta(days=400)
+        )
+        call_command(
+            "archive_attempts", days=365, output_dir=str(tmp_path), stdout=StringIO()
+        )
+        assert UserChallengeAttempt.objects.count() == 1
+
+    def test_totals_cost_one_query(
+        self, django_assert_num_queries, learner_client, enrollment, challenges
+    ):
+        for _ in range(3):
+            submit(learner_client, challenges[0], "git init")
+        rollups.roll_up(settle_seconds=0)
+        submit(learner_client, challenges[1], "git status")
+        with django_assert_num_queries(1):
+            assert enrollment.total_attempts == 4
+
+    def test_reconcile_keeps_archived_solves(
+        self, tmp_path, learner_client, enrollment, challenges
+    ):
+        submit(learner_client, challenges[0], "git init")
+        submit(learner_client, challenges[1], "git status")
+        UserChallengeAttempt.objects.update(
+            submitted_at=timezone.now() - timedelta(days=400)
+        )
+        rollups.roll_up(settle_seconds=0)
+        call_command(
+            "archive_attempts", days=365, output_dir=str(tmp_path), stdout=StringIO()
+        )
+
+        call_command("reconcile_progress", stdout=StringIO())
+        enrollment.refresh_from_db()
+        assert enrollment.completed_modules == 1
+        assert ChallengeProgress.objects.filter(is_solved=True).count() == 2
+
+    def test_deleted_attempts_leave_the_challenge_rollups(
+        self, learner_client, enrollment, challenges
+    ):
+        submit(learner_client, challenges[0], "wrong")
+        submit(learner_client, challenges[0], "git init")
+        rollups.roll_up(settle_seconds=0)
+        submit(learner_client, challenges[0], "git init")
+        first = UserChallengeAttempt.objects.order_by("id").first()
+
+        attempts = UserChallengeAttempt.objects.exclude(pk=first.pk)
+        assert rollups.delete_attempts(attempts) == 2
+        remaining = rollups.challenge_totals(challenges[0])
+        assert (remaining["attempts"], remaining["correct"]) == (1, 0)
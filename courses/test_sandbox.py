@@ -0,0 +1,92 @@
+from django.urls import reverse
+
+import pytest
+
+from courses import grading, sandbox
+from courses.models import UserChallengeAttempt
+
+
+@pytest.fixture
+def pool():
+    pool = sandbox.SandboxPool(
+        workers=1, max_queue=0, limits=sandbox.Limits(timeout=1.0, cpu_seconds=1)
+    )
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def shared_pool(monkeypatch, pool):
+    monkeypatch.setattr(sandbox, "_pool", pool)
+    return pool
+
+
+class TestSandbox:
+
+    def test_runs_in_a_fresh_directory_with_setup(self, pool):
+        result = pool.run("ls && cat notes.txt", setup_script="echo hi > notes.txt")
+        assert result.stdout == "notes.txt\nhi\n"
+        assert result.exit_code == 0
+        assert pool.run("ls").stdout == ""
+
+    def test_timeout_kills_the_snippet(self, pool):
+        result = pool.run("sleep 5; echo late")
+        assert result.timed_out
+        assert "late" not in result.stdout
+        assert pool.stats()["timeouts"] == 1
+
+    def test_rejects_when_queue_is_full(self, pool):
+        running = pool.submit("sleep 0.5")
+        with pytest.raises(sandbox.SandboxBusy):
+            pool.submit("echo hi")
+        running.result()
+        stats = pool.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 1
+        assert pool.run("echo again").stdout == "again\n"
+
+    def test_oversized_output_is_cut_off_early(self):
+        limits = sandbox.Limits(timeout=5.0, max_output_bytes=1000)
+        pool = sandbox.SandboxPool(workers=1, max_queue=0, limits=limits)
+        try:
+            result = pool.run("yes")
+        finally:
+            pool.shutdown()
+        assert result.stdout == "y\n" * 500
+        assert not result.timed_out
+        assert result.duration < 2
+
+    def test_dead_worker_is_replaced(self, pool):
+        # The snippet's shell kills the worker process that started it
+        result = pool.run("kill -9 $PPID")
+        assert result.exit_code != 0
+        assert pool.run("echo again").stdout == "again\n"
+        assert pool.stats()["restarts"] >= 1
+
+
+@pytest.mark.django_db
+class TestSandboxGrader:
+
+    def test_compares_real_output(self, shared_pool, challenges):
+        challenge = challenges[0]
+        challenge.grader = grading.GRADER_SANDBOX
+        challenge.expected_output = "repo"
+        challenge.setup_script = "mkdir repo"
+        challenge.save()
+        assert grading.grade(challenge, "ls")
+        assert not grading.grade(challenge, "pwd")
+
+    def test_busy_grader_records_no_attempt(
+        self, monkeypatch, learner_client, enrollment, challenges
+    ):
+        def busy(*args, **kwargs):
+            raise sandbox.SandboxBusy()
+
+        monkeypatch.setattr(sandbox, "run", busy)
+        challenge = challenges[0]
+        challenge.grader = grading.GRADER_SANDBOX
+        challenge.save()
+        url = reverse("courses:attempt_challenge", args=[challenge.pk])
+        response = learner_client.post(url, {"answer": "ls"})
+        assert response.status_code == 302
+        assert not UserChallengeAttempt.objects.exists()
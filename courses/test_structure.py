@@ -0,0 +1,68 @@
+from django.db.models import F
+from django.urls import reverse
+
+import pytest
+
+from courses import structure
+from courses.models import Challenge, Module, StructureGeneration
+
+
+@pytest.mark.django_db
+class TestCourseStructureSnapshot:
+
+    def test_snapshot_holds_ordered_modules_and_challenges(self, course, challenges):
+        """Modules come back in order with their challenge ids and points."""
+        snapshot = structure.get_course(slug="practical-git")
+
+        assert [m.order for m in snapshot.modules] == [1, 2]
+        assert snapshot.modules[0].challenge_ids == (challenges[0].id, challenges[1].id)
+        assert snapshot.modules[1].points == 20
+        assert snapshot.module_by_challenge[challenges[2].id].order == 2
+
+    def test_snapshot_is_served_without_queries(
+        self, course, django_assert_num_queries
+    ):
+        """Once loaded, the snapshot is read from process memory."""
+        structure.catalog()
+        with django_assert_num_queries(0):
+            structure.get_course(slug="practical-git")
+
+    def test_content_changes_bump_the_generation(self, course):
+        """Saving a challenge invalidates every snapshot built before it."""
+        before = structure.catalog()
+        module = Module.objects.get(course=course, order=2)
+        Challenge.objects.create(module=module, prompt="merge", expected_output="ok")
+
+        after = structure.catalog()
+        assert after.generation != before.generation
+        assert len(after.by_slug["practical-git"].modules[1].challenge_ids) == 2
+
+    def test_course_detail_reads_structure_from_snapshot(
+        self, client, course, django_assert_max_num_queries
+    ):
+        """A warm anonymous course page only reads the shared generation."""
+        url = reverse("courses:course_detail", args=["practical-git"])
+        client.get(url)
+        with django_assert_max_num_queries(1):
+            response = client.get(url)
+        assert [m.title for m in response.context["modules"]] == [
+            "Basics",
+            "Branching",
+        ]
+
+    def test_change_by_another_worker_reloads_on_next_request(self, client, course):
+        """The generation lives in the database, not in this process."""
+        url = reverse("courses:course_detail", args=["practical-git"])
+        client.get(url)
+        before = structure.catalog().generation
+        # Another worker renamed a module: no signal ran in this process
+        Module.objects.filter(course=course, order=1).update(title="Setup")
+        StructureGeneration.objects.filter(pk=1).update(value=F("value") + 1)
+
+        response = client.get(url)
+        assert structure.catalog().generation == before + 1
+        assert response.context["modules"][0].title == "Setup"
+
+    def test_unknown_course_is_404(self, client, course):
+        url = reverse("courses:course_detail", args=["missing"])
+        assert client.get(url).status_code == 404
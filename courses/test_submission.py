@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+
+import pytest
+
+from courses.models import ChallengeProgress, Enrollment, UserChallengeAttempt
+from courses.submission import submit_attempt
+
+
+@pytest.mark.django_db
+class TestSubmitAttempt:
+
+    def test_attempt_numbers_are_sequential(self, enrollment, challenges):
+        """attempt_no comes from the progress counter, not a count of attempts."""
+        for _ in range(3):
+            submit_attempt(enrollment, challenges[0], False)
+
+        numbers = UserChallengeAttempt.objects.order_by("attempt_no").values_list(
+            "attempt_no", flat=True
+        )
+        assert list(numbers) == [1, 2, 3]
+        assert ChallengeProgress.objects.get(challenge=challenges[0]).attempts == 3
+
+    def test_numbering_continues_after_untracked_attempts(
+        self, learner, enrollment, challenges
+    ):
+        """Attempts logged before the progress row existed are not renumbered."""
+        UserChallengeAttempt.objects.create(
+            user=learner, challenge=challenges[0], attempt_no=4
+        )
+        result = submit_attempt(enrollment, challenges[0], True)
+        assert result.attempt.attempt_no == 5
+
+    def test_xp_increments_are_not_lost_with_stale_instances(
+        self, enrollment, challenges
+    ):
+        """Two submissions through stale copies of the enrollment both count."""
+        stale_copy = Enrollment.objects.get(pk=enrollment.pk)
+        submit_attempt(enrollment, challenges[0], True)
+        submit_attempt(stale_copy, challenges[1], True)
+
+        enrollment.refresh_from_db()
+        assert enrollment.xp == 20
+        assert enrollment.streak == 2
+        assert stale_copy.xp == 20
+
+    def test_duplicate_attempt_numbers_are_rejected(self, learner, challenges):
+        """The database refuses a second attempt with the same number."""
+        UserChallengeAttempt.objects.create(
+            user=learner, challenge=challenges[0], attempt_no=1
+        )
+        with pytest.raises(IntegrityError), transaction.atomic():
+            UserChallengeAttempt.objects.create(
+                user=learner, challenge=challenges[0], attempt_no=1
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    connection.vendor == "sqlite", reason="needs a database with row-level locking"
+)
+def test_parallel_submitters_keep_xp_consistent():
+    """The benchmark command fails loudly if any XP or attempt_no is lost."""
+    out = StringIO()
+    call_command("bench_submissions", submitters=6, attempts=10, learners=2, stdout=out)
+    assert "consistent" in out.getvalue()
@@ -8,12 +8,19 @@ app_name = "courses"
 urlpatterns = [
     path("", views.home, name="home_redirect"),  # optional: /courses/ to view courses
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("coach/", views.coach_dashboard, name="coach_dashboard"),
     path("<slug:slug>/", views.course_detail, name="course_detail"),
     path("<slug:slug>/enroll/", views.enroll_in_course, name="enroll"),
     path("<slug:slug>/learning-center/", views.learning_center, name="learning_center"),
+    path("<slug:slug>/export/", views.export_progress, name="export_progress"),
     path(
         "challenge/<int:challenge_id>/attempt/",
         views.attempt_challenge,
         name="attempt_challenge",
     ),
+    path(
+        "jobs/<int:job_id>/",
+        views.grading_job_status,
+        name="grading_job_status",
+    ),
 ]
@@ -1,10 +1,27 @@
+from dataclasses import is_dataclass, replace
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils.translation import gettext as _
 
-from .models import Challenge, Course, Enrollment, UserChallengeAttempt
+from . import (
+    coaching,
+    grading,
+    jobs,
+    leaderboard,
+    progress,
+    recommendations,
+    reports,
+    rollups,
+    sandbox,
+    structure,
+    submission,
+)
+from .models import Challenge, Course, Enrollment, GradingJob
 
 # Minimal bilingual support for course/module titles & descriptions
 COURSE_TRANSLATIONS = {
@@ -62,14 +79,26 @@ MODULE_TRANSLATIONS = {
 }
 
 
+def _localized(obj, **overrides):
+    """Apply translated fields; immutable structure snapshots come back as copies."""
+    if is_dataclass(obj):
+        return replace(obj, **overrides)
+    for name, value in overrides.items():
+        setattr(obj, name, value)
+    return obj
+
+
 def _localize_course(course, lang_code):
     """Override course title/description for the requested language if available."""
     if not lang_code or not lang_code.startswith("ne"):
         return course
     trans = COURSE_TRANSLATIONS.get(course.slug, {}).get("ne")
     if trans:
-        course.title = trans.get("title", course.title)
-        course.description = trans.get("description", course.description)
+        course = _localized(
+            course,
+            title=trans.get("title", course.title),
+            description=trans.get("description", course.description),
+        )
     return course
 
 
@@ -78,31 +107,39 @@ def _localize_modules(course, modules, lang_code):
     if not lang_code or not lang_code.startswith("ne"):
         return modules
     per_course = MODULE_TRANSLATIONS.get(course.slug, {})
+    localized = []
     for m in modules:
         mt = per_course.get(getattr(m, "order", None), {})
-        m.title = mt.get("title", m.title)
-        m.content = mt.get("content", m.content)
-    return modules
+        localized.append(
+            _localized(
+                m,
+                title=mt.get("title", m.title),
+                content=mt.get("content", m.content),
+            )
+        )
+    return localized
+
+
+def _get_course_or_404(slug):
+    course = structure.get_course(slug=slug)
+    if course is None:
+        raise Http404("No course matches the given query.")
+    return course
 
 
 def home(request):
     """Homepage listing active courses. Not authenticated by default."""
-    courses = (
-        Course.objects.filter(is_active=True)
-        .filter(
-            Q(title__icontains="practical git") | Q(title__icontains="linux foundation")
-        )
-        .order_by("title")
-    )
+    # Optimized: read the catalog from the in-process structure snapshot
+    featured = ("practical git", "linux foundation")
+    courses = [
+        course
+        for course in structure.catalog().courses
+        if course.is_active and any(name in course.title.lower() for name in featured)
+    ]
     lang = getattr(request, "LANGUAGE_CODE", None)
     courses = [_localize_course(course, lang) for course in courses]
-    active_enrollment = None
-    if request.user.is_authenticated:
-        active_enrollment = (
-            Enrollment.objects.filter(user=request.user)
-            .select_related("course")
-            .first()
-        )
+    # Optimized: enrolled courses come from the session-cached learner context
+    active_enrollment = request.learner.latest_enrollment if request.learner else None
     return render(
         request,
         "home.html",
@@ -112,16 +149,13 @@ def home(request):
 
 def course_detail(request, slug):
     """Show course details and modules; provide enroll button if not enrolled."""
-    course = get_object_or_404(Course, slug=slug)
-    modules = list(course.modules.all().order_by("order"))
+    course = _get_course_or_404(slug)
     lang = getattr(request, "LANGUAGE_CODE", None)
-    _localize_course(course, lang)
-    _localize_modules(course, modules, lang)
+    modules = _localize_modules(course, course.modules, lang)
+    course = _localize_course(course, lang)
     user_enrollment = None
-    if request.user.is_authenticated:
-        user_enrollment = Enrollment.objects.filter(
-            user=request.user, course=course
-        ).first()
+    if request.learner:
+        user_enrollment = request.learner.enrollment_for(course.id)
 
     return render(
         request,
@@ -142,10 +176,13 @@ def enroll_in_course(request, slug):
         user=request.user, course=course
     )
     if created:
-        messages.success(request, _("Enrolled in %(course)s.") % {"course": course.title})
+        messages.success(
+            request, _("Enrolled in %(course)s.") % {"course": course.title}
+        )
     else:
         messages.info(
-            request, _("You are already enrolled in %(course)s.") % {"course": course.title}
+            request,
+            _("You are already enrolled in %(course)s.") % {"course": course.title},
         )
     return redirect("courses:dashboard")
 
@@ -154,20 +191,22 @@ def enroll_in_course(request, slug):
 def dashboard(request):
     """User-facing dashboard with enrollments, xp, streaks, and leaderboard snippets."""
     # Optimized: select_related to avoid N+1
-    enrollments = Enrollment.objects.filter(user=request.user).select_related("course")
+    enrollments = list(
+        Enrollment.objects.filter(user=request.user).select_related("course")
+    )
     lang = getattr(request, "LANGUAGE_CODE", None)
     for e in enrollments:
         _localize_course(e.course, lang)
 
     # REMOVED: Dynamic calculate_progress loop. Rely on stored 'progress' field for read efficiency.
 
-    # simple leaderboard example for each course (top 5)
-    course_ids = [e.course_id for e in enrollments]
-    leaderboards = {}
-    if course_ids:
-        for cid in course_ids:
-            top = Enrollment.objects.filter(course_id=cid).order_by("-xp")[:5]
-            leaderboards[cid] = top
+    # Optimized: attempt totals for every row in one query, not one per row
+    rollups.prefetch_totals(enrollments)
+
+    # Optimized: one leaderboard read for all courses instead of a query per course
+    leaderboards = leaderboard.standings(enrollments)
+    for e in enrollments:
+        e.leaderboard = leaderboards[e.course_id]
 
     return render(
         request,
@@ -179,89 +218,100 @@ def dashboard(request):
     )
 
 
-def calculate_progress(enrollment):
-    """Calculate percent of modules fully solved."""
-    # Optimized: prefetch challenges to avoid N+1
-    modules = enrollment.course.modules.prefetch_related("challenges")
-    total = modules.count()
-    if total == 0:
-        return 0
-    completed = 0
-
-    # Get all solved challenge IDs for this user and course in one query
-    solved_challenge_ids = set(
-        UserChallengeAttempt.objects.filter(
-            user=enrollment.user,
-            challenge__module__course=enrollment.course,
-            is_correct=True,
-        ).values_list("challenge_id", flat=True)
+@login_required
+def coach_dashboard(request):
+    """Stuck learners and most-failed challenges across the coach's courses."""
+    if not coaching.is_coach(request.user):
+        raise PermissionDenied
+    thresholds = coaching.Thresholds(
+        **{
+            name: int(request.GET[name])
+            for name in ("failures", "inactive_days", "streak_reset_days")
+            if request.GET.get(name, "").isdigit()
+        }
+    )
+    courses = coaching.coached_courses(request.user)
+    # Optimized: precomputed enrollment signals, no scan of the attempt log
+    stuck, stuck_total = coaching.stuck_learners(courses, thresholds)
+    most_failed = coaching.most_failed_challenges(courses)
+    return render(
+        request,
+        "courses/coach_dashboard.html",
+        {
+            "courses": [(course, most_failed[course.pk]) for course in courses],
+            "stuck": stuck,
+            "stuck_total": stuck_total,
+            "thresholds": thresholds,
+        },
     )
 
-    for m in modules:
-        challenge_ids = [c.id for c in m.challenges.all()]
-        if not challenge_ids:
-            continue
-
-        if all(cid in solved_challenge_ids for cid in challenge_ids):
-            completed += 1
 
-    return int((completed / total) * 100)
+@login_required
+def export_progress(request, slug):
+    """Stream per-learner progress of a course as CSV or JSON Lines."""
+    course = _get_course_or_404(slug)
+    if not coaching.can_coach(request.user, course.id):
+        raise PermissionDenied
+    fmt = request.GET.get("format", "csv")
+    if fmt not in reports.FORMATS:
+        raise Http404("Unknown export format.")
+    # Optimized: rows are streamed from a server-side cursor in chunks
+    response = StreamingHttpResponse(
+        reports.lines([course.id], fmt), content_type=reports.FORMATS[fmt]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{course.slug}-progress.{fmt}"'
+    )
+    return response
 
 
 @login_required
 def learning_center(request, slug):
     """Return next active module + next challenge for the user."""
-    course = get_object_or_404(Course, slug=slug)
-    enrollment = get_object_or_404(Enrollment, user=request.user, course=course)
-
-    # Optimized: Prefetch modules and challenges
-    modules = list(course.modules.prefetch_related("challenges").order_by("order"))
-    lang = getattr(request, "LANGUAGE_CODE", None)
-    _localize_course(course, lang)
-    _localize_modules(course, modules, lang)
+    course = _get_course_or_404(slug)
+    # Optimized: the enrollment carries a cursor, so no scan of modules or attempts
+    enrollment = get_object_or_404(
+        Enrollment.objects.select_related("next_challenge"),
+        user=request.user,
+        course_id=course.id,
+    )
 
-    if not modules:
+    if not course.modules:
         messages.warning(request, _("This course has no modules yet."))
         return redirect("courses:dashboard")
 
-    # Optimized: Fetch all solved challenges for this course once
-    solved_challenge_ids = set(
-        UserChallengeAttempt.objects.filter(
-            user=request.user, challenge__module__course=course, is_correct=True
-        ).values_list("challenge_id", flat=True)
-    )
-
-    active_module = None
-    next_challenge = None
+    cursor = enrollment.next_challenge_id
+    if enrollment.cursor_generation != structure.catalog().generation or (
+        cursor is not None and cursor not in course.module_by_challenge
+    ):
+        # Content changed since the cursor was stored; repair it lazily
+        progress.move_cursor(enrollment, course)
 
-    for m in modules:
-        challenges = m.challenges.all()
-        if not challenges:
-            continue
-
-        module_challenge_ids = [c.id for c in challenges]
-        is_complete = all(cid in solved_challenge_ids for cid in module_challenge_ids)
-
-        if not is_complete:
-            active_module = m
-            for c in challenges:
-                if c.id not in solved_challenge_ids:
-                    next_challenge = c
-                    break
-            break
-
-    if active_module is None:
+    if enrollment.next_challenge_id is None:
         messages.success(request, _("You have completed the course!"))
         return redirect("courses:dashboard")
 
+    lang = getattr(request, "LANGUAGE_CODE", None)
+    active_module = course.module_by_challenge[enrollment.next_challenge_id]
+    (active_module,) = _localize_modules(course, [active_module], lang)
+    course = _localize_course(course, lang)
+
+    grading_job = None
+    if request.GET.get("job", "").isdigit():
+        grading_job = GradingJob.objects.filter(
+            pk=request.GET["job"], enrollment=enrollment
+        ).first()
+
     return render(
         request,
         "courses/learning_center.html",
         {
             "course": course,
             "active_module": active_module,
-            "challenge": next_challenge,
+            "challenge": enrollment.next_challenge,
             "enrollment": enrollment,
+            "grading_job": grading_job,
+            "recommendations": recommendations.for_enrollment(enrollment),
         },
     )
 
@@ -269,7 +319,10 @@ def learning_center(request, slug):
 @login_required
 def attempt_challenge(request, challenge_id):
     """Accept POST with 'answer' and optional 'time_seconds' then evaluate and update enrollment XP/streak."""
-    challenge = get_object_or_404(Challenge, id=challenge_id)
+    # Optimized: select_related so module points and course slug need no extra queries
+    challenge = get_object_or_404(
+        Challenge.objects.select_related("module__course"), id=challenge_id
+    )
     course = challenge.module.course
     enrollment = get_object_or_404(Enrollment, user=request.user, course=course)
 
@@ -282,32 +335,58 @@ def attempt_challenge(request, challenge_id):
     except (ValueError, TypeError):
         time_seconds = 0
 
-    is_correct = user_answer == challenge.expected_output.strip()
+    if jobs.is_async(challenge):
+        # Graded by run_grading_worker; the learning center polls for the verdict
+        job = jobs.enqueue(enrollment, challenge, user_answer, time_seconds)
+        url = reverse("courses:learning_center", args=[course.slug])
+        return redirect(f"{url}?job={job.pk}")
 
-    prev_attempts = UserChallengeAttempt.objects.filter(
-        user=request.user, challenge=challenge
-    ).count()
-    UserChallengeAttempt.objects.create(
-        user=request.user,
-        challenge=challenge,
-        is_correct=is_correct,
-        attempt_no=prev_attempts + 1,
-        time_seconds=time_seconds,
-    )
+    try:
+        is_correct = grading.grade(challenge, user_answer)
+    except sandbox.SandboxBusy:
+        # Not the learner's fault: record nothing and let them resubmit.
+        messages.warning(request, _("The grader is busy — please submit again."))
+        return redirect("courses:learning_center", slug=course.slug)
 
-    if is_correct:
-        earned_xp = challenge.module.points
-        enrollment.xp = (enrollment.xp or 0) + earned_xp
-        enrollment.streak = (enrollment.streak or 0) + 1
+    result = submission.submit_attempt(enrollment, challenge, is_correct, time_seconds)
+    if result.is_correct:
         messages.success(
             request,
-            _("Correct — +%(xp)s XP. Streak +1.") % {"xp": earned_xp},
+            _("Correct — +%(xp)s XP. Streak +1.") % {"xp": result.earned_xp},
         )
     else:
-        enrollment.streak = 0
         messages.error(request, _("Incorrect — try again!"))
 
-    enrollment.progress = calculate_progress(enrollment)
-    enrollment.save()
-
     return redirect("courses:learning_center", slug=course.slug)
+
+
+@login_required
+def grading_job_status(request, job_id):
+    """JSON verdict of a queued submission, polled by the learning center."""
+    job = get_object_or_404(
+        GradingJob.objects.only(
+            "status", "earned_xp", "attempt__is_correct"
+        ).select_related("attempt"),
+        pk=job_id,
+        enrollment__user=request.user,
+    )
+    is_correct = job.attempt.is_correct if job.attempt_id else None
+    if job.status == GradingJob.DONE:
+        message = (
+            _("Correct — +%(xp)s XP. Streak +1.") % {"xp": job.earned_xp}
+            if is_correct
+            else _("Incorrect — try again!")
+        )
+    elif job.status == GradingJob.FAILED:
+        message = _("Grading failed — please submit again.")
+    else:
+        message = _("Grading your submission…")
+    return JsonResponse(
+        {
+            "status": job.status,
+            "finished": job.is_finished,
+            "is_correct": is_correct,
+            "earned_xp": job.earned_xp,
+            "message": message,
+        }
+    )